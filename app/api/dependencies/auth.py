@@ -1,12 +1,12 @@
 from typing import Optional
 from app.models.auth.user import ReadUserModel
 from fastapi.security import HTTPAuthorizationCredentials
-from app.config import settings
 from app.core.enums import TokenTypeEnum
 from app.core.exceptions.auth.exceptions import (
     FailedAuthorizationException,
     NotAuthenticatedException,
 )
+from app.core.security import is_harmix_api_key
 from app.services.auth.auth_service import AuthService
 
 
@@ -34,10 +34,10 @@ class AuthDependencies:
             raise NotAuthenticatedException()
         return user_id
 
-    def require_user_for_refresh(self, user_id: int) -> ReadUserModel:
+    async def require_user_for_refresh(self, user_id: int) -> ReadUserModel:
         """Required refresh-token user fetch"""
-        return self.auth_service.require_user(user_id=user_id)
+        return await self.auth_service.require_user(user_id=user_id)
 
     def require_harmix_api_key(self, api_key: Optional[str]):
-        if api_key != settings.HARMIX_API_KEY:
+        if not is_harmix_api_key(api_key):
             raise FailedAuthorizationException("API key is invalid")
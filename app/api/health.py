@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+
+router = APIRouter()
+
+
+@router.get("/health", include_in_schema=False)
+async def get_health() -> dict:
+    """Liveness of the API, checked by the proxy in front of user backends."""
+    return {"status": "ok"}
@@ -1,8 +1,8 @@
 import uuid
-from datetime import datetime
 
 from pydantic import BaseModel
 
+from app.models.messages.conversation import ConversationDto
 from app.models.messages.message import MessageDto
 
 
@@ -16,4 +16,14 @@ class GetMessagesResponseSchema(BaseModel):
     conversation_id: uuid.UUID
     conversation_type: str
     turns: list[TurnSchema]
-    next_cursor: datetime | None
+    next_cursor: str | None
+
+
+class MessageContentResponseSchema(BaseModel):
+    message_id: uuid.UUID
+    content: dict
+
+
+class GetConversationsResponseSchema(BaseModel):
+    conversations: list[ConversationDto]
+    next_cursor: str | None
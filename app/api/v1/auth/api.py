@@ -41,7 +41,7 @@ async def register_user(
     ],
 ) -> ReadUserModel:
     try:
-        user = auth_service.register_user(user_data)
+        user = await auth_service.register_user(user_data)
 
         # Provision resources for the new user in the background
         background_tasks.add_task(
@@ -63,7 +63,7 @@ async def auth_user(
     user_data: LoginRequest,
     auth_service: Annotated[AuthService, Depends(get_auth_service)],
 ) -> LoginResponse:
-    user = auth_service.verify_login(body=user_data)
+    user = await auth_service.verify_login(body=user_data)
     tokens = auth_service.generate_tokens_for_user(user.id)
     return LoginResponse(tokens=tokens, user=user)
 
@@ -78,7 +78,7 @@ async def forgot_password(
     body: ForgotPasswordRequest,
     auth_service: Annotated[AuthService, Depends(get_auth_service)],
 ):
-    user = auth_service.get_user_by_email(email=body.email)
+    user = await auth_service.get_user_by_email(email=body.email)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -99,7 +99,7 @@ async def me(
     auth_service: Annotated[AuthService, Depends(get_auth_service)],
 ) -> ReadUserModel:
     user_id = deps.require_access_token_user_id(token)
-    return auth_service.require_user(user_id)
+    return await auth_service.require_user(user_id)
 
 
 @router.post("/refresh")
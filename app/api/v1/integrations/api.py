@@ -35,7 +35,7 @@ async def list_integrations(
     Get all available integrations and mark which ones are active for the current user.
     """
     user_id = auth_deps.require_access_token_user_id(token)
-    result = integration_service.list_user_integrations(user_id)
+    result = await integration_service.list_user_integrations(user_id)
     return result
 
 
@@ -55,7 +55,7 @@ async def connect_integration(
     Returns an OAuth URL for the user to authorize.
     """
     user_id = auth_deps.require_access_token_user_id(token)
-    return integration_service.initiate_connection(
+    return await integration_service.initiate_connection(
         user_id=user_id,
         app_slug=payload.slug,
         redirect_url=payload.redirect_url
@@ -78,7 +78,7 @@ async def oauth_callback(
     Updates the connection status in the database.
     """
     user_id = auth_deps.require_access_token_user_id(token)
-    return integration_service.update_connection_from_callback(
+    return await integration_service.update_connection_from_callback(
         user_id=user_id,
         app_slug=payload.slug
     )
@@ -100,7 +100,7 @@ async def disconnect_integration(
     This revokes the OAuth connection in Composio and updates local database.
     """
     user_id = auth_deps.require_access_token_user_id(token)
-    return integration_service.disconnect_app(
+    return await integration_service.disconnect_app(
         user_id=user_id,
         app_slug=payload.slug
     )
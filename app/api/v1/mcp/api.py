@@ -77,7 +77,7 @@ async def mcp_tool_router(
     """
     # Get user from token
     user_id = deps.require_access_token_user_id(token)
-    user = auth_service.get_user_by_id(user_id)
+    user = await auth_service.get_user_by_id(user_id)
 
     if not user:
         return Response(
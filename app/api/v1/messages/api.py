@@ -1,47 +1,50 @@
-import datetime
 import logging
 import uuid
-from typing import Annotated, Iterable
+from typing import Annotated, AsyncIterable, Iterable
 
-import httpx
 from dependency_injector.wiring import Provide, inject
 from fastapi import (
     APIRouter,
     Depends,
+    Header,
     HTTPException,
     Request,
     Response,
     Security,
     status,
 )
+from fastapi.exceptions import RequestValidationError
 from fastapi.params import Query
 from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pydantic import ValidationError
+from starlette.types import Receive, Scope, Send
 
 from app.api.dependencies.auth import AuthDependencies
 from app.api.schemas.messages.requests import (
     PatchConversationRequest,
     SendMessageRequest,
 )
-from app.api.schemas.messages.responses import GetMessagesResponseSchema
+from app.api.schemas.messages.responses import (
+    GetConversationsResponseSchema,
+    GetMessagesResponseSchema,
+    MessageContentResponseSchema,
+)
 from app.config import settings
+from app.models.auth.user import ReadUserModel
 from app.models.messages.conversation import ConversationDto
 from app.services.auth.auth_service import AuthService
+from app.services.messages.active_turns import until_disconnected
 from app.services.messages.messages_service import MessagesService
+from app.services.proxy.backend_proxy import UpstreamStream, get_backend_proxy
 
 router = APIRouter(prefix="/messages")
-_client: httpx.AsyncClient | None = None
-
-
-def get_client() -> httpx.AsyncClient:
-    global _client
-    if _client is None:
-        _client = httpx.AsyncClient(
-            timeout=httpx.Timeout(connect=10, read=None, write=60, pool=60),
-            headers={"Accept-Encoding": "identity"},
-        )
-    return _client
 
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+    "Connection": "keep-alive",
+}
 
 HOP_BY_HOP = {
     "connection",
@@ -54,6 +57,9 @@ HOP_BY_HOP = {
     "upgrade",
 }
 
+# Page size when a cursor is given without a limit
+CONVERSATIONS_PAGE_SIZE = 50
+
 
 def filter_headers(headers: Iterable[tuple[str, str]]) -> dict[str, str]:
     out = {}
@@ -65,72 +71,170 @@ def filter_headers(headers: Iterable[tuple[str, str]]) -> dict[str, str]:
     return out
 
 
+class ProxiedStreamingResponse(StreamingResponse):
+    """
+    Streams a backend response and closes it however this response ends,
+    including when the client left before the body started, where the
+    body iterator never runs.
+    """
+
+    def __init__(self, upstream: UpstreamStream, content, **kwargs) -> None:
+        super().__init__(content, **kwargs)
+        self._upstream = upstream
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self._upstream.aclose()
+
+
+def runs_turns_locally(user_id: int) -> bool:
+    """Whether the user's turns run here rather than on their own backend."""
+    return settings.AGENT_API or user_id in settings.CENTRAL_API_USER_ID
+
+
+async def open_backend_stream(
+    user: ReadUserModel,
+    method: str,
+    path: str,
+    request: Request,
+    content: AsyncIterable[bytes] | None = None,
+) -> UpstreamStream:
+    """
+    Send the request on to the user's backend
+
+    Fails fast with a 503 when the backend is down or its circuit is open.
+    """
+    backend = user.server_host
+    if not backend:
+        raise HTTPException(503, "No backend assigned")
+
+    logging.info(f"Proxying request to {backend}{path}")
+
+    in_headers = filter_headers(request.headers.items())
+    in_headers.setdefault("Accept", "text/event-stream")
+    in_headers.setdefault("Accept-Encoding", "identity")
+
+    return await get_backend_proxy().backend(backend).stream(
+        method, path, headers=in_headers, content=content
+    )
+
+
+async def read_backend_response(resp: UpstreamStream) -> Response:
+    """The whole backend response, passed on with its status."""
+    try:
+        body = await resp.aread()
+    finally:
+        await resp.aclose()
+    return Response(
+        content=body,
+        status_code=resp.status_code,
+        media_type=resp.headers.get("content-type"),
+    )
+
+
+async def read_send_message_request(request: Request) -> SendMessageRequest:
+    """Parse the body as FastAPI would for a ``SendMessageRequest`` parameter."""
+    try:
+        return SendMessageRequest.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors()]
+        )
+
+
 @router.get("/messages")
 @inject
-def get_messages(
+async def get_messages(
     conversation_id: uuid.UUID,
     deps: Annotated[AuthDependencies, Depends(Provide["auth_deps"])],
     message_service: Annotated[MessagesService, Depends(Provide["message_service"])],
     token: HTTPAuthorizationCredentials | None = Security(HTTPBearer()),
-    limit: int = 10,
-    cursor: datetime.datetime | None = None,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: str | None = None,
+    compact: bool = Query(False, description="Send each message's content once"),
 ) -> GetMessagesResponseSchema:
     user_id = deps.require_access_token_user_id(token)
-    return message_service.get_messages(user_id, conversation_id, limit, cursor)
+    return await message_service.get_messages(
+        user_id,
+        conversation_id,
+        limit,
+        cursor,
+        compact,
+    )
+
+
+@router.get("/messages/{message_id}/content")
+@inject
+async def get_message_content(
+    message_id: uuid.UUID,
+    deps: Annotated[AuthDependencies, Depends(Provide["auth_deps"])],
+    message_service: Annotated[MessagesService, Depends(Provide["message_service"])],
+    token: HTTPAuthorizationCredentials | None = Security(HTTPBearer()),
+) -> MessageContentResponseSchema:
+    """The full content block of a message whose history entry is truncated."""
+    user_id = deps.require_access_token_user_id(token)
+    return await message_service.get_message_content(user_id, message_id)
 
 
-@router.post("/messages")
+# The body is read here only when the turn runs locally; proxied requests
+# stream it to the backend untouched, so it is documented by hand
+@router.post(
+    "/messages",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": SendMessageRequest.model_json_schema()}
+            },
+        }
+    },
+)
 @inject
 async def send_messages(
-    body: SendMessageRequest,
     request: Request,
     deps: Annotated[AuthDependencies, Depends(Provide["auth_deps"])],
     message_service: Annotated[MessagesService, Depends(Provide["message_service"])],
     auth_service: Annotated[AuthService, Depends(Provide["auth_service"])],
     token: HTTPAuthorizationCredentials | None = Security(HTTPBearer()),
+    idempotency_key: Annotated[str | None, Header(alias="Idempotency-Key")] = None,
 ):
     user_id = deps.require_access_token_user_id(token)
-    user = auth_service.get_user_by_id(user_id)
-    logging.info(
-        f"Received send message request, user_id={user_id}, prompt: {body.prompt}"
-    )
+    user = await auth_service.get_user_by_id(user_id)
 
-    headers = {
-        "Cache-Control": "no-cache",
-        "X-Accel-Buffering": "no",
-        "Connection": "keep-alive",
-    }
+    headers = SSE_HEADERS
 
-    if settings.AGENT_API or user_id in settings.CENTRAL_API_USER_ID:
+    if runs_turns_locally(user_id):
+        body = await read_send_message_request(request)
+        logging.info(
+            f"Received send message request, user_id={user_id}, prompt: {body.prompt}"
+        )
         logging.info("Streaming response from local Claude code.")
-        return await message_service.send_streaming_response(user, body, headers)
-
-    backend = user.server_host
-    if not backend:
-        raise HTTPException(503, "No backend assigned")
-
-    target = f"{backend}/v1/messages/messages"
-    logging.info(f"Proxying request to {target}")
-
-    in_headers = filter_headers(request.headers.items())
-    in_headers.setdefault("Accept", "text/event-stream")
-    in_headers.setdefault("Accept-Encoding", "identity")
+        return await message_service.send_streaming_response(
+            user, body, headers, request.receive, idempotency_key
+        )
 
-    client = get_client()
-    raw_body = await request.body()
+    logging.info(f"Received send message request to proxy, user_id={user_id}")
+    resp = await open_backend_stream(
+        user, "POST", "/v1/messages/messages", request, content=request.stream()
+    )
 
     async def gen():
-        async with client.stream(
-            "POST", target, headers=in_headers, content=raw_body
-        ) as resp:
-            if resp.status_code >= 400:
-                err = await resp.aread()
-                yield f"event: error\ndata: {err.decode('utf-8', 'ignore')}\n\n"
-                return
-            async for chunk in resp.aiter_bytes():
-                yield chunk
+        if resp.status_code >= 400:
+            err = await resp.aread()
+            yield f"event: error\ndata: {err.decode('utf-8', 'ignore')}\n\n"
+            return
+        async for frame in resp.aiter_frames():
+            yield frame
 
-    return StreamingResponse(gen(), media_type="text/event-stream", headers=headers)
+    # Closing early drops the connection, which stops the remote run
+    return ProxiedStreamingResponse(
+        resp,
+        until_disconnected(gen(), request.receive),
+        media_type="text/event-stream",
+        headers=headers,
+    )
 
 
 @router.get("/conversations")
@@ -141,10 +245,27 @@ async def get_user_conversations(
     auth_service: Annotated[AuthService, Depends(Provide["auth_service"])],
     conversation_type: str | None = Query(None, alias="type"),
     token: HTTPAuthorizationCredentials | None = Security(HTTPBearer()),
-) -> list[ConversationDto]:
+    limit: int | None = Query(None, ge=1, le=100),
+    cursor: str | None = None,
+) -> GetConversationsResponseSchema | list[ConversationDto]:
     user_id = deps.require_access_token_user_id(token)
-    user = auth_service.get_user_by_id(user_id)
-    return await message_service.get_user_conversations(user, conversation_type)
+    user = await auth_service.get_user_by_id(user_id)
+
+    # Clients that do not paginate still get every conversation as a list
+    if limit is None and cursor is None:
+        page = await message_service.get_user_conversations(
+            user,
+            None,
+            conversation_type=conversation_type,
+        )
+        return page.conversations
+
+    return await message_service.get_user_conversations(
+        user,
+        limit or CONVERSATIONS_PAGE_SIZE,
+        cursor,
+        conversation_type,
+    )
 
 
 @router.delete("/conversations/{conversation_id}")
@@ -157,11 +278,70 @@ async def delete_conversation(
     token: HTTPAuthorizationCredentials | None = Security(HTTPBearer()),
 ):
     user_id = deps.require_access_token_user_id(token)
-    user = auth_service.get_user_by_id(user_id)
+    user = await auth_service.get_user_by_id(user_id)
     await message_service.delete_conversation(user, conversation_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
+@router.get("/conversations/{conversation_id}/stream")
+@inject
+async def stream_conversation_turn(
+    conversation_id: uuid.UUID,
+    request: Request,
+    deps: Annotated[AuthDependencies, Depends(Provide["auth_deps"])],
+    message_service: Annotated[MessagesService, Depends(Provide["message_service"])],
+    auth_service: Annotated[AuthService, Depends(Provide["auth_service"])],
+    token: HTTPAuthorizationCredentials | None = Security(HTTPBearer()),
+    last_event_id: Annotated[str | None, Header(alias="Last-Event-ID")] = None,
+):
+    user_id = deps.require_access_token_user_id(token)
+    user = await auth_service.get_user_by_id(user_id)
+    if runs_turns_locally(user_id):
+        return await message_service.subscribe_to_turn(
+            user, conversation_id, last_event_id, SSE_HEADERS, request.receive
+        )
+
+    # Last-Event-ID is passed on with the other headers
+    resp = await open_backend_stream(
+        user, "GET", f"/v1/messages/conversations/{conversation_id}/stream", request
+    )
+    if resp.status_code >= 400:
+        return await read_backend_response(resp)
+
+    return ProxiedStreamingResponse(
+        resp,
+        until_disconnected(resp.aiter_frames(), request.receive),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@router.post("/conversations/{conversation_id}/cancel")
+@inject
+async def cancel_conversation_turn(
+    conversation_id: uuid.UUID,
+    request: Request,
+    deps: Annotated[AuthDependencies, Depends(Provide["auth_deps"])],
+    message_service: Annotated[MessagesService, Depends(Provide["message_service"])],
+    auth_service: Annotated[AuthService, Depends(Provide["auth_service"])],
+    token: HTTPAuthorizationCredentials | None = Security(HTTPBearer()),
+):
+    user_id = deps.require_access_token_user_id(token)
+    user = await auth_service.get_user_by_id(user_id)
+    if not runs_turns_locally(user_id):
+        return await read_backend_response(
+            await open_backend_stream(
+                user,
+                "POST",
+                f"/v1/messages/conversations/{conversation_id}/cancel",
+                request,
+            )
+        )
+
+    await message_service.cancel_turn(user, conversation_id)
+    return Response(status_code=status.HTTP_202_ACCEPTED)
+
+
 @router.patch("/conversations/{conversation_id}")
 @inject
 async def patch_conversation(
@@ -173,6 +353,6 @@ async def patch_conversation(
     token: HTTPAuthorizationCredentials | None = Security(HTTPBearer()),
 ):
     user_id = deps.require_access_token_user_id(token)
-    user = auth_service.get_user_by_id(user_id)
+    user = await auth_service.get_user_by_id(user_id)
     return await message_service.patch_conversation(user, conversation_id, body)
 
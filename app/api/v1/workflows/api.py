@@ -34,7 +34,7 @@ async def get_user_workflows(
     auth_service: Annotated[AuthService, Depends(Provide["auth_service"])],
 ) -> list[WorkflowModel]:
     user_id = deps.require_access_token_user_id(token)
-    user = auth_service.get_user_by_id(user_id)
+    user = await auth_service.get_user_by_id(user_id)
     return await workflow_service.get_user_workflows(user)
 
 
@@ -48,7 +48,7 @@ async def create_workflow(
     auth_service: Annotated[AuthService, Depends(Provide["auth_service"])],
 ) -> WorkflowModel:
     user_id = deps.require_access_token_user_id(token)
-    user = auth_service.get_user_by_id(user_id)
+    user = await auth_service.get_user_by_id(user_id)
     return await workflow_service.create_workflow(data, user)
 
 
@@ -62,7 +62,7 @@ async def get_workflow_detail(
     auth_service: Annotated[AuthService, Depends(Provide["auth_service"])],
 ) -> WorkflowModel:
     user_id = deps.require_access_token_user_id(token)
-    user = auth_service.get_user_by_id(user_id)
+    user = await auth_service.get_user_by_id(user_id)
     return await workflow_service.get_workflow_details(user, workflow_id)
 
 
@@ -76,7 +76,7 @@ async def delete_workflow(
     auth_service: Annotated[AuthService, Depends(Provide["auth_service"])],
 ) -> Response:
     user_id = deps.require_access_token_user_id(token)
-    user = auth_service.get_user_by_id(user_id)
+    user = await auth_service.get_user_by_id(user_id)
     await workflow_service.delete_workflow(user, workflow_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
@@ -92,7 +92,7 @@ async def patch_workflow(
     auth_service: Annotated[AuthService, Depends(Provide["auth_service"])],
 ) -> WorkflowModel:
     user_id = deps.require_access_token_user_id(token)
-    user = auth_service.get_user_by_id(user_id)
+    user = await auth_service.get_user_by_id(user_id)
     return await workflow_service.patch_workflow(user, workflow_id, body)
 
 
@@ -106,7 +106,7 @@ async def run_workflow(
     auth_service: Annotated[AuthService, Depends(Provide["auth_service"])],
 ) -> Response:
     user_id = deps.require_access_token_user_id(token)
-    user = auth_service.get_user_by_id(user_id)
+    user = await auth_service.get_user_by_id(user_id)
     await workflow_service.run_workflow(workflow_id, user)
     return Response(status_code=status.HTTP_200_OK)
 
@@ -1,5 +1,6 @@
 import datetime
 from os import environ
+from typing import Literal
 
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -25,6 +26,24 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_LIFETIME: datetime.timedelta = datetime.timedelta(minutes=30)
     REFRESH_TOKEN_LIFETIME: datetime.timedelta = datetime.timedelta(days=30)
 
+    # Authentication caches: how many verified tokens each process keeps,
+    # and how long a user row is reused. The user cache lives in Redis,
+    # shared by all workers, when AUTH_USER_CACHE_IN_REDIS is set, and in
+    # each process otherwise.
+    AUTH_TOKEN_CACHE_SIZE: int = 10_000
+    AUTH_USER_CACHE_TTL: datetime.timedelta = datetime.timedelta(seconds=60)
+    AUTH_USER_CACHE_IN_REDIS: bool = False
+
+    # Password hashing: the scheme new hashes use (hashes of the other one
+    # and of the legacy sha512_crypt are upgraded on login), its cost
+    # parameters (argon2 memory in KiB), and how many hashes run at once.
+    PASSWORD_HASH_SCHEME: Literal["argon2", "bcrypt"] = "argon2"
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 64 * 1024
+    ARGON2_PARALLELISM: int = 1
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_MAX_WORKERS: int = 4
+
     # Database configuration.
     DATABASE_HOST: str
     DATABASE_PORT: int
@@ -34,6 +53,34 @@ class Settings(BaseSettings):
 
     WORKING_DIR: str
 
+    # How one-shot Claude CLI processes are attached: "pty" or plain "pipe"s.
+    CLAUDE_CLI_TRANSPORT: Literal["pty", "pipe"] = "pty"
+
+    # Warm Claude CLI worker processes, one per active conversation.
+    CLAUDE_WORKER_POOL_ENABLED: bool = True
+    CLAUDE_WORKER_POOL_MAX_WORKERS: int = 8
+    CLAUDE_WORKER_IDLE_TTL: datetime.timedelta = datetime.timedelta(minutes=10)
+
+    # Streamed messages are stored in batches of up to this many blocks, at
+    # most this long after the first one arrived.
+    MESSAGE_FLUSH_MAX_BLOCKS: int = 20
+    MESSAGE_FLUSH_INTERVAL: datetime.timedelta = datetime.timedelta(milliseconds=250)
+
+    # tool_result blocks larger than this (as JSON) are stored compressed in
+    # message_blobs, and message history shows a preview of this many chars.
+    MESSAGE_BLOCK_OFFLOAD_BYTES: int = 16 * 1024
+    MESSAGE_BLOCK_PREVIEW_CHARS: int = 1000
+
+    # Admission control for Claude CLI runs, shared through Redis by the
+    # processes of one scope (None for the host name).
+    CLAUDE_MAX_CONCURRENT_RUNS: int = 8
+    CLAUDE_MAX_RUNS_PER_USER: int = 2
+    CLAUDE_RUN_LIMIT_SCOPE: str | None = None
+    CLAUDE_RUN_LEASE: datetime.timedelta = datetime.timedelta(seconds=30)
+    CLAUDE_RUN_QUEUE_POLL_INTERVAL: datetime.timedelta = datetime.timedelta(
+        milliseconds=500
+    )
+
     CORS_ALLOWED_ORIGINS: list = [
         "http://localhost",
         "http://localhost:3000",
@@ -50,6 +97,26 @@ class Settings(BaseSettings):
     CORS_ALLOWED_ORIGIN_REGEX: str = r"https://.*\.ngrok-free\.app"
 
     AGENT_API: bool = True
+
+    # Proxy to the per-user VM backends (when AGENT_API is off): connections
+    # kept per backend and how fast to give up connecting.
+    PROXY_MAX_CONNECTIONS: int = 20
+    PROXY_MAX_KEEPALIVE_CONNECTIONS: int = 5
+    PROXY_KEEPALIVE_EXPIRY: datetime.timedelta = datetime.timedelta(seconds=30)
+    PROXY_CONNECT_TIMEOUT: datetime.timedelta = datetime.timedelta(seconds=3)
+    # A backend that fails this many requests or health checks in a row is
+    # refused for PROXY_CIRCUIT_RESET_TIMEOUT, then tried again with one
+    # request. Backends in use are checked every PROXY_HEALTH_CHECK_INTERVAL
+    # and dropped after PROXY_BACKEND_IDLE_TTL without requests.
+    PROXY_CIRCUIT_FAILURE_THRESHOLD: int = 3
+    PROXY_CIRCUIT_RESET_TIMEOUT: datetime.timedelta = datetime.timedelta(seconds=30)
+    PROXY_HEALTH_CHECK_PATH: str = "/health"
+    PROXY_HEALTH_CHECK_INTERVAL: datetime.timedelta = datetime.timedelta(seconds=10)
+    PROXY_HEALTH_CHECK_TIMEOUT: datetime.timedelta = datetime.timedelta(seconds=2)
+    PROXY_BACKEND_IDLE_TTL: datetime.timedelta = datetime.timedelta(minutes=10)
+    # Proxied SSE is forwarded in whole frames; a frame larger than this is
+    # passed on in pieces, which bounds what is buffered per stream.
+    PROXY_MAX_FRAME_BYTES: int = 1024 * 1024
     CENTRAL_API_USER_ID: list = [1, 2]
 
     DOCS_PUBLIC_PATHS: set[str] = {
@@ -65,6 +132,21 @@ class Settings(BaseSettings):
     VM_ZONE: str
     VM_SCRIPTS_LOCATION: str = "/usr/local/sbin/pam-scripts"
     REDIS_URL: str
+    # Redis database for application state (Celery uses /0 and /1).
+    REDIS_APP_DB: int = 2
+
+    # Idempotency-Key handling of POST /v1/messages/messages: how long a key is
+    # remembered, and how long a keyed turn keeps running with no client
+    # attached while the retry is on its way.
+    IDEMPOTENCY_KEY_TTL: datetime.timedelta = datetime.timedelta(hours=24)
+    IDEMPOTENT_TURN_RETRY_GRACE: datetime.timedelta = datetime.timedelta(seconds=30)
+
+    # Chat turn streams: how long frames stay replayable in Redis, how long
+    # a turn keeps running with no subscriber before it is cancelled, and
+    # how long mirroring a batch of frames to Redis may take.
+    STREAM_REPLAY_TTL: datetime.timedelta = datetime.timedelta(minutes=10)
+    STREAM_RECONNECT_GRACE: datetime.timedelta = datetime.timedelta(seconds=5)
+    STREAM_MIRROR_TIMEOUT: datetime.timedelta = datetime.timedelta(seconds=2)
 
 
 settings = Settings()  # type: ignore
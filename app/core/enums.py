@@ -1,5 +1,5 @@
 import datetime
-from enum import Enum, auto
+from enum import Enum, IntEnum, auto
 
 from app.config import settings
 
@@ -56,3 +56,10 @@ class WorkflowRunStatusEnum(str, Enum):
     RUNNING = "running"
     SUCCESS = "success"
     FAILED = "failed"
+
+
+class CLIPriorityEnum(IntEnum):
+    """Admission priority of a Claude CLI run, lower runs first."""
+
+    INTERACTIVE = 0
+    WORKFLOW = 1
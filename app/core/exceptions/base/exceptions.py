@@ -53,3 +53,8 @@ class ServiceUnavailableException(BaseHTTPException):
         "We are sorry for the inconvenience. Please try again later. If the error persists, please contact "
         "Harmix Support at support@harmix.ai"
     )
+
+
+class InvalidCursorError(BaseHTTPException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    message = "Invalid pagination cursor."
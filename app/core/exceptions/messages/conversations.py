@@ -6,3 +6,13 @@ from app.core.exceptions.base.exceptions import BaseHTTPException
 class ConversationNotFoundError(BaseHTTPException):
     status_code = status.HTTP_404_NOT_FOUND
     message = "Conversation not found."
+
+
+class NoActiveTurnError(BaseHTTPException):
+    status_code = status.HTTP_409_CONFLICT
+    message = "No response is being generated for this conversation."
+
+
+class NoActiveStreamError(BaseHTTPException):
+    status_code = status.HTTP_404_NOT_FOUND
+    message = "No response stream for this conversation."
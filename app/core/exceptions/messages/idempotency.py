@@ -0,0 +1,13 @@
+from fastapi import status
+
+from app.core.exceptions.base.exceptions import BaseHTTPException
+
+
+class IdempotentRequestInProgressError(BaseHTTPException):
+    status_code = status.HTTP_409_CONFLICT
+    message = "A request with this Idempotency-Key is still being processed."
+
+
+class IdempotencyKeyReusedError(BaseHTTPException):
+    status_code = status.HTTP_422_UNPROCESSABLE_CONTENT
+    message = "This Idempotency-Key was already used for a different request."
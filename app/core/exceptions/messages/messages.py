@@ -0,0 +1,14 @@
+from fastapi import status
+
+from app.core.exceptions.base.exceptions import BaseHTTPException
+
+
+class MessageNotFoundError(BaseHTTPException):
+    status_code = status.HTTP_404_NOT_FOUND
+    message = "Message not found."
+
+
+class BackendUnavailableError(BaseHTTPException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    message = "Your PAM backend is unavailable at the moment."
+    details = "Please try again in a minute."
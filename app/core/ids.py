@@ -0,0 +1,42 @@
+import secrets
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_sequence = 0
+
+
+def uuid7() -> uuid.UUID:
+    """
+    A UUIDv7 (RFC 9562): a 48-bit Unix timestamp in milliseconds followed
+    by a 12-bit sequence and 62 random bits.
+
+    Ids are time-ordered, so new rows land at the right edge of the primary
+    key index. Within one process they strictly increase: in the same
+    millisecond, or if the clock steps back, the sequence counts up from a
+    random start and borrows the next millisecond when it runs out.
+    """
+    global _last_ms, _sequence
+
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            # Random start in the lower half, leaving room to count up
+            _sequence = secrets.randbits(11)
+        else:
+            _sequence += 1
+            if _sequence > 0xFFF:
+                _last_ms += 1
+                _sequence = 0
+        timestamp, sequence = _last_ms, _sequence
+
+    return uuid.UUID(
+        int=(timestamp << 80)
+        | (0x7 << 76)
+        | (sequence << 64)
+        | (0b10 << 62)
+        | secrets.randbits(62)
+    )
@@ -0,0 +1,13 @@
+import hmac
+
+from app.config import settings
+
+
+def is_harmix_api_key(api_key: str | None) -> bool:
+    """
+    Whether the key is the Harmix API key, compared in constant time so the
+    response time does not reveal how much of a guess was right.
+    """
+    if api_key is None:
+        return False
+    return hmac.compare_digest(api_key.encode(), settings.HARMIX_API_KEY.encode())
@@ -1,39 +1,15 @@
-from typing import Iterable
+import asyncio
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator
 
 from sqlalchemy import URL, create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
 
-# class AsyncDatabase:
-#     def __init__(self, db_url: str, use_ssl: bool = True) -> None:
-#         connect_args = {}
-#         if use_ssl:
-#             ssl_context = ssl.create_default_context()
-#             ssl_context.check_hostname = False  # optional
-#             ssl_context.verify_mode = ssl.CERT_NONE  # optional for self-signed
-#             connect_args["ssl"] = ssl_context
-#
-#         self._engine = create_async_engine(
-#             db_url, poolclass=NullPool, echo=False, connect_args={"ssl": "require"}
-#         )
-#
-#         self._session_factory = async_sessionmaker(
-#             self._engine, class_=AsyncSession, expire_on_commit=False, autoflush=False
-#         )
-#
-#     @asynccontextmanager
-#     async def session(self) -> AsyncContextManager[AsyncSession]:
-#         async with self._session_factory() as session:
-#             try:
-#                 yield session
-#             except Exception:
-#                 await session.rollback()
-#                 raise
-#             finally:
-#                 await session.close()
-
-
 _url_object = URL.create(
     "postgresql+psycopg2",
     username=settings.DATABASE_USERNAME,
@@ -55,6 +31,22 @@ _engine = create_engine(
 # Session object to be used for executing queries
 _session_maker = sessionmaker(bind=_engine, expire_on_commit=False)
 
+# Async engine used by the API; the sync one above serves Celery beat
+_async_engine = create_async_engine(
+    _url_object.set(drivername="postgresql+asyncpg"),
+    pool_size=5,
+    max_overflow=12,
+    pool_pre_ping=True,
+    pool_timeout=30,
+    pool_recycle=3600,
+)
+
+_async_session_maker = async_sessionmaker(
+    bind=_async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 
 class DatabaseConnector:
     def __init__(self):
@@ -92,3 +84,185 @@ class DatabaseConnector:
         self.session.add_all(instances)
         self.session.commit()
 
+
+class UnitOfWork:
+    """
+    One session and transaction shared by the repository calls of a task.
+
+    Repositories only flush inside a unit of work; it commits once at the
+    end, or rolls back if an error escapes it. Only the task that opened it
+    joins it: sessions must not be shared between tasks, so tasks spawned
+    from it (background turns, buffered writes) get sessions of their own.
+    """
+
+    def __init__(self) -> None:
+        self.session = _async_session_maker()
+        self.owner = asyncio.current_task()
+        self._after_commit: list[Callable[[], Awaitable[None]]] = []
+
+    async def commit(self) -> None:
+        if not self.session.is_active:
+            # A flush failed and its error was already raised to the caller
+            await self.rollback()
+            return
+        await self.session.commit()
+
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            try:
+                await callback()
+            except Exception:
+                # The data is committed; a failed follow-up must not undo the response
+                logging.exception("After-commit callback failed")
+
+    def after_commit(self, callback: Callable[[], Awaitable[None]]) -> None:
+        self._after_commit.append(callback)
+
+    async def rollback(self) -> None:
+        self._after_commit.clear()
+        await self.session.rollback()
+
+
+_unit_of_work: ContextVar[UnitOfWork | None] = ContextVar("unit_of_work", default=None)
+
+
+def _current_unit_of_work() -> UnitOfWork | None:
+    unit = _unit_of_work.get()
+    if unit is not None and unit.owner is asyncio.current_task():
+        return unit
+    return None
+
+
+@asynccontextmanager
+async def unit_of_work() -> AsyncIterator[UnitOfWork]:
+    """
+    Run the block in a unit of work.
+
+    Nested blocks join the unit already open in the task through a
+    savepoint, so they stay atomic on their own.
+    """
+    unit = _current_unit_of_work()
+    if unit is not None:
+        async with unit.session.begin_nested():
+            yield unit
+        return
+
+    unit = UnitOfWork()
+    token = _unit_of_work.set(unit)
+    try:
+        yield unit
+        await unit.commit()
+    except BaseException:
+        await unit.rollback()
+        raise
+    finally:
+        _unit_of_work.reset(token)
+        await unit.session.close()
+
+
+async def commit_unit_of_work() -> None:
+    """Commit what the task's unit of work holds so far, if there is one."""
+    unit = _current_unit_of_work()
+    if unit is not None:
+        await unit.commit()
+
+
+async def run_after_commit(callback: Callable[[], Awaitable[None]]) -> None:
+    """
+    Run the callback once the task's unit of work commits, or right away
+    when there is none (its changes are committed already).
+
+    For side effects that must not be seen before the data, such as
+    dropping a cache entry: done earlier, a concurrent request could put
+    the old row back. Dropped if the unit rolls back.
+    """
+    unit = _current_unit_of_work()
+    if unit is None:
+        await callback()
+    else:
+        unit.after_commit(callback)
+
+
+@contextmanager
+def without_unit_of_work() -> Iterator[None]:
+    """
+    Give repository calls in the block sessions of their own.
+
+    For long-running work, such as streaming a turn, that must store as it
+    goes instead of holding the task's transaction open.
+    """
+    token = _unit_of_work.set(None)
+    try:
+        yield
+    finally:
+        _unit_of_work.reset(token)
+
+
+class AsyncDatabaseConnector:
+    def __init__(self):
+        """
+        Join the task's unit of work, or create a new async session when
+        there is none
+        """
+        unit = _current_unit_of_work()
+        self._owns_session = unit is None
+        self.session = _async_session_maker() if unit is None else unit.session
+
+    async def __aenter__(self):
+        """
+        This method is called when async context manager is initialised for this object
+        :return: The reference to its object
+        """
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """
+        This method is called when async context manager is closed
+        It returns the connection to the pool.
+        """
+        await self.close()
+
+    async def commit(self):
+        """
+        Commit the session, or only flush it inside a unit of work, which
+        commits once at its end
+        """
+        if self._owns_session:
+            await self.session.commit()
+        else:
+            await self.session.flush()
+
+    async def rollback(self):
+        """
+        Roll the session back; inside a unit of work the error is left to
+        roll the unit back
+        """
+        if self._owns_session:
+            await self.session.rollback()
+
+    async def close(self):
+        """
+        Method to close the session and release its connection.
+        A unit of work's session is closed by the unit.
+        :return:
+        """
+        if self._owns_session:
+            await self.session.close()
+
+    async def save_instances(self, instances: Iterable[object]):
+        """
+        Save a bunch of instances to the database
+        :param instances: (Iterable[object]) - Iterable of objects to save to the database
+        """
+        self.session.add_all(instances)
+        await self.commit()
+
+
+async def close_database() -> None:
+    """
+    Close the pooled async connections.
+
+    Must run on the event loop that opened them, e.g. at application shutdown
+    or before an ``asyncio.run`` in a Celery task returns.
+    """
+    await _async_engine.dispose()
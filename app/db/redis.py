@@ -0,0 +1,23 @@
+import redis.asyncio as redis
+
+from app.config import settings
+
+_redis: redis.Redis | None = None
+
+
+def get_redis() -> redis.Redis:
+    """Shared async Redis client for application state."""
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(
+            f"{settings.REDIS_URL}/{settings.REDIS_APP_DB}",
+            health_check_interval=30,
+        )
+    return _redis
+
+
+async def close_redis() -> None:
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
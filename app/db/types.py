@@ -0,0 +1,22 @@
+import datetime
+
+from sqlalchemy import DateTime
+from sqlalchemy.types import TypeDecorator
+
+
+class UTCDateTime(TypeDecorator):
+    """
+    ``timestamp without time zone`` column holding UTC.
+
+    asyncpg refuses timezone-aware datetimes for such columns, so aware
+    values are converted to UTC and stored naive; naive ones are taken to
+    be UTC already.
+    """
+
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return value
@@ -1,6 +1,7 @@
 from .auth.user import User
 from .messages.conversation import Conversation
 from .messages.message import Message
+from .messages.message_blob import MessageBlob
 from .workflows.workflow import Workflow
 from .base.base import BaseEntity
 
@@ -8,6 +9,7 @@ __all__ = [
     "User",
     "Conversation",
     "Message",
+    "MessageBlob",
     "Workflow",
     "BaseEntity",
 ]
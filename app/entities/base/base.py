@@ -1,8 +1,15 @@
+from datetime import datetime
+
 from sqlalchemy import MetaData
 from sqlalchemy.orm import Mapped, mapped_column, declarative_base
 
+from app.db.types import UTCDateTime
+
 metadata = MetaData(schema="pam")
-DeclarativeBase = declarative_base(metadata=metadata)
+DeclarativeBase = declarative_base(
+    metadata=metadata,
+    type_annotation_map={datetime: UTCDateTime},
+)
 
 
 class BaseEntity(DeclarativeBase):
@@ -1,7 +1,9 @@
 from .conversation import Conversation
 from .message import Message
+from .message_blob import MessageBlob
 
 __all__ = [
     "Conversation",
     "Message",
+    "MessageBlob",
 ]
@@ -5,27 +5,42 @@ import sqlalchemy as sa
 from sqlalchemy import UUID, Boolean, ForeignKey, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.ids import uuid7
 from app.entities.auth.user import User
 from app.entities.base.base import BaseEntity
 
 
 class Conversation(BaseEntity):
     __tablename__ = "conversations"
+    __table_args__ = (
+        sa.Index(
+            "ix_conversations_user_id_is_pinned_updated_date_id_active",
+            "user_id",
+            sa.text("is_pinned DESC"),
+            sa.text("updated_date DESC"),
+            sa.text("id DESC"),
+            postgresql_where=sa.text("deleted_date IS NULL"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        server_default=sa.text("gen_random_uuid()"),
+        default=uuid7,
+        server_default=sa.text("pam.uuid_generate_v7()"),
     )
 
     user_id: Mapped[int] = mapped_column(ForeignKey("pam.users.id"))
     title: Mapped[str]
     type: Mapped[str]
-    is_pinned: Mapped[bool] = mapped_column(Boolean, default=False, nullable=True)
+    is_pinned: Mapped[bool] = mapped_column(
+        Boolean, default=False, server_default=sa.false()
+    )
     created_date: Mapped[datetime] = mapped_column(default=func.now())
     updated_date: Mapped[datetime] = mapped_column(
         default=func.now(), onupdate=func.now()
     )
     deleted_date: Mapped[datetime | None] = mapped_column(nullable=True)
+    claude_session_id: Mapped[str | None] = mapped_column(nullable=True)
 
     user: Mapped[User] = relationship(User, foreign_keys=[user_id], uselist=False)
@@ -8,6 +8,7 @@ from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.ids import uuid7
 from app.entities.auth.user import User
 from app.entities.base.base import BaseEntity, DeclarativeBase
 from app.entities.messages.conversation import Conversation
@@ -15,11 +16,22 @@ from app.entities.messages.conversation import Conversation
 
 class Message(BaseEntity):
     __tablename__ = "messages"
+    __table_args__ = (
+        sa.Index(
+            "ix_messages_user_id_role_conversation_id_timestamp",
+            "user_id",
+            "role",
+            "conversation_id",
+            sa.text('"timestamp" DESC'),
+        ),
+        sa.Index("ix_messages_parent_message_id", "parent_message_id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        server_default=sa.text("gen_random_uuid()"),
+        default=uuid7,
+        server_default=sa.text("pam.uuid_generate_v7()"),
     )
 
     user_id: Mapped[int] = mapped_column(ForeignKey("pam.users.id"))
@@ -30,7 +42,6 @@ class Message(BaseEntity):
         ForeignKey("pam.conversations.id")
     )
     role: Mapped[str]
-    content: Mapped[str]
     content_new: Mapped[dict[str, Any]] = mapped_column(
         MutableDict.as_mutable(JSONB), nullable=False, default=dict
     )
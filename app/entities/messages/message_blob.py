@@ -0,0 +1,24 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import UUID, ForeignKey, LargeBinary, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.entities.base.base import BaseEntity
+
+
+class MessageBlob(BaseEntity):
+    """Full content block of a message stored with a preview of it."""
+
+    __tablename__ = "message_blobs"
+
+    message_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("pam.messages.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # zlib-compressed JSON of the block
+    data: Mapped[bytes] = mapped_column(LargeBinary)
+    # Size of the uncompressed JSON, in bytes
+    size: Mapped[int]
+    created_date: Mapped[datetime] = mapped_column(default=func.now())
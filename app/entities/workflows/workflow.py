@@ -39,6 +39,9 @@ class Workflow(BaseEntity):
 
 class WorkflowSchedule(BaseEntity):
     __tablename__ = "workflow_schedules"
+    __table_args__ = (
+        sa.Index("ix_workflow_schedules_workflow_id", "workflow_id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
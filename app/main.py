@@ -1,17 +1,46 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware import Middleware
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api import health, metrics
 from app.api.v1 import router
 from app.config import settings
 from app.container import ApplicationContainer
-from app.middlewares import ErrorLoggingMiddleware, HarmixAPIKeyMiddleware
+from app.db.database import close_database
+from app.db.redis import close_redis
+from app.middlewares import (
+    ErrorLoggingMiddleware,
+    HarmixAPIKeyMiddleware,
+    UnitOfWorkMiddleware,
+)
+from app.services.messages.claude_worker_pool import (
+    start_worker_pool,
+    stop_worker_pool,
+)
+from app.services.messages.stream_hub import start_stream_hub, stop_stream_hub
+from app.services.proxy.backend_proxy import start_backend_proxy, stop_backend_proxy
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    start_worker_pool()
+    start_backend_proxy()
+    start_stream_hub()
+    yield
+    await stop_stream_hub()
+    await stop_backend_proxy()
+    await stop_worker_pool()
+    await close_redis()
+    await close_database()
 
 
 def create_application() -> FastAPI:
     server_app = FastAPI(
         title="Harmix PAM API",
         description="Backend API for PAM services",
+        lifespan=lifespan,
         middleware=[
             Middleware(
                 CORSMiddleware,
@@ -20,7 +49,8 @@ def create_application() -> FastAPI:
                 allow_credentials=True,
                 allow_methods=["*"],
                 allow_headers=["*"],
-            )
+            ),
+            Middleware(UnitOfWorkMiddleware),
         ],
     )
 
@@ -31,6 +61,8 @@ def create_application() -> FastAPI:
     server_app.add_middleware(HarmixAPIKeyMiddleware)
 
     server_app.include_router(router)
+    server_app.include_router(metrics.router)
+    server_app.include_router(health.router)
 
     return server_app
 
@@ -1,85 +1,145 @@
 import logging
 
-from fastapi import HTTPException, Request
+from fastapi import HTTPException
 from sqlalchemy.exc import OperationalError as SQLAlchemyOperationalError
 from sqlalchemy.exc import TimeoutError as SQLAlchemyTimeoutError
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.config import settings
-from app.core.exceptions.auth.exceptions import (
-    FailedAuthorizationException,
-    FailedLoginException,
-)
+from app.core.exceptions.auth.exceptions import FailedAuthorizationException
 from app.core.exceptions.base.exceptions import (
     ExceptionWithStatusAndDetail,
     ServiceUnavailableException,
 )
+from app.core.security import is_harmix_api_key
+from app.db.database import unit_of_work
 
 
-class HarmixAPIKeyMiddleware(BaseHTTPMiddleware):
+class HarmixAPIKeyMiddleware:
     """Middleware that validates Harmix API key for every request."""
 
-    async def dispatch(self, request: Request, call_next):
-        path = request.url.path
-
-        # Allow docs path without API key
-        if path in settings.DOCS_PUBLIC_PATHS:
-            return await call_next(request)
-
-        # OPTIONS request -> skip API key checking
-        if request.method == "OPTIONS":
-            return await call_next(request)
-
-        api_key = request.headers.get("api-key")
-
-        if api_key != settings.HARMIX_API_KEY:
-            exc = FailedAuthorizationException("API key is invalid")
-
-            return JSONResponse(
-                status_code=exc.status_code,
-                content={"detail": exc.detail},
-            )
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            # Allow docs path without API key
+            or scope["path"] in settings.DOCS_PUBLIC_PATHS
+            # OPTIONS request -> skip API key checking
+            or scope["method"] == "OPTIONS"
+            or is_harmix_api_key(Headers(scope=scope).get("api-key"))
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        exc = FailedAuthorizationException("API key is invalid")
+        response = JSONResponse(
+            status_code=exc.status_code,
+            content={"detail": exc.detail},
+        )
+        await response(scope, receive, send)
+
+
+class ErrorLoggingMiddleware:
+    """
+    Turns errors that escape the app into JSON responses: database
+    connection errors and unexpected errors into 503s.
+
+    Only possible before the response has started; an error while a body
+    streams is logged and re-raised to end the response.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_tracked(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
 
-        return await call_next(request)
-
-
-class ErrorLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send_tracked)
+            return
 
         except ExceptionWithStatusAndDetail as e:
-            return JSONResponse(
+            if response_started:
+                raise
+            response = JSONResponse(
                 status_code=e.status_code,
                 content={"error": e.detail},
             )
 
         except SQLAlchemyOperationalError:
             logging.warning("Too many connections to the database are open.")
-            exc = ServiceUnavailableException()
-            return JSONResponse(
-                status_code=exc.status_code,
-                content={"detail": exc.detail},
-            )
+            if response_started:
+                raise
+            response = self._unavailable()
 
         except SQLAlchemyTimeoutError:
             logging.warning("Database connection timed out.")
-            exc = ServiceUnavailableException()
-            return JSONResponse(
-                status_code=exc.status_code,
-                content={"detail": exc.detail},
-            )
+            if response_started:
+                raise
+            response = self._unavailable()
 
         except HTTPException as e:
             raise e
 
         except Exception:
             logging.error("Internal error occurred", exc_info=True)
-
-            exc = ServiceUnavailableException()
-            return JSONResponse(
-                status_code=exc.status_code,
-                content={"detail": exc.detail},
-            )
+            if response_started:
+                raise
+            response = self._unavailable()
+
+        await response(scope, receive, send)
+
+    @staticmethod
+    def _unavailable() -> JSONResponse:
+        exc = ServiceUnavailableException()
+        return JSONResponse(
+            status_code=exc.status_code,
+            content={"detail": exc.detail},
+        )
+
+
+class UnitOfWorkMiddleware:
+    """
+    Runs every HTTP request in one database unit of work.
+
+    The handler's repository calls share a session and a transaction,
+    committed when the response starts so nothing is held while a body
+    streams. An error response (4xx/5xx, e.g. from an HTTPException raised
+    after some writes) rolls it back instead. Must stay the innermost
+    middleware: a BaseHTTPMiddleware inside it would run the rest of the
+    app in another task, which does not join the unit.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async with unit_of_work() as unit:
+
+            async def send_committed(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    if message["status"] < 400:
+                        await unit.commit()
+                    else:
+                        await unit.rollback()
+                await send(message)
+
+            await self.app(scope, receive, send_committed)
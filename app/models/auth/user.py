@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from passlib.apps import custom_app_context as pwd_context
+from pydantic import Field
 
 from app.models.base.abstract_model import AbstractModel
 
@@ -13,6 +13,8 @@ class ReadUserModel(AbstractModel):
     company: Optional[str] = None
     server_host: Optional[str] = None
     created_date: datetime
+    # Used by the MCP endpoint, not returned to clients
+    composio_entity_id: Optional[str] = Field(default=None, exclude=True)
 
 
 class CheckUserPasswordModel(AbstractModel):
@@ -20,9 +22,6 @@ class CheckUserPasswordModel(AbstractModel):
     email: str
     password_hash: str
 
-    def check_password(self, password) -> bool:
-        return pwd_context.verify(password, self.password_hash)
-
 
 class CreateUserModel(AbstractModel):
     email: str
@@ -0,0 +1,25 @@
+import base64
+from typing import Self
+
+from pydantic import BaseModel
+
+from app.core.exceptions.base.exceptions import InvalidCursorError
+
+
+class PageCursor(BaseModel):
+    """
+    Keyset position of the last row of a page.
+
+    Sent to clients as an opaque URL-safe string and decoded from the
+    ``cursor`` parameter of the next request.
+    """
+
+    def encode(self) -> str:
+        return base64.urlsafe_b64encode(self.model_dump_json().encode()).decode()
+
+    @classmethod
+    def decode(cls, cursor: str) -> Self:
+        try:
+            return cls.model_validate_json(base64.urlsafe_b64decode(cursor))
+        except ValueError:
+            raise InvalidCursorError()
@@ -0,0 +1,91 @@
+from typing import Any, Union
+
+import msgspec
+
+
+class CLIMessage(msgspec.Struct):
+    """
+    Message envelope of an ``assistant``/``user`` CLI event.
+
+    Content blocks stay plain dicts: they are stored in JSONB and forwarded
+    over SSE unchanged, and a Struct would silently drop fields it does not
+    declare (``input``, ``tool_use_id``, ``is_error``, ...).
+    """
+
+    content: list[dict[str, Any]] | str = []
+
+
+class SystemEvent(msgspec.Struct, tag_field="type", tag="system"):
+    subtype: str | None = None
+    session_id: str | None = None
+
+
+class AssistantEvent(msgspec.Struct, tag_field="type", tag="assistant"):
+    message: CLIMessage = msgspec.field(default_factory=CLIMessage)
+    session_id: str | None = None
+
+
+class UserEvent(msgspec.Struct, tag_field="type", tag="user"):
+    message: CLIMessage = msgspec.field(default_factory=CLIMessage)
+    session_id: str | None = None
+
+
+class ResultEvent(msgspec.Struct, tag_field="type", tag="result"):
+    subtype: str | None = None
+    session_id: str | None = None
+    is_error: bool | None = None
+    result: str | None = None
+
+
+class UnknownEvent(msgspec.Struct):
+    """Valid JSON event of a type the service does not handle."""
+
+    type: str | None = None
+    session_id: str | None = None
+
+
+class RawEvent(msgspec.Struct, tag_field="type", tag="raw"):
+    """Non-JSON output line of the CLI."""
+
+    text: str
+
+
+class QueuedEvent(msgspec.Struct, tag_field="type", tag="queued"):
+    """Emitted while the run waits for a CLI slot."""
+
+    position: int
+
+
+CLIEvent = Union[
+    SystemEvent,
+    AssistantEvent,
+    UserEvent,
+    ResultEvent,
+    UnknownEvent,
+    RawEvent,
+    QueuedEvent,
+]
+
+_known_event_decoder = msgspec.json.Decoder(
+    Union[SystemEvent, AssistantEvent, UserEvent, ResultEvent]
+)
+_unknown_event_decoder = msgspec.json.Decoder(UnknownEvent)
+
+
+def decode_cli_event(line: bytes) -> CLIEvent:
+    """
+    Decode one stream-json line straight from bytes
+
+    Args:
+        line: Raw JSON line
+
+    Raises:
+        msgspec.DecodeError: when the line is not a JSON object
+
+    Returns:
+        Typed event, ``UnknownEvent`` for event types without a model
+    """
+    try:
+        return _known_event_decoder.decode(line)
+    except msgspec.ValidationError:
+        return _unknown_event_decoder.decode(line)
@@ -1,10 +1,11 @@
 from datetime import datetime
 import uuid
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.entities.messages.conversation import Conversation
 from app.models.base.abstract_model import AbstractModel
+from app.models.base.cursor import PageCursor
 
 
 class ConversationDto(AbstractModel):
@@ -12,10 +13,13 @@ class ConversationDto(AbstractModel):
     user_id: int
     title: str | None
     type: str
-    is_pinned: bool | None
+    is_pinned: bool
     created_date: datetime
     updated_date: datetime | None = None
     deleted_date: datetime | None = None
+    # Internal only: written explicitly after each CLI turn, never echoed back
+    # through model_dump() so stale DTOs cannot overwrite a newer session.
+    claude_session_id: str | None = Field(default=None, exclude=True)
 
     @staticmethod
     def map(conversation: Conversation) -> "ConversationDto":
@@ -30,6 +34,12 @@ class ConversationDto(AbstractModel):
         )
 
 
+class ConversationCursor(PageCursor):
+    is_pinned: bool
+    updated_date: datetime
+    id: uuid.UUID
+
+
 class CreateConversation(BaseModel):
     user_id: int
     title: str | None
@@ -0,0 +1,16 @@
+import msgspec
+
+
+class IdempotencyRecord(msgspec.Struct, omit_defaults=True):
+    """Turn started by a send-message request carrying an Idempotency-Key."""
+
+    status: str
+    # Hash of the request the key was first used with
+    request_hash: str | None = None
+    conversation_id: str | None = None
+    user_message_id: str | None = None
+    turn_id: str | None = None
+
+
+IDEMPOTENCY_RUNNING = "running"
+IDEMPOTENCY_COMPLETED = "completed"
@@ -5,6 +5,7 @@ from pydantic import BaseModel
 
 from app.entities.messages.message import Message
 from app.models.base.abstract_model import AbstractModel
+from app.models.base.cursor import PageCursor
 
 
 class MessageDto(AbstractModel):
@@ -13,18 +14,19 @@ class MessageDto(AbstractModel):
 
     parent_message_id: uuid.UUID | None
     role: str
-    content: dict | str
+    # Copy of content_new kept for older clients, None in compact responses
+    content: dict | None = None
     content_new: dict
     timestamp: datetime
 
     @staticmethod
-    def map(message: Message) -> "MessageDto":
+    def map(message: Message, compact: bool = False) -> "MessageDto":
         return MessageDto(
             id=message.id,
             user_id=message.user_id,
             parent_message_id=message.parent_message_id,
             role=message.role,
-            content=message.content_new,
+            content=None if compact else message.content_new,
             content_new=message.content_new,
             timestamp=message.timestamp,
         )
@@ -36,6 +38,20 @@ class CreateMessage(BaseModel):
     parent_message_id: uuid.UUID | None = None
     conversation_id: uuid.UUID | None = None
     role: str
-    content: dict | str
     content_new: dict
     timestamp: datetime
+
+
+class MessageCursor(PageCursor):
+    timestamp: datetime
+    id: uuid.UUID
+
+    @classmethod
+    def parse(cls, cursor: str) -> "MessageCursor":
+        """Decode a cursor, also accepting the bare timestamps of older clients."""
+        try:
+            timestamp = datetime.fromisoformat(cursor)
+        except ValueError:
+            return cls.decode(cursor)
+        # The nil id sorts first, so the page starts before the timestamp
+        return cls(timestamp=timestamp, id=uuid.UUID(int=0))
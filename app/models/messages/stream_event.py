@@ -0,0 +1,28 @@
+from typing import Any
+
+import msgspec
+
+
+class StreamEventDto(msgspec.Struct, omit_defaults=True, kw_only=True):
+    """
+    One SSE frame of the chat stream.
+
+    Unset fields are omitted, so the same struct serializes the resume,
+    queued, message and result frames.
+    """
+
+    user_id: int
+    conversation_id: str
+    type: str | None = None
+    message_id: str | None = None
+    role: str | None = None
+    content: dict[str, Any] | None = None
+    position: int | None = None
+    timings: dict[str, Any] | None = None
+    timestamp: str
+
+    def to_sse(self) -> bytes:
+        return b"data: " + _encoder.encode(self) + b"\n\n"
+
+
+_encoder = msgspec.json.Encoder()
@@ -1,8 +1,9 @@
-from typing import Generic, Type, TypeVar
+from typing import Any, Generic, Type, TypeVar
 
+from sqlalchemy import case, delete, insert, inspect, select, update
 from sqlalchemy.exc import IntegrityError
 
-from app.db.database import DatabaseConnector
+from app.db.database import AsyncDatabaseConnector
 
 # T represents a SQLAlchemy model type
 T = TypeVar("T")
@@ -16,45 +17,117 @@ class BaseSessionRepository(Generic[T]):
         if self.model is None:
             raise RuntimeError("Repository must define a model")
 
-    def create(self, **kwargs) -> T:
-        with DatabaseConnector() as db:
-            instance = self.model(**kwargs)
-            db.session.add(instance)
-            db.session.commit()
-            db.session.refresh(instance)
+        mapper = inspect(self.model)
+        self._primary_keys = {column.key for column in mapper.primary_key}
+        self._columns = {
+            attribute.key: attribute.columns[0] for attribute in mapper.column_attrs
+        }
+
+    def _update_values(self, update_data: dict[str, Any]) -> dict[str, Any]:
+        values = {}
+        for key, value in update_data.items():
+            column = self._columns.get(key)
+            if column is None or key in self._primary_keys:
+                continue
+
+            if column.onupdate is not None and column.onupdate.is_clause_element:
+                # As with the ORM, an unchanged value leaves the column to its
+                # onupdate default
+                value = case(
+                    (column.is_distinct_from(value), value),
+                    else_=column.onupdate.arg,
+                )
+            values[key] = value
+        return values
+
+    async def create(self, **kwargs) -> T:
+        async with AsyncDatabaseConnector() as db:
+            instance = await db.session.scalar(
+                insert(self.model).values(**kwargs).returning(self.model)
+            )
+            await db.commit()
+            return instance
+
+    async def bulk_create(self, rows: list[dict[str, Any]]) -> list[T]:
+        """Insert many rows with one multi-row INSERT ... RETURNING."""
+        if not rows:
+            return []
+
+        async with AsyncDatabaseConnector() as db:
+            instances = list(
+                await db.session.scalars(insert(self.model).returning(self.model), rows)
+            )
+            await db.commit()
+            return instances
+
+    async def get(self, **kwargs) -> T | None:
+        async with AsyncDatabaseConnector() as db:
+            return await db.session.scalar(
+                select(self.model).filter_by(**kwargs).limit(1)
+            )
+
+    async def update(self, update_data: dict, **kwargs) -> T | None:
+        """
+        Update the rows matching ``kwargs`` with one UPDATE ... RETURNING.
+
+        Keys of ``update_data`` that are not columns of the model, and its
+        primary key, are ignored, so a whole DTO can be passed.
+        Columns with an onupdate default get it unless their value changes.
+
+        Returns:
+            The updated row, the first one if several matched, or None
+        """
+        values = self._update_values(update_data)
+        async with AsyncDatabaseConnector() as db:
+            if not values:
+                return await db.session.scalar(
+                    select(self.model).filter_by(**kwargs).limit(1)
+                )
+
+            instance = await db.session.scalar(
+                update(self.model)
+                .filter_by(**kwargs)
+                .values(**values)
+                .returning(self.model)
+                .execution_options(populate_existing=True)
+            )
+            await db.commit()
             return instance
 
-    def get(self, **kwargs) -> T | None:
-        with DatabaseConnector() as db:
-            return db.session.query(self.model).filter_by(**kwargs).first()
+    async def bulk_update(self, rows: list[dict[str, Any]]) -> None:
+        """
+        Update many rows by primary key in one executemany UPDATE.
+
+        Every row must hold the primary key and the same set of columns,
+        which are set as given.
+        """
+        if not rows:
+            return
 
-    def list(self, limit: int | None = None, offset: int | None = 0, **kwargs) -> list[T]:
-        with DatabaseConnector() as db:
-            query = db.session.query(self.model).filter_by(**kwargs).offset(offset)
+        async with AsyncDatabaseConnector() as db:
+            await db.session.execute(
+                update(self.model),
+                [
+                    {key: value for key, value in row.items() if key in self._columns}
+                    for row in rows
+                ],
+            )
+            await db.commit()
+
+    async def list(self, limit: int | None = None, offset: int | None = 0, **kwargs) -> list[T]:
+        async with AsyncDatabaseConnector() as db:
+            query = select(self.model).filter_by(**kwargs).offset(offset)
             if limit:
                 query = query.limit(limit)
-            return query.all()
-
-    def update(self, update_data: dict, **kwargs) -> T | None:
-        with DatabaseConnector() as db:
-            query = db.session.query(self.model).filter_by(**kwargs)
-            instance = query.first()
-            if not instance:
-                return None
-            for key, value in update_data.items():
-                setattr(instance, key, value)
-            db.session.commit()
-            db.session.refresh(instance)
-            return instance
+            return list(await db.session.scalars(query))
 
-    def delete(self, **kwargs) -> None:
-        with DatabaseConnector() as db:
-            query = db.session.query(self.model).filter_by(**kwargs)
+    async def delete(self, **kwargs) -> None:
+        async with AsyncDatabaseConnector() as db:
             try:
-                query.delete(synchronize_session=False)
-                db.session.commit()
+                await db.session.execute(delete(self.model).filter_by(**kwargs))
+                await db.commit()
             except IntegrityError:
-                db.session.rollback()
+                await db.rollback()
                 raise Exception(
                     "Object is related to other objects and cannot be deleted"
                 )
@@ -1,7 +1,9 @@
 from datetime import datetime
 from typing import List, Optional
 
-from app.db.database import DatabaseConnector
+from sqlalchemy import select
+
+from app.db.database import AsyncDatabaseConnector
 from app.entities.integrations.integration import Integration
 from app.entities.integrations.user_integration import UserIntegration
 from app.repositories.base.base import BaseSessionRepository
@@ -10,33 +12,35 @@ from app.repositories.base.base import BaseSessionRepository
 class IntegrationRepository(BaseSessionRepository):
     model = UserIntegration
 
-    def get_all_integrations(self) -> List[Integration]:
+    async def get_all_integrations(self) -> List[Integration]:
         """Get all available integrations."""
-        with DatabaseConnector() as db:
-            return db.session.query(Integration).all()
+        async with AsyncDatabaseConnector() as db:
+            return list(await db.session.scalars(select(Integration)))
 
-    def get_integration_by_slug(self, slug: str) -> Optional[Integration]:
+    async def get_integration_by_slug(self, slug: str) -> Optional[Integration]:
         """Get an integration by its slug."""
-        with DatabaseConnector() as db:
-            return db.session.query(Integration).filter_by(slug=slug).first()
+        async with AsyncDatabaseConnector() as db:
+            return await db.session.scalar(select(Integration).filter_by(slug=slug).limit(1))
 
-    def get_user_integrations(self, user_id: int, status: Optional[str] = None) -> List[UserIntegration]:
+    async def get_user_integrations(self, user_id: int, status: Optional[str] = None) -> List[UserIntegration]:
         """Get all user integrations, optionally filtered by status."""
-        with DatabaseConnector() as db:
-            query = db.session.query(self.model).filter_by(user_id=user_id)
+        async with AsyncDatabaseConnector() as db:
+            query = select(self.model).filter_by(user_id=user_id)
             if status:
                 query = query.filter_by(status=status)
-            return query.all()
+            return list(await db.session.scalars(query))
 
-    def get_user_integration(self, user_id: int, integration_id: int) -> Optional[UserIntegration]:
+    async def get_user_integration(self, user_id: int, integration_id: int) -> Optional[UserIntegration]:
         """Get a specific user integration."""
-        with DatabaseConnector() as db:
-            return db.session.query(self.model).filter_by(
-                user_id=user_id,
-                integration_id=integration_id
-            ).first()
+        async with AsyncDatabaseConnector() as db:
+            return await db.session.scalar(
+                select(self.model).filter_by(
+                    user_id=user_id,
+                    integration_id=integration_id
+                ).limit(1)
+            )
 
-    def create_or_update_user_integration(
+    async def create_or_update_user_integration(
         self,
         user_id: int,
         integration_id: int,
@@ -45,11 +49,13 @@ class IntegrationRepository(BaseSessionRepository):
         connected_at: Optional[datetime] = None
     ) -> UserIntegration:
         """Create a new user integration or update existing one."""
-        with DatabaseConnector() as db:
-            existing = db.session.query(self.model).filter_by(
-                user_id=user_id,
-                integration_id=integration_id
-            ).first()
+        async with AsyncDatabaseConnector() as db:
+            existing = await db.session.scalar(
+                select(self.model).filter_by(
+                    user_id=user_id,
+                    integration_id=integration_id
+                ).limit(1)
+            )
 
             if existing:
                 existing.status = status
@@ -57,8 +63,8 @@ class IntegrationRepository(BaseSessionRepository):
                     existing.composio_connection_id = composio_connection_id
                 if connected_at is not None:
                     existing.connected_at = connected_at
-                db.session.commit()
-                db.session.refresh(existing)
+                await db.commit()
+                await db.session.refresh(existing)
                 return existing
             else:
                 new_integration = UserIntegration(
@@ -69,6 +75,6 @@ class IntegrationRepository(BaseSessionRepository):
                     connected_at=connected_at
                 )
                 db.session.add(new_integration)
-                db.session.commit()
-                db.session.refresh(new_integration)
+                await db.commit()
+                await db.session.refresh(new_integration)
                 return new_integration
@@ -1,6 +1,9 @@
 import uuid
+from datetime import datetime
 
-from app.db.database import DatabaseConnector
+from sqlalchemy import Row, select, tuple_
+
+from app.db.database import AsyncDatabaseConnector
 from app.entities.messages.conversation import Conversation
 from app.repositories.base.base import BaseSessionRepository
 
@@ -8,27 +11,50 @@ from app.repositories.base.base import BaseSessionRepository
 class ConversationRepository(BaseSessionRepository[Conversation]):
     model = Conversation
 
-    def get_conversation_by_id(
+    # What the conversation list shows
+    _list_columns = (
+        Conversation.id,
+        Conversation.user_id,
+        Conversation.title,
+        Conversation.type,
+        Conversation.is_pinned,
+        Conversation.created_date,
+        Conversation.updated_date,
+    )
+
+    async def get_conversation_by_id(
         self,
         conversation_id: uuid.UUID,
     ) -> Conversation | None:
-        with DatabaseConnector() as db:
-            return (
-                db.session.query(Conversation)
-                .filter(
+        async with AsyncDatabaseConnector() as db:
+            return await db.session.scalar(
+                select(Conversation).filter(
                     Conversation.id == conversation_id,
                     Conversation.deleted_date.is_(None),
                 )
-                .one_or_none()
             )
 
-    def get_conversations_by_user_id(
+    async def get_conversations_by_user_id(
         self,
         user_id: int,
+        limit: int | None,
         conversation_type: str | None = None,
-    ) -> list[Conversation]:
-        with DatabaseConnector() as db:
-            query = db.session.query(Conversation).filter(
+        after: tuple[bool, datetime, uuid.UUID] | None = None,
+    ) -> tuple[list[Row], bool]:
+        """
+        A page of the user's conversations, pinned first, then most
+        recently updated.
+
+        Rows are ordered by (is_pinned, updated_date, id) and start after
+        the ``after`` key. Only the listed columns are loaded, and
+        ``limit + 1`` rows are read to tell whether there are more; with
+        no ``limit`` all of them are returned.
+
+        Returns:
+            The rows, and whether there is a next page
+        """
+        async with AsyncDatabaseConnector() as db:
+            query = select(*self._list_columns).filter(
                 Conversation.user_id == user_id,
                 Conversation.deleted_date.is_(None),
             )
@@ -36,4 +62,23 @@ class ConversationRepository(BaseSessionRepository[Conversation]):
             if conversation_type:
                 query = query.filter(Conversation.type == conversation_type)
 
-            return query.order_by(Conversation.updated_date.desc()).all()
+            if after:
+                query = query.filter(
+                    tuple_(
+                        Conversation.is_pinned,
+                        Conversation.updated_date,
+                        Conversation.id,
+                    )
+                    < tuple_(*after)
+                )
+
+            query = query.order_by(
+                Conversation.is_pinned.desc(),
+                Conversation.updated_date.desc(),
+                Conversation.id.desc(),
+            )
+            if limit is None:
+                return list(await db.session.execute(query)), False
+
+            rows = list(await db.session.execute(query.limit(limit + 1)))
+            return rows[:limit], len(rows) > limit
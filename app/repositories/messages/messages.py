@@ -1,64 +1,118 @@
 import uuid
 from datetime import datetime
+from typing import Any
 
-from app.db.database import DatabaseConnector
+from sqlalchemy import and_, func, insert, select, tuple_
+from sqlalchemy.orm import aliased
+
+from app.db.database import AsyncDatabaseConnector
+from app.entities.messages.conversation import Conversation
 from app.entities.messages.message import Message
+from app.entities.messages.message_blob import MessageBlob
 from app.repositories.base.base import BaseSessionRepository
 
 
 class MessageRepository(BaseSessionRepository[Message]):
     model = Message
 
-    def get_root_user_messages(
+    async def insert_message_blobs(self, rows: list[dict[str, Any]]) -> None:
+        """Store the full content blocks of messages with one multi-row INSERT."""
+        if not rows:
+            return
+
+        async with AsyncDatabaseConnector() as db:
+            await db.session.execute(insert(MessageBlob), rows)
+            await db.commit()
+
+    async def get_message_with_blob(
+        self,
+        message_id: uuid.UUID,
+        user_id: int,
+    ) -> tuple[Message, MessageBlob | None] | None:
+        """The user's message, with its full content block if it was offloaded."""
+        async with AsyncDatabaseConnector() as db:
+            row = (
+                await db.session.execute(
+                    select(Message, MessageBlob)
+                    .join(Conversation, Conversation.id == Message.conversation_id)
+                    .outerjoin(MessageBlob, MessageBlob.message_id == Message.id)
+                    .filter(
+                        Message.id == message_id,
+                        Message.user_id == user_id,
+                        Conversation.deleted_date.is_(None),
+                    )
+                )
+            ).first()
+            return tuple(row) if row else None
+
+    async def get_turns(
         self,
         user_id: int,
         conversation_id: uuid.UUID,
         limit: int,
-        cursor: datetime | None = None,
-    ) -> list[Message]:
-        with DatabaseConnector() as db:
-            query = (
-                db.session.query(Message)
-                .filter(
-                    Message.user_id == user_id,
-                    Message.role == "user",
-                    Message.conversation_id == conversation_id,
-                )
-                .order_by(Message.timestamp.desc())
+        before: tuple[datetime, uuid.UUID] | None = None,
+    ) -> tuple[list[tuple[Message, list[Message]]], bool]:
+        """
+        A page of turns, newest first, in one query.
+
+        A turn is a root user message with its replies. Roots are ordered by
+        (timestamp, id) and start after the ``before`` key. ``limit + 1``
+        roots are read to tell whether older turns exist, and replies are
+        joined to the first ``limit`` only.
+
+        Returns:
+            The (root, replies) pairs, and whether there are older turns
+        """
+        position = (
+            func.row_number()
+            .over(order_by=(Message.timestamp.desc(), Message.id.desc()))
+            .label("position")
+        )
+        roots_query = select(Message, position).filter(
+            Message.user_id == user_id,
+            Message.role == "user",
+            Message.conversation_id == conversation_id,
+        )
+        if before:
+            roots_query = roots_query.filter(
+                tuple_(Message.timestamp, Message.id) < tuple_(*before)
             )
 
-            if cursor:
-                query = query.filter(Message.timestamp < cursor)
+        roots = (
+            roots_query.order_by(Message.timestamp.desc(), Message.id.desc())
+            .limit(limit + 1)
+            .subquery("roots")
+        )
+        root = aliased(Message, roots)
+        reply = aliased(Message)
+        query = (
+            select(root, reply)
+            .outerjoin(
+                reply,
+                and_(reply.parent_message_id == root.id, roots.c.position <= limit),
+            )
+            .order_by(roots.c.position, reply.timestamp, reply.id)
+        )
 
-            return query.limit(limit).all()
+        turns: dict[uuid.UUID, tuple[Message, list[Message]]] = {}
+        async with AsyncDatabaseConnector() as db:
+            for root_message, reply_message in await db.session.execute(query):
+                _, replies = turns.setdefault(root_message.id, (root_message, []))
+                if reply_message is not None:
+                    replies.append(reply_message)
 
-    def get_messages_for_parent_message_id(
+        page = list(turns.values())
+        return page[:limit], len(page) > limit
+
+    async def get_messages_for_parent_message_id(
         self,
         parent_message_ids: list[uuid.UUID],
     ) -> list[Message]:
-        with DatabaseConnector() as db:
-            return (
-                db.session.query(Message)
-                .filter(Message.parent_message_id.in_(parent_message_ids))
-                .order_by(Message.timestamp.asc())
-                .all()
-            )
-
-    def get_has_older_messages(
-        self,
-        user_id: int,
-        conversation_id: uuid.UUID,
-        cursor: datetime,
-    ) -> bool:
-        with DatabaseConnector() as db:
-            count = (
-                db.session.query(Message)
-                .filter(
-                    Message.user_id == user_id,
-                    Message.role == "user",
-                    Message.conversation_id == conversation_id,
-                    Message.timestamp < cursor,
+        async with AsyncDatabaseConnector() as db:
+            return list(
+                await db.session.scalars(
+                    select(Message)
+                    .filter(Message.parent_message_id.in_(parent_message_ids))
+                    .order_by(Message.timestamp.asc())
                 )
-                .count()
             )
-            return count > 0
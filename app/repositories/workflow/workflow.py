@@ -1,7 +1,9 @@
 import uuid
 
+from sqlalchemy import select, update
+
 from app.core.enums import WorkflowRunStatusEnum
-from app.db.database import DatabaseConnector
+from app.db.database import AsyncDatabaseConnector
 from app.entities.workflows.workflow import Workflow, WorkflowRun
 from app.repositories.base.base import BaseSessionRepository
 
@@ -9,35 +11,35 @@ from app.repositories.base.base import BaseSessionRepository
 class WorkflowRepository(BaseSessionRepository[Workflow]):
     model = Workflow
 
-    def get_workflow_by_id(
+    async def get_workflow_by_id(
         self,
         workflow_id: uuid.UUID,
     ) -> Workflow | None:
-        with DatabaseConnector() as db:
-            return (
-                db.session.query(Workflow)
-                .filter(
+        async with AsyncDatabaseConnector() as db:
+            return await db.session.scalar(
+                select(Workflow).filter(
                     Workflow.id == workflow_id,
                     Workflow.deleted_date.is_(None),
                 )
-                .one_or_none()
             )
 
-    def get_workflows_by_user_id(
+    async def get_workflows_by_user_id(
         self,
         user_id: int,
     ) -> list[Workflow]:
-        with DatabaseConnector() as db:
-            query = db.session.query(Workflow).filter(
+        async with AsyncDatabaseConnector() as db:
+            query = select(Workflow).filter(
                 Workflow.user_id == user_id,
                 Workflow.deleted_date.is_(None),
             )
 
-            return query.order_by(Workflow.updated_date.desc()).all()
+            return list(
+                await db.session.scalars(query.order_by(Workflow.updated_date.desc()))
+            )
 
-    def add_workflow_run(self, workflow_id):
-        with DatabaseConnector() as db:
-            workflow = db.session.query(Workflow).filter_by(id=workflow_id).first()
+    async def add_workflow_run(self, workflow_id):
+        async with AsyncDatabaseConnector() as db:
+            workflow = await db.session.get(Workflow, workflow_id)
             if not workflow:
                 return
 
@@ -48,12 +50,17 @@ class WorkflowRepository(BaseSessionRepository[Workflow]):
                 status=WorkflowRunStatusEnum.RUNNING,
             )
             db.session.add(run)
-            db.session.commit()
+            await db.commit()
             return run
 
-    def finish_workflow_run(self, run_id, conversation_id):
-        with DatabaseConnector() as db:
-            run = db.session.query(WorkflowRun).filter_by(id=run_id).first()
-            run.status = WorkflowRunStatusEnum.SUCCESS
-            run.conversation_id = conversation_id
-            db.session.commit()
+    async def finish_workflow_run(self, run_id, conversation_id):
+        async with AsyncDatabaseConnector() as db:
+            await db.session.execute(
+                update(WorkflowRun)
+                .filter_by(id=run_id)
+                .values(
+                    status=WorkflowRunStatusEnum.SUCCESS,
+                    conversation_id=conversation_id,
+                )
+            )
+            await db.commit()
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+
+import redis.asyncio as redis
+
+from app.api.schemas.auth.token_payload import TokenPayload
+from app.config import settings
+from app.db.database import run_after_commit
+from app.db.redis import get_redis
+from app.models.auth.user import ReadUserModel
+
+
+class TokenCache:
+    """
+    Verified tokens of this process, least recently used first.
+
+    Keyed by the token's SHA-256, so the cache holds no usable credentials,
+    and kept until the token expires: a hit is as good as decoding and
+    checking the token again.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._payloads: OrderedDict[bytes, TokenPayload] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> TokenPayload | None:
+        key = self._key(token)
+        payload = self._payloads.get(key)
+        if payload is None:
+            return None
+        if payload.exp.timestamp() <= time.time():
+            del self._payloads[key]
+            return None
+        self._payloads.move_to_end(key)
+        return payload
+
+    def set(self, token: str, payload: TokenPayload) -> None:
+        key = self._key(token)
+        self._payloads[key] = payload
+        self._payloads.move_to_end(key)
+        while len(self._payloads) > self._max_size:
+            self._payloads.popitem(last=False)
+
+
+class UserCache:
+    """
+    Users by id for a short TTL, in this process or in Redis.
+
+    Changes to a user row invalidate its entry (see invalidate_cached_user).
+    In Redis the invalidation reaches every worker; in process it reaches
+    only the one that made the change, and the TTL bounds how long the
+    others serve the old row. Redis errors count as misses, so auth falls
+    back to the database instead of failing.
+    """
+
+    def __init__(self, ttl: float, client: redis.Redis | None = None) -> None:
+        self._ttl = ttl
+        self._redis = client
+        # Same TTL for all, so insertion order is expiry order
+        self._users: OrderedDict[int, tuple[float, ReadUserModel]] = OrderedDict()
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"pam:user:{user_id}"
+
+    @staticmethod
+    def _encode(user: ReadUserModel) -> str:
+        # composio_entity_id is excluded from dumps, which are client-facing
+        return json.dumps(
+            {
+                **user.model_dump(mode="json"),
+                "composio_entity_id": user.composio_entity_id,
+            }
+        )
+
+    async def get(self, user_id: int) -> ReadUserModel | None:
+        if self._redis is not None:
+            try:
+                value = await self._redis.get(self._key(user_id))
+            except redis.RedisError:
+                logging.exception(f"Reading cached user {user_id} failed")
+                return None
+            return None if value is None else ReadUserModel.model_validate_json(value)
+
+        entry = self._users.get(user_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            del self._users[user_id]
+            return None
+        # Callers may change their copy
+        return user.model_copy()
+
+    async def set(self, user: ReadUserModel) -> None:
+        if self._redis is not None:
+            try:
+                await self._redis.set(
+                    self._key(user.id),
+                    self._encode(user),
+                    ex=int(self._ttl),
+                )
+            except redis.RedisError:
+                logging.exception(f"Caching user {user.id} failed")
+            return
+
+        now = time.monotonic()
+        while self._users:
+            user_id, (expires_at, _) = next(iter(self._users.items()))
+            if expires_at > now:
+                break
+            del self._users[user_id]
+        self._users.pop(user.id, None)
+        self._users[user.id] = (now + self._ttl, user.model_copy())
+
+    async def invalidate(self, user_id: int) -> None:
+        self._users.pop(user_id, None)
+        if self._redis is not None:
+            try:
+                await self._redis.delete(self._key(user_id))
+            except redis.RedisError:
+                # Served until the TTL runs out
+                logging.exception(f"Invalidating cached user {user_id} failed")
+
+
+_token_cache: TokenCache | None = None
+_user_cache: UserCache | None = None
+
+
+def get_token_cache() -> TokenCache:
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache(settings.AUTH_TOKEN_CACHE_SIZE)
+    return _token_cache
+
+
+def get_user_cache() -> UserCache:
+    global _user_cache
+    if _user_cache is None:
+        _user_cache = UserCache(
+            settings.AUTH_USER_CACHE_TTL.total_seconds(),
+            get_redis() if settings.AUTH_USER_CACHE_IN_REDIS else None,
+        )
+    return _user_cache
+
+
+async def invalidate_cached_user(user_id: int) -> None:
+    """Drop the user's cached row once the change being made to it commits."""
+    await run_after_commit(lambda: get_user_cache().invalidate(user_id))
@@ -4,7 +4,6 @@ from typing import Optional
 
 import jwt
 from fastapi.security import HTTPAuthorizationCredentials
-from passlib.apps import custom_app_context as pwd_context
 
 from app.api.schemas.auth.requests import LoginRequest, RegisterRequest
 from app.api.schemas.auth.responses import TokensResponse
@@ -21,6 +20,8 @@ from app.core.exceptions.auth.exceptions import (
 from app.entities.auth.user import User
 from app.models.auth.user import CheckUserPasswordModel, CreateUserModel, ReadUserModel
 from app.repositories.auth.auth import AuthRepository
+from app.services.auth.auth_cache import get_token_cache, get_user_cache
+from app.services.auth.passwords import get_password_hasher
 
 
 class AuthService:
@@ -31,39 +32,55 @@ class AuthService:
     def __init__(self, repository: AuthRepository) -> None:
         self._repository = repository
 
-    def register_user(self, user_data: RegisterRequest) -> ReadUserModel:
-        existing = self._repository.get(email=user_data.email)
+    async def register_user(self, user_data: RegisterRequest) -> ReadUserModel:
+        existing = await self._repository.get(email=user_data.email)
         if existing:
             raise EmailAlreadyRegisteredError("Email already registered")
 
-        password_hash = self.set_password(user_data.password)
+        password_hash = await self.set_password(user_data.password)
         create_user_data = CreateUserModel(
             name=user_data.name,
             email=user_data.email,
             password_hash=password_hash,
             company=user_data.company_name,
-            created_date=datetime.datetime.now(),
+            created_date=datetime.datetime.now(datetime.timezone.utc),
         )
         return ReadUserModel.model_validate(
-            self._repository.create(**create_user_data.model_dump()),
+            await self._repository.create(**create_user_data.model_dump()),
         )
 
-    def set_password(self, password):
-        return pwd_context.hash(password)
+    async def set_password(self, password: str) -> str:
+        return await get_password_hasher().hash(password)
 
-    def check_password(self, given_password, user_password) -> bool:
-        return pwd_context.verify(given_password, user_password)
+    async def check_password(self, given_password: str, user: CheckUserPasswordModel) -> bool:
+        """
+        Check the password of the user, upgrading its stored hash when it
+        uses an old scheme or old parameters
+        """
+        matches, new_hash = await get_password_hasher().verify(
+            given_password,
+            user.password_hash,
+        )
+        if new_hash is not None:
+            await self._repository.update({"password_hash": new_hash}, id=user.id)
+        return matches
 
     @staticmethod
     def _verify_token(token: str) -> TokenPayload:
         """
         Verify JWT token
-        Uses jwt library to decode the token.
+        Uses jwt library to decode the token, unless it was verified before
+        and is in the token cache.
         :param token: Token to verify
         :raise FailedAuthorizationException: in case of error when decoding token. The exception contains the message
         from the original exception from jwt library.
         :return: token payload object
         """
+        cache = get_token_cache()
+        payload = cache.get(token)
+        if payload is not None:
+            return payload
+
         try:
             payload_dict = jwt.decode(
                 jwt=token,
@@ -72,14 +89,23 @@ class AuthService:
                 issuer=settings.TOKEN_ISSUER,
                 options={"require": ["iss", "exp", "iat", "sub"]},
             )
-            return TokenPayload(**payload_dict)
+            payload = TokenPayload(**payload_dict)
         except Exception as e:
             logging.info(f"Token verification failed. Error: {e.__repr__()}")
             raise FailedAuthorizationException(e.__repr__())
 
-    def get_user_by_id(self, user_id: int) -> ReadUserModel:
-        """Get user by id from the database"""
-        return self._repository.get(id=user_id)
+        cache.set(token, payload)
+        return payload
+
+    async def get_user_by_id(self, user_id: int) -> Optional[ReadUserModel]:
+        """Get user by id from the user cache, or the database on a miss"""
+        cache = get_user_cache()
+        user = await cache.get(user_id)
+        if user is None:
+            user = ReadUserModel.model_validate(await self._repository.get(id=user_id))
+            if user is not None:
+                await cache.set(user)
+        return user
 
     def validate_token(
         self,
@@ -122,23 +148,23 @@ class AuthService:
                 raise e
             return None
 
-    def require_user_by_email(self, email: str) -> CheckUserPasswordModel:
-        user = self._repository.get(email=email)
+    async def require_user_by_email(self, email: str) -> CheckUserPasswordModel:
+        user = await self._repository.get(email=email)
 
         if user is None:
             raise FailedLoginException()
 
         return CheckUserPasswordModel.model_validate(user)
 
-    def get_user_by_email(self, email: str) -> ReadUserModel:
-        user = self._repository.get(email=email)
+    async def get_user_by_email(self, email: str) -> ReadUserModel:
+        user = await self._repository.get(email=email)
 
         if user is None:
             raise FailedLoginException()
 
         return ReadUserModel.model_validate(user)
 
-    def require_user(self, user_id: int) -> ReadUserModel:
+    async def require_user(self, user_id: int) -> ReadUserModel:
         """
         Require user from id
         :param user_id: User id
@@ -146,23 +172,25 @@ class AuthService:
         :raise UserNotFoundByIdOrDeletedException: when user was not found or was deleted
         :return: user object
         """
-        user = self.get_user_by_id(user_id=user_id)
+        user = await self.get_user_by_id(user_id=user_id)
 
         if user is None:
             raise UserNotFoundByIdOrDeletedException()
 
-        user_data = self._repository.get(id=user.id)
-
-        return ReadUserModel.model_validate(user_data)
+        return user
 
-    def verify_login(self, body: LoginRequest) -> ReadUserModel:
-        user = self.require_user_by_email(email=body.email)
+    async def verify_login(self, body: LoginRequest) -> ReadUserModel:
+        user = await self._repository.get(email=body.email)
+        if user is None:
+            raise FailedLoginException()
 
-        if not user.check_password(body.password):
+        if not await self.check_password(
+            body.password,
+            CheckUserPasswordModel.model_validate(user),
+        ):
             raise FailedLoginException()
 
-        user_data = self._repository.get(id=user.id)
-        return ReadUserModel.model_validate(user_data)
+        return ReadUserModel.model_validate(user)
 
     @staticmethod
     def generate_token(user_id: int, token_type: TokenTypeEnum) -> str:
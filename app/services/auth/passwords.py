@@ -0,0 +1,70 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from passlib.context import CryptContext
+
+from app.config import settings
+
+# Hashes of every scheme still verify; all but the configured one, and
+# hashes made with other parameters, are replaced on the next login.
+# sha512_crypt and sha256_crypt are what passlib's custom_app_context made.
+_SCHEMES = ("argon2", "bcrypt", "sha512_crypt", "sha256_crypt")
+
+
+class PasswordHasher:
+    """
+    Password hashing and verification, off the event loop.
+
+    Every hash deliberately takes tens of milliseconds of CPU, which in a
+    handler would stall all requests of the worker. argon2 and bcrypt
+    release the GIL while hashing, so a small thread pool runs them in
+    parallel; its size bounds the CPU (and, for argon2, memory) that
+    logins can take at once, and further ones queue.
+    """
+
+    def __init__(self, context: CryptContext, max_workers: int) -> None:
+        self._context = context
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="password-hash",
+        )
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self._context.hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> tuple[bool, str | None]:
+        """
+        Check the password against its hash
+
+        Returns:
+            Whether it matches, and a new hash to store when the password
+            matches but its hash uses an old scheme or old parameters
+        """
+        return await self._run(self._context.verify_and_update, password, password_hash)
+
+
+_hasher: PasswordHasher | None = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    global _hasher
+    if _hasher is None:
+        scheme = settings.PASSWORD_HASH_SCHEME
+        _hasher = PasswordHasher(
+            CryptContext(
+                schemes=[scheme, *(name for name in _SCHEMES if name != scheme)],
+                default=scheme,
+                deprecated="auto",
+                argon2__time_cost=settings.ARGON2_TIME_COST,
+                argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+                argon2__parallelism=settings.ARGON2_PARALLELISM,
+                bcrypt__rounds=settings.BCRYPT_ROUNDS,
+            ),
+            max_workers=settings.PASSWORD_HASH_MAX_WORKERS,
+        )
+    return _hasher
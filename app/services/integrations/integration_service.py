@@ -23,6 +23,7 @@ from app.core.exceptions.integrations.exceptions import (
 )
 from app.repositories.auth.auth import AuthRepository
 from app.repositories.integrations.integrations import IntegrationRepository
+from app.services.auth.auth_cache import invalidate_cached_user
 
 logger = logging.getLogger(__name__)
 
@@ -46,9 +47,9 @@ class IntegrationService:
             self._composio_client = Composio(api_key=settings.COMPOSIO_API_KEY)
         return self._composio_client
 
-    def get_or_create_entity_id(self, user_id: int) -> str:
+    async def get_or_create_entity_id(self, user_id: int) -> str:
         """Get or create Composio entity ID for a user."""
-        user = self._auth_repository.get(id=user_id)
+        user = await self._auth_repository.get(id=user_id)
         if not user:
             raise UserEntityNotFoundException(user_id)
 
@@ -57,20 +58,21 @@ class IntegrationService:
 
         # Create new entity ID based on user email or ID
         entity_id = f"user_{user.email.split('@')[0]}_{user.id}"
-        self._auth_repository.update({"composio_entity_id": entity_id}, id=user_id)
+        await self._auth_repository.update({"composio_entity_id": entity_id}, id=user_id)
+        await invalidate_cached_user(user_id)
         logger.info(f"Created Composio entity ID for user {user_id}: {entity_id}")
         return entity_id
 
-    def list_user_integrations(self, user_id: int) -> ListIntegrationsResponse:
+    async def list_user_integrations(self, user_id: int) -> ListIntegrationsResponse:
         """
         Get all available integrations and mark which ones are active for the user.
         Returns ListIntegrationsResponse with 'active' and 'inactive' lists.
         """
         # Get all available integrations from database
-        all_integrations = self._integration_repository.get_all_integrations()
+        all_integrations = await self._integration_repository.get_all_integrations()
 
         # Get user's connected integrations
-        user_integrations = self._integration_repository.get_user_integrations(user_id)
+        user_integrations = await self._integration_repository.get_user_integrations(user_id)
         connected_integration_ids = {
             ui.integration_id for ui in user_integrations if ui.status == "connected"
         }
@@ -93,7 +95,7 @@ class IntegrationService:
 
         return ListIntegrationsResponse(active=active, inactive=inactive)
 
-    def initiate_connection(
+    async def initiate_connection(
         self,
         user_id: int,
         app_slug: str,
@@ -103,16 +105,16 @@ class IntegrationService:
         Initiate OAuth connection for a user to connect an app using Composio v2 API.
         Returns authorization URL for user to complete OAuth flow.
         """
-        entity_id = self.get_or_create_entity_id(user_id)
+        entity_id = await self.get_or_create_entity_id(user_id)
         app_slug = app_slug.lower()
 
         # Get integration by slug
-        integration = self._integration_repository.get_integration_by_slug(app_slug)
+        integration = await self._integration_repository.get_integration_by_slug(app_slug)
         if not integration:
             raise IntegrationNotFoundException(app_slug)
 
         # Create or update user integration record
-        self._integration_repository.create_or_update_user_integration(
+        await self._integration_repository.create_or_update_user_integration(
             user_id=user_id,
             integration_id=integration.id,
             status="pending"
@@ -173,7 +175,7 @@ class IntegrationService:
             message=f"Please authorize {app_slug}"
         )
 
-    def _find_and_update_active_connection(
+    async def _find_and_update_active_connection(
         self,
         entity_id: str,
         app_slug: str,
@@ -198,7 +200,7 @@ class IntegrationService:
             # In Composio v2, toolkit and status are always present
             if acc.toolkit.slug.lower() == app_slug and acc.status == "ACTIVE":
                 # Found active connection, update database
-                self._integration_repository.create_or_update_user_integration(
+                await self._integration_repository.create_or_update_user_integration(
                     user_id=user_id,
                     integration_id=integration_id,
                     status="connected",
@@ -225,7 +227,7 @@ class IntegrationService:
 
         while (time.time() - start_time) < max_wait:
             try:
-                if self._find_and_update_active_connection(entity_id, app_slug, user_id, integration_id):
+                if await self._find_and_update_active_connection(entity_id, app_slug, user_id, integration_id):
                     logger.info(f"[OK] OAuth completed for user {user_id}/{app_slug}")
                     return
 
@@ -236,25 +238,25 @@ class IntegrationService:
 
         logger.warning(f"OAuth timeout for user {user_id}/{app_slug}")
 
-    def update_connection_from_callback(self, user_id: int, app_slug: str) -> IntegrationCallbackResponse:
+    async def update_connection_from_callback(self, user_id: int, app_slug: str) -> IntegrationCallbackResponse:
         """
         Called when frontend receives OAuth callback and notifies backend.
         Checks Composio for active connection and updates database.
         """
-        user = self._auth_repository.get(id=user_id)
+        user = await self._auth_repository.get(id=user_id)
         if not user or not user.composio_entity_id:
             raise UserEntityNotFoundException(user_id)
 
         app_slug = app_slug.lower()
 
         # Get integration by slug
-        integration = self._integration_repository.get_integration_by_slug(app_slug)
+        integration = await self._integration_repository.get_integration_by_slug(app_slug)
         if not integration:
             raise IntegrationNotFoundException(app_slug)
 
         try:
             # Check for active connection and update if found
-            if self._find_and_update_active_connection(user.composio_entity_id, app_slug, user_id, integration.id):
+            if await self._find_and_update_active_connection(user.composio_entity_id, app_slug, user_id, integration.id):
                 logger.info(f"Updated connection from callback: user {user_id} -> {app_slug}")
                 return IntegrationCallbackResponse(
                     success=True,
@@ -273,21 +275,21 @@ class IntegrationService:
             logger.error(f"Failed to update connection from callback: user {user_id}:{app_slug} - {e}")
             raise
 
-    def disconnect_app(self, user_id: int, app_slug: str) -> DisconnectIntegrationResponse:
+    async def disconnect_app(self, user_id: int, app_slug: str) -> DisconnectIntegrationResponse:
         """Disconnect a user's app connection using v2 API."""
-        user = self._auth_repository.get(id=user_id)
+        user = await self._auth_repository.get(id=user_id)
         if not user:
             raise UserEntityNotFoundException(user_id)
 
         app_slug = app_slug.lower()
 
         # Get integration by slug
-        integration = self._integration_repository.get_integration_by_slug(app_slug)
+        integration = await self._integration_repository.get_integration_by_slug(app_slug)
         if not integration:
             raise IntegrationNotFoundException(app_slug)
 
         # Get user integration
-        user_integration = self._integration_repository.get_user_integration(user_id, integration.id)
+        user_integration = await self._integration_repository.get_user_integration(user_id, integration.id)
 
         if not user_integration or user_integration.status != "connected":
             raise IntegrationNotConnectedException(app_slug)
@@ -309,7 +311,7 @@ class IntegrationService:
                 logger.warning(f"Failed to revoke Composio account: {e}")
 
         # Update local database
-        self._integration_repository.create_or_update_user_integration(
+        await self._integration_repository.create_or_update_user_integration(
             user_id=user_id,
             integration_id=integration.id,
             status="disconnected",
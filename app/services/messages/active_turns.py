@@ -0,0 +1,124 @@
+import asyncio
+import uuid
+from collections import defaultdict
+from contextlib import aclosing, contextmanager, suppress
+from typing import AsyncGenerator, AsyncIterator, Iterator, TypeVar
+
+from starlette.types import Receive
+
+T = TypeVar("T")
+
+# Cancellation reasons stored with the turn's result
+CLIENT_DISCONNECTED = "client_disconnected"
+CANCELLED_BY_USER = "cancelled_by_user"
+
+
+class ActiveTurn:
+    """A chat turn whose CLI run is in progress and can still be cancelled."""
+
+    def __init__(self, conversation_id: uuid.UUID, user_id: int) -> None:
+        self.conversation_id = conversation_id
+        self.user_id = user_id
+        self.cancelled = asyncio.Event()
+        self.cancel_reason: str | None = None
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self.cancelled.is_set()
+
+    def cancel(self, reason: str) -> None:
+        if not self.is_cancelled:
+            self.cancel_reason = reason
+            self.cancelled.set()
+
+
+# Turns running in this process, by conversation
+_active_turns: dict[uuid.UUID, set[ActiveTurn]] = defaultdict(set)
+
+
+@contextmanager
+def track_turn(turn: ActiveTurn) -> Iterator[ActiveTurn]:
+    """Make the turn reachable by ``cancel_turns`` while the block runs."""
+    _active_turns[turn.conversation_id].add(turn)
+    try:
+        yield turn
+    finally:
+        turns = _active_turns[turn.conversation_id]
+        turns.discard(turn)
+        if not turns:
+            del _active_turns[turn.conversation_id]
+
+
+def cancel_turns(conversation_id: uuid.UUID, reason: str) -> bool:
+    """Cancel every running turn of the conversation, True if there was one."""
+    turns = _active_turns.get(conversation_id)
+    if not turns:
+        return False
+
+    for turn in turns:
+        turn.cancel(reason)
+    return True
+
+
+async def iterate_until(
+    stream: AsyncGenerator[T, None],
+    stop: asyncio.Event,
+) -> AsyncIterator[T]:
+    """
+    Iterate ``stream`` until it ends or ``stop`` is set, then close it.
+
+    When ``stop`` fires while the stream is waiting (e.g. on a long tool
+    call), the pending step is cancelled right away, so the stream's cleanup
+    (terminating the CLI process, releasing its slot) runs immediately
+    instead of at its next item.
+    """
+    stop_task = asyncio.ensure_future(stop.wait())
+    next_task: asyncio.Future | None = None
+    try:
+        while not stop.is_set():
+            next_task = asyncio.ensure_future(anext(stream))
+            await asyncio.wait(
+                {next_task, stop_task},
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+
+            if not next_task.done():
+                next_task.cancel()
+                with suppress(asyncio.CancelledError, StopAsyncIteration):
+                    await next_task
+                return
+
+            try:
+                item = next_task.result()
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        stop_task.cancel()
+        if next_task is not None and not next_task.done():
+            # We are being torn down mid-step: cancelling the step finalizes
+            # the stream from inside its own task.
+            next_task.cancel()
+        else:
+            await stream.aclose()
+
+
+async def until_disconnected(
+    stream: AsyncGenerator[T, None],
+    receive: Receive,
+) -> AsyncIterator[T]:
+    """Relay ``stream`` until it ends or the ASGI client disconnects."""
+    disconnected = asyncio.Event()
+
+    async def watch() -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+        disconnected.set()
+
+    watcher = asyncio.create_task(watch())
+    try:
+        async with aclosing(iterate_until(stream, disconnected)) as items:
+            async for item in items:
+                yield item
+    finally:
+        watcher.cancel()
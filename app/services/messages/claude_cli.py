@@ -1,23 +1,35 @@
 import asyncio
-import json
+import logging
 import os
 import sys
-from typing import Any, AsyncIterator
+import time
+import uuid
+from contextlib import aclosing
+from typing import AsyncIterator
 
 from app.config import settings
-
-# Unix-only imports (pty and select)
-# These modules are not available on Windows
+from app.models.messages.cli_event import AssistantEvent, CLIEvent
+from app.services.messages.claude_worker_pool import get_worker_pool
+from app.services.messages.cli_stream import (
+    STREAM_LINE_LIMIT,
+    PtyLineReader,
+    build_cli_args,
+    enlarge_pipe_buffer,
+    parse_stream_line,
+    stop_process,
+)
+from app.services.messages.turn_metrics import FIRST_BYTE, SPAWN, TurnTimings
+
+# Unix-only imports (pty)
+# This module is not available on Windows
 try:
     import pty
-    import select
     PTY_AVAILABLE = True
 except (ImportError, AttributeError):
     PTY_AVAILABLE = False
 
 working_dir = settings.WORKING_DIR
 
-
 class AsyncClaudeCLI:
     def __init__(self, model: str = "sonnet"):
         self.model = model
@@ -35,24 +47,128 @@ class AsyncClaudeCLI:
         responses = []
 
         async for response_data in self.send_prompt_stream(prompt):
-            if response_data.get("type") == "text":
-                responses.append(response_data.get("text", ""))
+            if isinstance(response_data, AssistantEvent) and isinstance(
+                response_data.message.content, list
+            ):
+                responses.extend(
+                    block.get("text", "")
+                    for block in response_data.message.content
+                    if block.get("type") == "text"
+                )
 
         return "".join(responses)
 
     async def send_prompt_stream(
         self,
         prompt: str,
-    ) -> AsyncIterator[dict[Any, Any]]:
+        conversation_id: uuid.UUID | None = None,
+        session_id: str | None = None,
+        timings: TurnTimings | None = None,
+    ) -> AsyncIterator[CLIEvent]:
         """
         Send a prompt to Claude CLI and yield streaming responses
 
+        When the worker pool is running and a conversation is given, the turn
+        is handed to that conversation's warm CLI process. Otherwise a
+        one-shot process is spawned for the prompt. Callers passing a
+        conversation hold its ``conversation_lock`` until the stream ends.
+
         Args:
             prompt: The text prompt to send to Claude
+            conversation_id: Conversation the prompt belongs to
+            session_id: CLI session of the conversation to resume, None for
+                the first turn
+            timings: Stage timings of the turn, for spawn and first byte
 
         Yields:
-            Dict containing parsed JSON responses from Claude CLI
+            Typed stream-json events from Claude CLI
+        """
+        timings = timings or TurnTimings()
+        pool = get_worker_pool()
+        if pool is not None and conversation_id is not None:
+            turn = await pool.stream_turn(conversation_id, prompt, session_id, timings)
+            if turn is not None:
+                async with aclosing(turn):
+                    async for response in turn:
+                        yield response
+                return
+
+        async with aclosing(self._run_process(prompt, session_id, timings)) as turn:
+            async for response in turn:
+                yield response
+
+    async def _run_process(
+        self,
+        prompt: str,
+        session_id: str | None,
+        timings: TurnTimings,
+    ) -> AsyncIterator[CLIEvent]:
+        """Spawn a one-shot Claude CLI process for the prompt."""
+        args = [*build_cli_args(session_id), prompt]
+
+        if settings.CLAUDE_CLI_TRANSPORT == "pipe":
+            run = self._run_pipe_process(args, timings)
+        else:
+            run = self._run_pty_process(args, timings)
+
+        async with aclosing(run) as events:
+            async for response in events:
+                yield response
+
+    async def _run_pipe_process(
+        self,
+        args: list[str],
+        timings: TurnTimings,
+    ) -> AsyncIterator[CLIEvent]:
         """
+        Run the CLI with plain pipes.
+
+        stdout carries only stream-json and is read with
+        ``StreamReader.readline``; stderr is collected separately and
+        reported if the process fails.
+        """
+        started = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=working_dir,
+            limit=STREAM_LINE_LIMIT,
+        )
+        spawned = time.perf_counter()
+        timings.observe(SPAWN, spawned - started)
+        enlarge_pipe_buffer(process)
+        stderr_task = asyncio.create_task(process.stderr.read())
+        try:
+            while line_bytes := await process.stdout.readline():
+                if spawned is not None:
+                    timings.observe(FIRST_BYTE, time.perf_counter() - spawned)
+                    spawned = None
+                response = parse_stream_line(line_bytes.rstrip(b"\n"))
+                if response is not None:
+                    yield response
+
+            await process.wait()
+            stderr = (await stderr_task).decode("utf-8", errors="replace").strip()
+
+            if process.returncode != 0:
+                logging.error(f"Claude CLI stderr: {stderr}")
+                raise RuntimeError(
+                    f"Claude CLI failed with code {process.returncode}: {stderr[-500:]}"
+                )
+            if stderr:
+                logging.info(f"Claude CLI stderr: {stderr}")
+        finally:
+            stderr_task.cancel()
+            await stop_process(process)
+
+    async def _run_pty_process(
+        self,
+        args: list[str],
+        timings: TurnTimings,
+    ) -> AsyncIterator[CLIEvent]:
+        """Run the CLI attached to a PTY; stdout and stderr share the terminal."""
         if not PTY_AVAILABLE:
             raise RuntimeError(
                 "Claude CLI functionality requires Unix PTY support. "
@@ -63,18 +179,8 @@ class AsyncClaudeCLI:
         master, slave = pty.openpty()
         process = None
         try:
-            # Build Claude CLI command
-            args = [
-                "claude",
-                "--continue",
-                "--output-format",
-                "stream-json",
-                "--verbose",
-                "--print",
-                prompt,
-            ]
-
             # Start Claude process with PTY
+            started = time.perf_counter()
             process = await asyncio.create_subprocess_exec(
                 *args,
                 stdin=slave,
@@ -82,72 +188,24 @@ class AsyncClaudeCLI:
                 stderr=slave,
                 cwd=working_dir,
             )
+            spawned = time.perf_counter()
+            timings.observe(SPAWN, spawned - started)
 
             # Close slave in parent process
             os.close(slave)
 
-            # Read output asynchronously
-            buffer = b""
-
-            while True:
-                try:
-                    # Check if data is available to read (non-blocking)
-                    ready, _, _ = select.select([master], [], [], 0.1)
-
-                    if ready:
-                        chunk = os.read(master, 1024)
-                        if not chunk:
-                            break
-
-                        buffer += chunk
-
-                        # Process complete lines
-                        while b"\n" in buffer:
-                            line_bytes, buffer = buffer.split(b"\n", 1)
-                            line = line_bytes.decode("utf-8", errors="replace").strip()
-
-                            if not line:
-                                continue
-
-                            try:
-                                # Parse JSON response
-                                response = json.loads(line)
-                                yield response
-                            except json.JSONDecodeError:
-                                # If not JSON, yield as raw text
-                                yield {"type": "raw", "text": line}
-
-                    # Check if process is still running
-                    if process.returncode is not None:
-                        # Process finished, read all remaining data
-                        while True:
-                            try:
-                                remaining = os.read(master, 1024)
-                                if not remaining:
-                                    break
-                                buffer += remaining
-                            except OSError:
-                                break
-                        break
-
-                    # Yield control to other coroutines
-                    await asyncio.sleep(0.01)
-
-                except OSError:
-                    break
-
-            # Process any remaining buffer
-            if buffer:
-                remaining_text = buffer.decode("utf-8", errors="replace").strip()
-                if remaining_text:
-                    for line in remaining_text.split("\n"):
-                        line = line.strip()
-                        if line:
-                            try:
-                                response = json.loads(line)
-                                yield response
-                            except json.JSONDecodeError:
-                                yield {"type": "raw", "text": line}
+            # Read output as the event loop reports it readable
+            reader = PtyLineReader(master)
+            try:
+                async for line_bytes in reader:
+                    if spawned is not None:
+                        timings.observe(FIRST_BYTE, time.perf_counter() - spawned)
+                        spawned = None
+                    response = parse_stream_line(line_bytes)
+                    if response is not None:
+                        yield response
+            finally:
+                reader.close()
 
             # Wait for process to complete
             await process.wait()
@@ -164,10 +222,5 @@ class AsyncClaudeCLI:
                 pass
 
             # Make sure process is terminated
-            if process is not None and process.returncode is None:
-                try:
-                    process.terminate()
-                    await asyncio.wait_for(process.wait(), timeout=5.0)
-                except asyncio.TimeoutError:
-                    process.kill()
-                    await process.wait()
+            if process is not None:
+                await stop_process(process)
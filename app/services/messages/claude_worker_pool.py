@@ -0,0 +1,339 @@
+import asyncio
+import json
+import logging
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, Hashable
+
+from app.config import settings
+from app.models.messages.cli_event import CLIEvent, ResultEvent
+from app.services.messages.cli_stream import (
+    STREAM_LINE_LIMIT,
+    build_cli_args,
+    enlarge_pipe_buffer,
+    parse_stream_line,
+    stop_process,
+)
+from app.services.messages.turn_metrics import FIRST_BYTE, SPAWN, TurnTimings
+
+
+class ClaudeWorker:
+    """
+    Long-lived Claude CLI process running in bidirectional stream-json mode.
+
+    Turns are written to stdin as stream-json ``user`` events and the
+    process answers on stdout until it emits a ``result`` event, after which
+    it waits for the next turn with MCP servers and config already loaded.
+    """
+
+    def __init__(self, key: Hashable, args: list[str], cwd: str) -> None:
+        self.key = key
+        self._args = args
+        self._cwd = cwd
+        self._process: asyncio.subprocess.Process | None = None
+        self._stderr_task: asyncio.Task | None = None
+        self._started = asyncio.Event()
+        self.leases = 0
+        self.last_used = time.monotonic()
+
+    @property
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    @property
+    def is_idle(self) -> bool:
+        return self.leases == 0
+
+    @property
+    def is_starting(self) -> bool:
+        return not self._started.is_set()
+
+    async def start(self) -> None:
+        try:
+            self._process = await asyncio.create_subprocess_exec(
+                *self._args,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=self._cwd,
+                limit=STREAM_LINE_LIMIT,
+            )
+        finally:
+            self._started.set()
+        enlarge_pipe_buffer(self._process)
+        self._stderr_task = asyncio.create_task(self._drain_stderr())
+        logging.info(f"Started Claude worker pid={self._process.pid} key={self.key}")
+
+    async def wait_started(self) -> None:
+        await self._started.wait()
+
+    async def _drain_stderr(self) -> None:
+        assert self._process is not None and self._process.stderr is not None
+        async for line in self._process.stderr:
+            logging.debug(f"Claude worker {self.key} stderr: {line.decode(errors='replace').rstrip()}")
+
+    async def send_turn(
+        self,
+        prompt: str,
+        timings: TurnTimings,
+    ) -> AsyncIterator[CLIEvent]:
+        """
+        Send a single user turn and yield stream-json events up to and
+        including the ``result`` event.
+
+        The caller must hold the conversation's lock (see
+        ``conversation_lock``). If the turn is abandoned before the
+        ``result`` event the process is closed, since its stdout would still
+        carry the rest of the unfinished turn.
+        """
+        if not self.is_alive:
+            raise RuntimeError("Claude worker is not running")
+
+        process = self._process
+        message = {
+            "type": "user",
+            "message": {
+                "role": "user",
+                "content": [{"type": "text", "text": prompt}],
+            },
+        }
+        process.stdin.write(json.dumps(message).encode() + b"\n")
+        await process.stdin.drain()
+        sent = time.perf_counter()
+
+        finished = False
+        try:
+            while True:
+                line_bytes = await process.stdout.readline()
+                if sent is not None:
+                    timings.observe(FIRST_BYTE, time.perf_counter() - sent)
+                    sent = None
+                if not line_bytes:
+                    await process.wait()
+                    raise RuntimeError(
+                        f"Claude CLI failed with code {process.returncode}"
+                    )
+
+                response = parse_stream_line(line_bytes.rstrip(b"\n"))
+                if response is None:
+                    continue
+
+                if isinstance(response, ResultEvent):
+                    finished = True
+                    yield response
+                    return
+
+                yield response
+        finally:
+            self.last_used = time.monotonic()
+            if not finished:
+                await self.close()
+
+    async def close(self) -> None:
+        process = self._process
+        if process is None:
+            return
+
+        await stop_process(process)
+
+        if self._stderr_task is not None:
+            self._stderr_task.cancel()
+
+        logging.info(f"Stopped Claude worker pid={process.pid} key={self.key}")
+
+
+class ClaudeWorkerPool:
+    """
+    Pool of warm Claude CLI workers keyed by conversation.
+
+    A conversation keeps its worker between turns so follow-up messages skip
+    process start-up and MCP handshakes. Workers idle longer than
+    ``idle_ttl`` seconds are evicted, and at most ``max_workers`` processes
+    are kept alive; when the pool is full of busy workers ``checkout``
+    returns None and the caller falls back to a one-shot process.
+    """
+
+    def __init__(self, max_workers: int, idle_ttl: float, cwd: str) -> None:
+        self.max_workers = max_workers
+        self.idle_ttl = idle_ttl
+        self._cwd = cwd
+        self._workers: dict[Hashable, ClaudeWorker] = {}
+        self._lock = asyncio.Lock()
+        self._reaper_task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._reaper_task is None:
+            self._reaper_task = asyncio.create_task(self._reap_idle_workers())
+
+    async def close(self) -> None:
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+
+        async with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+
+        await asyncio.gather(*(w.close() for w in workers), return_exceptions=True)
+
+    @staticmethod
+    def build_args(session_id: str | None) -> list[str]:
+        return [*build_cli_args(session_id), "--input-format", "stream-json"]
+
+    async def checkout(
+        self,
+        key: Hashable,
+        session_id: str | None = None,
+        timings: TurnTimings | None = None,
+    ) -> ClaudeWorker | None:
+        """
+        Return the warm worker for ``key``, starting one if there is room.
+
+        A new worker resumes ``session_id``; a warm one is already inside it.
+        The slot is reserved under the pool lock; processes are started and
+        evicted outside it, so one slow spawn or kill does not hold up the
+        checkouts of other conversations.
+        """
+        victim = None
+        async with self._lock:
+            worker = self._workers.get(key)
+            if worker is not None and (worker.is_starting or worker.is_alive):
+                worker.leases += 1
+                is_new = False
+            else:
+                self._workers.pop(key, None)
+
+                if len(self._workers) >= self.max_workers:
+                    victim = self._pop_lru()
+                    if victim is None:
+                        logging.info(
+                            "Claude worker pool is full, using a one-shot process."
+                        )
+                        return None
+
+                worker = ClaudeWorker(key, self.build_args(session_id), self._cwd)
+                worker.leases += 1
+                self._workers[key] = worker
+                is_new = True
+
+        if victim is not None:
+            await victim.close()
+
+        if not is_new:
+            # Another checkout of the conversation may still be starting it
+            await worker.wait_started()
+            if not worker.is_alive:
+                worker.leases -= 1
+                return None
+            return worker
+
+        started = time.perf_counter()
+        try:
+            await worker.start()
+        except BaseException:
+            worker.leases -= 1
+            await self._discard(worker)
+            raise
+        if timings is not None:
+            timings.observe(SPAWN, time.perf_counter() - started)
+        return worker
+
+    async def stream_turn(
+        self,
+        key: Hashable,
+        prompt: str,
+        session_id: str | None,
+        timings: TurnTimings,
+    ) -> AsyncIterator[CLIEvent] | None:
+        """
+        Run a turn on the conversation's worker, None if the pool is full.
+        The caller holds ``conversation_lock(key)`` until the turn ends.
+        """
+        worker = await self.checkout(key, session_id, timings)
+        if worker is None:
+            return None
+        return self._run_on_worker(worker, prompt, timings)
+
+    async def _run_on_worker(
+        self,
+        worker: ClaudeWorker,
+        prompt: str,
+        timings: TurnTimings,
+    ) -> AsyncIterator[CLIEvent]:
+        try:
+            async with aclosing(worker.send_turn(prompt, timings)) as turn:
+                async for response in turn:
+                    yield response
+        finally:
+            worker.leases -= 1
+            if not worker.is_alive:
+                await self._discard(worker)
+
+    async def _discard(self, worker: ClaudeWorker) -> None:
+        async with self._lock:
+            if self._workers.get(worker.key) is worker:
+                del self._workers[worker.key]
+
+    def _pop_lru(self) -> ClaudeWorker | None:
+        """
+        Take the least recently used idle worker out of the pool, for the
+        caller to close once it released ``_lock``, which it holds.
+        """
+        idle = [w for w in self._workers.values() if w.is_idle]
+        if not idle:
+            return None
+
+        victim = min(idle, key=lambda w: w.last_used)
+        del self._workers[victim.key]
+        return victim
+
+    async def _reap_idle_workers(self) -> None:
+        interval = max(1.0, min(self.idle_ttl / 2, 30.0))
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            async with self._lock:
+                expired = [
+                    w
+                    for w in self._workers.values()
+                    if not w.is_starting
+                    and (
+                        not w.is_alive
+                        or (w.is_idle and now - w.last_used > self.idle_ttl)
+                    )
+                ]
+                for worker in expired:
+                    del self._workers[worker.key]
+
+            for worker in expired:
+                await worker.close()
+
+
+_worker_pool: ClaudeWorkerPool | None = None
+
+
+def get_worker_pool() -> ClaudeWorkerPool | None:
+    """Pool started by the API process, or None (e.g. inside Celery tasks)."""
+    return _worker_pool
+
+
+def start_worker_pool() -> None:
+    global _worker_pool
+    if not settings.CLAUDE_WORKER_POOL_ENABLED or _worker_pool is not None:
+        return
+
+    _worker_pool = ClaudeWorkerPool(
+        max_workers=settings.CLAUDE_WORKER_POOL_MAX_WORKERS,
+        idle_ttl=settings.CLAUDE_WORKER_IDLE_TTL.total_seconds(),
+        cwd=settings.WORKING_DIR,
+    )
+    _worker_pool.start()
+
+
+async def stop_worker_pool() -> None:
+    global _worker_pool
+    if _worker_pool is None:
+        return
+
+    await _worker_pool.close()
+    _worker_pool = None
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import socket
+import time
+import uuid
+from typing import AsyncIterator
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.core.enums import CLIPriorityEnum
+from app.db.redis import get_redis
+
+# Drops the tickets whose lease ran out, admits queued tickets in order
+# while there are free slots, and returns the place of ARGV[4] in the
+# queue: 1-based while waiting, 0 once admitted, -1 if it is unknown.
+_ADMIT_SCRIPT = """
+local queue, users, leases, running = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+local now = tonumber(ARGV[1])
+local max_concurrent, max_per_user = tonumber(ARGV[2]), tonumber(ARGV[3])
+local ticket = ARGV[4]
+
+for _, expired in ipairs(redis.call('ZRANGEBYSCORE', leases, '-inf', now)) do
+    redis.call('ZREM', queue, expired)
+    redis.call('SREM', running, expired)
+    redis.call('HDEL', users, expired)
+    redis.call('ZREM', leases, expired)
+end
+
+local running_count = 0
+local running_per_user = {}
+for _, t in ipairs(redis.call('SMEMBERS', running)) do
+    local user = redis.call('HGET', users, t)
+    running_count = running_count + 1
+    running_per_user[user] = (running_per_user[user] or 0) + 1
+end
+
+local position = 0
+for _, t in ipairs(redis.call('ZRANGE', queue, 0, -1)) do
+    local user = redis.call('HGET', users, t)
+    if running_count < max_concurrent
+        and (running_per_user[user] or 0) < max_per_user then
+        redis.call('ZREM', queue, t)
+        redis.call('SADD', running, t)
+        running_count = running_count + 1
+        running_per_user[user] = (running_per_user[user] or 0) + 1
+        if t == ticket then
+            return 0
+        end
+    else
+        position = position + 1
+        if t == ticket then
+            return position
+        end
+    end
+end
+
+if redis.call('SISMEMBER', running, ticket) == 1 then
+    return 0
+end
+return -1
+"""
+
+# Queue scores order by priority, then by arrival
+_PRIORITY_WEIGHT = 2**40
+
+
+class CLIAdmissionTicket:
+    """A request for one Claude CLI run slot."""
+
+    def __init__(self, user_id: int, priority: CLIPriorityEnum) -> None:
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.priority = priority
+        self.granted = False
+        # Admitted without Redis, so not counted against the limits
+        self.untracked = False
+        self.lease_task: asyncio.Task | None = None
+
+
+class CLIScheduler:
+    """
+    Admission control for Claude CLI processes.
+
+    At most ``max_concurrent`` runs execute at once and at most
+    ``max_per_user`` of them belong to the same user. Waiting runs are
+    admitted by priority (interactive chat before workflows) and then in
+    arrival order; a user already at their quota is skipped so they cannot
+    block everybody queued behind them.
+
+    The queue and the running runs live in Redis under ``scope``, the host
+    name by default: the limits hold for all API and Celery worker
+    processes of a host together, since the CLI processes share its CPU and
+    memory, and each host has its own. Every ticket carries a lease that
+    its process renews, so the slots of a process that died free up when
+    the leases expire. Waiting tickets check for a free slot every
+    ``poll_interval``, or as soon as a run of the same process ends. When
+    Redis cannot be reached runs are admitted without limits rather than
+    failed.
+    """
+
+    def __init__(
+        self,
+        scope: str,
+        max_concurrent: int,
+        max_per_user: int,
+        lease: float,
+        poll_interval: float,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.lease = lease
+        self.poll_interval = poll_interval
+
+        prefix = f"pam:cli:{scope}"
+        self._seq_key = f"{prefix}:seq"
+        self._queue_key = f"{prefix}:queue"
+        self._users_key = f"{prefix}:users"
+        self._leases_key = f"{prefix}:leases"
+        self._running_key = f"{prefix}:running"
+        self._released: set[asyncio.Future] = set()
+
+    async def enqueue(
+        self,
+        user_id: int,
+        priority: CLIPriorityEnum,
+    ) -> CLIAdmissionTicket:
+        ticket = CLIAdmissionTicket(user_id, priority)
+        try:
+            await self._add(ticket)
+        except RedisError:
+            logging.exception("Could not queue a Claude CLI run, admitting it")
+            ticket.granted = True
+            ticket.untracked = True
+            return ticket
+
+        ticket.lease_task = asyncio.create_task(self._renew_lease(ticket))
+        return ticket
+
+    async def wait(self, ticket: CLIAdmissionTicket) -> AsyncIterator[int]:
+        """Yield the queue position every time it changes until admitted."""
+        last_position = None
+        while not ticket.granted:
+            try:
+                position = await self._admit(ticket)
+                if position < 0:
+                    # Its lease ran out while the process was stalled
+                    await self._add(ticket)
+                    continue
+            except RedisError:
+                logging.exception("Could not check the Claude CLI queue, admitting the run")
+                ticket.granted = True
+                ticket.untracked = True
+                return
+
+            if not position:
+                ticket.granted = True
+                return
+
+            if position != last_position:
+                last_position = position
+                yield position
+
+            released = asyncio.get_running_loop().create_future()
+            self._released.add(released)
+            try:
+                await asyncio.wait({released}, timeout=self.poll_interval)
+            finally:
+                self._released.discard(released)
+
+    async def release(self, ticket: CLIAdmissionTicket) -> None:
+        """Free the ticket's slot, or drop it from the queue if still waiting."""
+        if ticket.lease_task is not None:
+            ticket.lease_task.cancel()
+            ticket.lease_task = None
+        if ticket.untracked:
+            return
+
+        try:
+            async with get_redis().pipeline(transaction=True) as pipe:
+                pipe.zrem(self._queue_key, ticket.id)
+                pipe.srem(self._running_key, ticket.id)
+                pipe.hdel(self._users_key, ticket.id)
+                pipe.zrem(self._leases_key, ticket.id)
+                await pipe.execute()
+        except RedisError:
+            # The slot frees up once the lease expires
+            logging.exception("Could not release a Claude CLI run slot")
+            return
+        finally:
+            ticket.granted = False
+
+        for released in self._released:
+            if not released.done():
+                released.set_result(None)
+
+    async def _add(self, ticket: CLIAdmissionTicket) -> None:
+        client = get_redis()
+        seq = await client.incr(self._seq_key)
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hset(self._users_key, ticket.id, ticket.user_id)
+            pipe.zadd(self._leases_key, {ticket.id: time.time() + self.lease})
+            pipe.zadd(
+                self._queue_key,
+                {ticket.id: ticket.priority * _PRIORITY_WEIGHT + seq},
+            )
+            await pipe.execute()
+
+    async def _admit(self, ticket: CLIAdmissionTicket) -> int:
+        return await get_redis().eval(
+            _ADMIT_SCRIPT,
+            4,
+            self._queue_key,
+            self._users_key,
+            self._leases_key,
+            self._running_key,
+            time.time(),
+            self.max_concurrent,
+            self.max_per_user,
+            ticket.id,
+        )
+
+    async def _renew_lease(self, ticket: CLIAdmissionTicket) -> None:
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                await get_redis().zadd(
+                    self._leases_key,
+                    {ticket.id: time.time() + self.lease},
+                    xx=True,
+                )
+            except RedisError as e:
+                logging.warning(f"Could not renew a Claude CLI run lease: {e}")
+
+
+_scheduler: CLIScheduler | None = None
+
+
+def get_cli_scheduler() -> CLIScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = CLIScheduler(
+            scope=settings.CLAUDE_RUN_LIMIT_SCOPE or socket.gethostname(),
+            max_concurrent=settings.CLAUDE_MAX_CONCURRENT_RUNS,
+            max_per_user=settings.CLAUDE_MAX_RUNS_PER_USER,
+            lease=settings.CLAUDE_RUN_LEASE.total_seconds(),
+            poll_interval=settings.CLAUDE_RUN_QUEUE_POLL_INTERVAL.total_seconds(),
+        )
+    return _scheduler
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import os
+import uuid
+import weakref
+from collections import deque
+from typing import AsyncIterator
+
+import msgspec
+
+from app.models.messages.cli_event import CLIEvent, RawEvent, decode_cli_event
+
+# Unix-only import, pipe resizing is skipped on Windows
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Size of a single read from the CLI output; stream-json lines for tool
+# results are routinely tens of KB, so small reads only add wake-ups.
+READ_CHUNK_SIZE = 64 * 1024
+
+# Tool results (Gmail/Drive dumps) arrive as a single stream-json line, so the
+# default 64 KiB StreamReader limit is far too small.
+STREAM_LINE_LIMIT = 16 * 1024 * 1024
+
+# Kernel buffer requested for the CLI stdout pipe (Linux default is 64 KiB).
+PIPE_BUFFER_SIZE = 1024 * 1024
+F_SETPIPE_SZ = 1031
+
+# Stop reading from the fd once this many complete lines are waiting for the
+# consumer; the child then blocks on a full PTY instead of growing our buffer.
+MAX_PENDING_LINES = 256
+
+# One turn at a time per conversation: two turns in the same session, on a
+# warm worker or in one-shot processes, would fork its history.
+_conversation_locks: weakref.WeakValueDictionary[uuid.UUID, asyncio.Lock] = (
+    weakref.WeakValueDictionary()
+)
+
+
+def conversation_lock(conversation_id: uuid.UUID) -> asyncio.Lock:
+    """The lock a turn of the conversation holds while it runs."""
+    return _conversation_locks.setdefault(conversation_id, asyncio.Lock())
+
+
+def build_cli_args(session_id: str | None) -> list[str]:
+    """
+    Common Claude CLI arguments for a turn
+
+    Args:
+        session_id: CLI session to resume, or None to start a new session
+
+    Returns:
+        Argument list without the prompt or input-format flags
+    """
+    args = [
+        "claude",
+        "--output-format",
+        "stream-json",
+        "--verbose",
+        "--print",
+    ]
+    if session_id:
+        args[1:1] = ["--resume", session_id]
+    return args
+
+
+def enlarge_pipe_buffer(process: asyncio.subprocess.Process) -> None:
+    """Grow the kernel buffer of the process stdout pipe, where supported."""
+    if fcntl is None:
+        return
+
+    transport = process._transport.get_pipe_transport(1)  # type: ignore[attr-defined]
+    pipe = transport.get_extra_info("pipe") if transport is not None else None
+    if pipe is None:
+        return
+
+    try:
+        fcntl.fcntl(pipe.fileno(), F_SETPIPE_SZ, PIPE_BUFFER_SIZE)
+    except (OSError, ValueError) as e:
+        # Not Linux, above /proc/sys/fs/pipe-max-size, or already closed
+        logging.debug(f"Could not resize CLI stdout pipe: {e}")
+
+
+async def stop_process(process: asyncio.subprocess.Process) -> None:
+    """Terminate the process if it is still running, killing it after 5s."""
+    if process.returncode is not None:
+        return
+
+    try:
+        process.terminate()
+        await asyncio.wait_for(process.wait(), timeout=5.0)
+    except ProcessLookupError:
+        pass
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+
+
+def parse_stream_line(line_bytes: bytes) -> CLIEvent | None:
+    """
+    Decode one line of Claude CLI stream-json output into a typed event
+
+    The line is validated straight from bytes, without an intermediate dict.
+
+    Args:
+        line_bytes: Raw line without the trailing newline
+
+    Returns:
+        Typed event, a ``RawEvent`` for output that is not a valid event, or
+        None for blank lines
+    """
+    if not line_bytes.strip():
+        return None
+
+    try:
+        return decode_cli_event(line_bytes)
+    except msgspec.DecodeError:
+        return RawEvent(text=line_bytes.decode("utf-8", errors="replace").strip())
+
+
+class PtyLineReader:
+    """
+    Event-driven line reader for a PTY master (or any readable fd).
+
+    The fd is registered with ``loop.add_reader`` so the event loop wakes the
+    reader only when output is available. Reads go into one preallocated
+    chunk buffer and complete lines are cut out of the accumulated bytearray
+    once per read, so a long line arriving in many chunks is never rescanned
+    or recopied from the start.
+    """
+
+    def __init__(self, fd: int, chunk_size: int = READ_CHUNK_SIZE) -> None:
+        self._fd = fd
+        self._loop = asyncio.get_running_loop()
+        self._chunk = bytearray(chunk_size)
+        self._chunk_view = memoryview(self._chunk)
+        self._buffer = bytearray()
+        self._lines: deque[bytes] = deque()
+        self._waiter: asyncio.Future | None = None
+        self._eof = False
+        self._paused = False
+
+        os.set_blocking(fd, False)
+        self._loop.add_reader(fd, self._on_readable)
+
+    def _on_readable(self) -> None:
+        try:
+            size = os.readv(self._fd, [self._chunk])
+        except BlockingIOError:
+            return
+        except OSError:
+            # Linux reports EIO on the master once every slave fd is closed
+            size = 0
+
+        if size == 0:
+            self._finish()
+        else:
+            scan_from = len(self._buffer)
+            self._buffer += self._chunk_view[:size]
+            self._split_lines(scan_from)
+
+            if len(self._lines) >= MAX_PENDING_LINES:
+                self._loop.remove_reader(self._fd)
+                self._paused = True
+
+        self._wake_waiter()
+
+    def _split_lines(self, scan_from: int) -> None:
+        buffer = self._buffer
+        start = 0
+        newline = buffer.find(b"\n", scan_from)
+        while newline != -1:
+            self._lines.append(bytes(buffer[start:newline]))
+            start = newline + 1
+            newline = buffer.find(b"\n", start)
+
+        if start:
+            del buffer[:start]
+
+    def _finish(self) -> None:
+        if self._eof:
+            return
+
+        self._eof = True
+        self._loop.remove_reader(self._fd)
+        if self._buffer:
+            self._lines.append(bytes(self._buffer))
+            self._buffer.clear()
+
+    def _wake_waiter(self) -> None:
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def readline(self) -> bytes | None:
+        """Return the next line without its newline, or None at EOF."""
+        while not self._lines:
+            if self._eof:
+                return None
+
+            self._waiter = self._loop.create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+
+        line = self._lines.popleft()
+        if self._paused and not self._eof and len(self._lines) < MAX_PENDING_LINES // 2:
+            self._paused = False
+            self._loop.add_reader(self._fd, self._on_readable)
+        return line
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while True:
+            line = await self.readline()
+            if line is None:
+                return
+            yield line
+
+    def close(self) -> None:
+        if not self._eof and not self._paused:
+            self._loop.remove_reader(self._fd)
+        self._eof = True
+        self._wake_waiter()
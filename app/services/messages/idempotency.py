@@ -0,0 +1,85 @@
+import hashlib
+
+import msgspec
+import redis.asyncio as redis
+
+from app.api.schemas.messages.requests import SendMessageRequest
+from app.config import settings
+from app.db.redis import get_redis
+from app.models.messages.idempotency import IDEMPOTENCY_RUNNING, IdempotencyRecord
+
+_encoder = msgspec.json.Encoder()
+_decoder = msgspec.json.Decoder(IdempotencyRecord)
+
+
+def hash_request(request: SendMessageRequest) -> str:
+    """Hash of what a send-message request asks for, to compare retries by."""
+    conversation_id = request.conversation_id and str(request.conversation_id)
+    fields = _encoder.encode([request.prompt, conversation_id])
+    return hashlib.sha256(fields).hexdigest()
+
+
+class IdempotencyStore:
+    """Idempotency keys of send-message requests, shared by all workers."""
+
+    def __init__(self, client: redis.Redis, ttl: int) -> None:
+        self._redis = client
+        self._ttl = ttl
+
+    @staticmethod
+    def _key(user_id: int, idempotency_key: str) -> str:
+        return f"pam:idempotency:{user_id}:{idempotency_key}"
+
+    async def claim(
+        self,
+        user_id: int,
+        idempotency_key: str,
+        request_hash: str,
+    ) -> IdempotencyRecord | None:
+        """
+        Claim the key for a new turn of the request hashed to ``request_hash``
+
+        Returns:
+            None when the key was free and now belongs to the caller,
+            otherwise the record of the turn that already owns it
+        """
+        key = self._key(user_id, idempotency_key)
+        running = _encoder.encode(
+            IdempotencyRecord(status=IDEMPOTENCY_RUNNING, request_hash=request_hash)
+        )
+        while True:
+            if await self._redis.set(key, running, nx=True, ex=self._ttl):
+                return None
+
+            value = await self._redis.get(key)
+            # Expired or released between the two calls: try to claim again
+            if value is not None:
+                return _decoder.decode(value)
+
+    async def save(
+        self,
+        user_id: int,
+        idempotency_key: str,
+        record: IdempotencyRecord,
+    ) -> None:
+        await self._redis.set(
+            self._key(user_id, idempotency_key),
+            _encoder.encode(record),
+            ex=self._ttl,
+        )
+
+    async def release(self, user_id: int, idempotency_key: str) -> None:
+        await self._redis.delete(self._key(user_id, idempotency_key))
+
+
+_store: IdempotencyStore | None = None
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    global _store
+    if _store is None:
+        _store = IdempotencyStore(
+            get_redis(),
+            ttl=int(settings.IDEMPOTENCY_KEY_TTL.total_seconds()),
+        )
+    return _store
@@ -0,0 +1,50 @@
+import json
+import zlib
+from typing import Any
+
+from app.config import settings
+
+
+def offload_large_block(block: dict[str, Any]) -> tuple[dict[str, Any], bytes | None]:
+    """
+    Split a large ``tool_result`` block into a preview and its full JSON.
+
+    Blocks of other types, or no larger than ``MESSAGE_BLOCK_OFFLOAD_BYTES``
+    as JSON, are returned as they are with no JSON. The preview is the
+    block with its ``content`` cut to ``MESSAGE_BLOCK_PREVIEW_CHARS`` of
+    text, marked ``truncated`` and carrying the full ``size``.
+    """
+    if block.get("type") != "tool_result":
+        return block, None
+
+    data = json.dumps(block).encode()
+    if len(data) <= settings.MESSAGE_BLOCK_OFFLOAD_BYTES:
+        return block, None
+
+    return preview_block(block, len(data)), data
+
+
+def preview_block(block: dict[str, Any], size: int) -> dict[str, Any]:
+    content = block.get("content")
+    if isinstance(content, list):
+        # Text parts of the result; images and other parts are dropped
+        content = "\n".join(
+            part.get("text", "") for part in content if isinstance(part, dict)
+        )
+    elif not isinstance(content, str):
+        content = json.dumps(content)
+
+    return {
+        **block,
+        "content": content[: settings.MESSAGE_BLOCK_PREVIEW_CHARS],
+        "truncated": True,
+        "size": size,
+    }
+
+
+def compress_block(data: bytes) -> bytes:
+    return zlib.compress(data)
+
+
+def decompress_block(data: bytes) -> dict[str, Any]:
+    return json.loads(zlib.decompress(data))
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import uuid
+from typing import Any
+
+from app.db.database import unit_of_work
+from app.repositories.messages.conversation import ConversationRepository
+from app.repositories.messages.messages import MessageRepository
+from app.services.messages.message_blobs import compress_block
+from app.services.messages.turn_metrics import TurnTimings
+
+
+class MessageWriteBuffer:
+    """
+    Write-behind buffer for the messages streamed during one turn.
+
+    Rows are collected as blocks arrive and written with a single multi-row
+    INSERT once ``max_rows`` are waiting or ``max_delay`` seconds after the
+    first one, together with one ``updated_date`` update of the
+    conversation. The full JSON of offloaded blocks is compressed off the
+    event loop and stored in ``message_blobs`` in the same transaction.
+    Writes run in background tasks, one at a time and in order, so frames
+    keep streaming while they run. Rows of a failed write are put back and
+    retried by the next one. ``close`` must be awaited when the turn ends
+    to write whatever is left; it raises if that last write fails.
+    """
+
+    def __init__(
+        self,
+        message_repository: MessageRepository,
+        conversation_repository: ConversationRepository,
+        conversation_id: uuid.UUID,
+        max_rows: int,
+        max_delay: float,
+        timings: TurnTimings,
+    ) -> None:
+        self._message_repository = message_repository
+        self._conversation_repository = conversation_repository
+        self._conversation_id = conversation_id
+        self._max_rows = max_rows
+        self._max_delay = max_delay
+        self._timings = timings
+        self._rows: list[dict[str, Any]] = []
+        self._blobs: dict[uuid.UUID, bytes] = {}
+        self._write_lock = asyncio.Lock()
+        self._flush_timer: asyncio.TimerHandle | None = None
+        self._flush_tasks: set[asyncio.Task] = set()
+
+    def add(self, row: dict[str, Any], blob: bytes | None = None) -> None:
+        """
+        Queue a message row; ``row`` must carry its own ``id``.
+
+        ``blob`` is the full JSON of a block the row only holds a preview of.
+        """
+        self._rows.append(row)
+        if blob is not None:
+            self._blobs[row["id"]] = blob
+        if len(self._rows) >= self._max_rows:
+            self._start_flush()
+        elif self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(
+                self._max_delay,
+                self._start_flush,
+            )
+
+    def _start_flush(self) -> None:
+        task = asyncio.create_task(self._background_flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _background_flush(self) -> None:
+        try:
+            await self.flush()
+        except Exception:
+            # Logged by _write, and the rows are retried by the next flush
+            pass
+
+    async def flush(self) -> None:
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+        async with self._write_lock:
+            rows, self._rows = self._rows, []
+            blobs, self._blobs = self._blobs, {}
+            if not rows:
+                return
+
+            try:
+                with self._timings.measure_persist(len(rows)):
+                    await self._write(rows, blobs)
+            except Exception:
+                self._rows[:0] = rows
+                self._blobs = {**blobs, **self._blobs}
+                raise
+
+    async def _write(
+        self,
+        rows: list[dict[str, Any]],
+        blobs: dict[uuid.UUID, bytes],
+    ) -> None:
+        try:
+            blob_rows = [
+                {
+                    "message_id": message_id,
+                    "data": await asyncio.to_thread(compress_block, data),
+                    "size": len(data),
+                }
+                for message_id, data in blobs.items()
+            ]
+            async with unit_of_work():
+                await self._message_repository.bulk_create(rows)
+                await self._message_repository.insert_message_blobs(blob_rows)
+                await self._conversation_repository.update(
+                    {"updated_date": max(row["timestamp"] for row in rows)},
+                    id=self._conversation_id,
+                )
+        except Exception:
+            logging.exception(
+                f"Failed to store {len(rows)} messages of {self._conversation_id}"
+            )
+            raise
+
+    async def close(self) -> None:
+        """
+        Wait for running writes, then write the remaining rows, including
+        those of writes that failed.
+        """
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks)
+        await self.flush()
+
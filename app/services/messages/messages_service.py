@@ -1,25 +1,87 @@
+import asyncio
 import datetime
-import json
 import logging
+import time
 import uuid
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable
 
 from fastapi.responses import StreamingResponse
+from starlette.types import Receive
 
 from app.api.schemas.messages.requests import (
     PatchConversationRequest,
     SendMessageRequest,
 )
-from app.api.schemas.messages.responses import GetMessagesResponseSchema, TurnSchema
-from app.core.exceptions.messages.conversations import ConversationNotFoundError
+from app.api.schemas.messages.responses import (
+    GetConversationsResponseSchema,
+    GetMessagesResponseSchema,
+    MessageContentResponseSchema,
+    TurnSchema,
+)
+from app.core.enums import CLIPriorityEnum
+from app.core.ids import uuid7
+from app.config import settings
+from app.core.exceptions.messages.conversations import (
+    ConversationNotFoundError,
+    NoActiveStreamError,
+    NoActiveTurnError,
+)
+from app.core.exceptions.messages.idempotency import (
+    IdempotencyKeyReusedError,
+    IdempotentRequestInProgressError,
+)
+from app.core.exceptions.messages.messages import MessageNotFoundError
+from app.db.database import commit_unit_of_work, unit_of_work
 from app.entities.auth.user import User
 from app.entities.messages.conversation import Conversation
 from app.entities.messages.message import Message
 from app.models.auth.user import ReadUserModel
-from app.models.messages.conversation import ConversationDto, CreateConversation
-from app.models.messages.message import CreateMessage, MessageDto
+from app.models.messages.cli_event import (
+    AssistantEvent,
+    CLIEvent,
+    QueuedEvent,
+    RawEvent,
+    ResultEvent,
+    UserEvent,
+)
+from app.models.messages.conversation import (
+    ConversationCursor,
+    ConversationDto,
+    CreateConversation,
+)
+from app.models.messages.idempotency import (
+    IDEMPOTENCY_COMPLETED,
+    IDEMPOTENCY_RUNNING,
+    IdempotencyRecord,
+)
+from app.models.messages.message import CreateMessage, MessageCursor, MessageDto
+from app.models.messages.stream_event import StreamEventDto
 from app.repositories.messages.conversation import ConversationRepository
 from app.repositories.messages.messages import MessageRepository
+from app.services.messages.active_turns import (
+    CANCELLED_BY_USER,
+    CLIENT_DISCONNECTED,
+    ActiveTurn,
+    cancel_turns,
+    iterate_until,
+    track_turn,
+    until_disconnected,
+)
 from app.services.messages.claude_cli import AsyncClaudeCLI
+from app.services.messages.cli_scheduler import get_cli_scheduler
+from app.services.messages.cli_stream import conversation_lock
+from app.services.messages.message_blobs import decompress_block, offload_large_block
+from app.services.messages.message_buffer import MessageWriteBuffer
+from app.services.messages.idempotency import get_idempotency_store, hash_request
+from app.services.messages.stream_hub import TurnStream, get_stream_hub
+from app.services.messages.turn_broadcast import TurnBroadcast
+from app.services.messages.turn_metrics import (
+    FIRST_ASSISTANT_BLOCK,
+    QUEUE_WAIT,
+    RESULT,
+    TurnTimings,
+)
 
 
 class MessagesService:
@@ -32,49 +94,36 @@ class MessagesService:
         self._conversation_repository = conversation_repository
         self._message_repository = message_repository
 
-    def get_messages(
+    async def get_messages(
         self,
         user_id: int,
         conversation_id: uuid.UUID,
         limit: int,
-        cursor: datetime.datetime | None,
+        cursor: str | None,
+        compact: bool = False,
     ) -> GetMessagesResponseSchema:
-        conversation = self._conversation_repository.get_conversation_by_id(
+        conversation = await self._conversation_repository.get_conversation_by_id(
             conversation_id,
         )
 
         if conversation is None or conversation.user_id != user_id:
             raise ConversationNotFoundError()
 
-        root_user_messages = MessageDto.validate_list_model(
-            self._message_repository.get_root_user_messages(
-                user_id,
-                conversation_id,
-                limit,
-                cursor,
-            )
-        )
-
-        root_message_ids = [m.id for m in root_user_messages]
-
-        children_messages = self._message_repository.get_messages_for_parent_message_id(
-            root_message_ids,
+        before = MessageCursor.parse(cursor) if cursor else None
+        turns, has_older = await self._message_repository.get_turns(
+            user_id,
+            conversation_id,
+            limit,
+            (before.timestamp, before.id) if before else None,
         )
 
-        grouped_messages = {rid: [] for rid in root_message_ids}
-        for msg in children_messages:
-            grouped_messages[msg.parent_message_id].append(msg)
-
-        if root_user_messages:
-            has_older = self._message_repository.get_has_older_messages(
-                user_id,
-                conversation_id,
-                root_user_messages[-1].timestamp,
-            )
-        else:
-            has_older = False
-
-        next_cursor = root_user_messages[-1].timestamp if has_older else None
+        next_cursor = None
+        if has_older:
+            last_message, _ = turns[-1]
+            next_cursor = MessageCursor(
+                timestamp=last_message.timestamp,
+                id=last_message.id,
+            ).encode()
 
         return GetMessagesResponseSchema(
             conversation_id=conversation_id,
@@ -82,17 +131,38 @@ class MessagesService:
             turns=[
                 TurnSchema(
                     turn_id=str(root_msg.id),
-                    user_message=MessageDto.map(root_msg),  # type: ignore
+                    user_message=MessageDto.map(root_msg, compact),  # type: ignore
                     assistant_messages=[  # type: ignore
-                        MessageDto.map(m) for m in grouped_messages[root_msg.id]
+                        MessageDto.map(m, compact) for m in replies
                     ],
                 )
-                for root_msg in root_user_messages
+                for root_msg, replies in turns
             ],
             next_cursor=next_cursor,
         )
 
-    def get_or_create_conversation(
+    async def get_message_content(
+        self,
+        user_id: int,
+        message_id: uuid.UUID,
+    ) -> MessageContentResponseSchema:
+        """The full content block of a message, also when history shows a preview."""
+        found = await self._message_repository.get_message_with_blob(
+            message_id,
+            user_id,
+        )
+        if found is None:
+            raise MessageNotFoundError()
+
+        message, blob = found
+        if blob is None:
+            content = message.content_new
+        else:
+            content = await asyncio.to_thread(decompress_block, blob.data)
+
+        return MessageContentResponseSchema(message_id=message.id, content=content)
+
+    async def get_or_create_conversation(
         self,
         user: ReadUserModel,
         conversation_id: uuid.UUID | None,
@@ -102,15 +172,15 @@ class MessagesService:
                 user_id=user.id,
                 title="New Conversation",
                 type="chat",
-                created_date=datetime.datetime.now(),
+                created_date=datetime.datetime.now(datetime.timezone.utc),
             )
 
             return ConversationDto.model_validate(
-                self._conversation_repository.create(**conversation.model_dump())
+                await self._conversation_repository.create(**conversation.model_dump())
             )
 
         conversation = ConversationDto.model_validate(
-            self._conversation_repository.get_conversation_by_id(
+            await self._conversation_repository.get_conversation_by_id(
                 conversation_id,
             )
         )
@@ -120,50 +190,342 @@ class MessagesService:
 
         return conversation
 
+    async def _create_user_message(
+        self,
+        user: ReadUserModel,
+        conversation_id: uuid.UUID | None,
+        user_prompt: str,
+    ) -> tuple[ConversationDto, MessageDto]:
+        async with unit_of_work():
+            conversation = await self.get_or_create_conversation(user, conversation_id)
+
+            user_message = CreateMessage(
+                user_id=user.id,
+                conversation_id=conversation.id,
+                role="user",
+                content_new={"type": "text", "text": user_prompt},
+                timestamp=datetime.datetime.now(datetime.timezone.utc),
+            )
+            conversation.updated_date = user_message.timestamp
+            await self._conversation_repository.update(
+                conversation.model_dump(),
+                id=conversation.id,
+            )
+            user_message = MessageDto.model_validate(
+                await self._message_repository.create(**user_message.model_dump())
+            )
+        return conversation, user_message
+
+    async def _start_turn(
+        self,
+        user: ReadUserModel,
+        user_prompt: str,
+        user_message: MessageDto,
+        conversation: ConversationDto,
+        orphan_grace: datetime.timedelta,
+        on_finish: Callable[[], Awaitable[None]] | None = None,
+    ) -> TurnStream:
+        """Run the turn in the background, publishing its frames to the hub."""
+        # The turn stores its messages from its own task, under the user message
+        await commit_unit_of_work()
+
+        hub = get_stream_hub()
+        stream = await hub.open(conversation.id)
+        turn = ActiveTurn(conversation.id, user.id)
+        TurnBroadcast(
+            hub,
+            stream,
+            turn,
+            self.stream_message(
+                user,
+                user_prompt,
+                user_message,
+                conversation,
+                turn=turn,
+            ),
+            orphan_grace=orphan_grace.total_seconds(),
+            on_finish=on_finish,
+        )
+        return stream
+
     async def send_streaming_response(
         self,
         user: ReadUserModel,
         request: SendMessageRequest,
         headers: dict[str, str],
+        receive: Receive,
+        idempotency_key: str | None = None,
     ):
-        conversation = self.get_or_create_conversation(
+        if idempotency_key is not None:
+            return await self._send_idempotent_streaming_response(
+                user,
+                request,
+                headers,
+                receive,
+                idempotency_key,
+            )
+
+        user_prompt = request.prompt.strip()
+        conversation, user_message = await self._create_user_message(
             user,
             request.conversation_id,
+            user_prompt,
         )
 
-        user_prompt = request.prompt.strip()
-
-        user_message = CreateMessage(
-            user_id=user.id,
-            conversation_id=conversation.id,
-            role="user",
-            content=user_prompt,
-            content_new={"type": "text", "text": user_prompt},
-            timestamp=datetime.datetime.now(datetime.timezone.utc),
+        stream = await self._start_turn(
+            user,
+            user_prompt,
+            user_message,
+            conversation,
+            orphan_grace=settings.STREAM_RECONNECT_GRACE,
         )
-        conversation.updated_date = user_message.timestamp
-        self._conversation_repository.update(
-            conversation.model_dump(),
-            id=request.conversation_id,
+        return StreamingResponse(
+            content=until_disconnected(stream.subscribe(), receive),
+            media_type="text/event-stream",
+            headers=headers,
         )
-        user_message = MessageDto.model_validate(
-            self._message_repository.create(**user_message.model_dump())
+
+    async def _send_idempotent_streaming_response(
+        self,
+        user: ReadUserModel,
+        request: SendMessageRequest,
+        headers: dict[str, str],
+        receive: Receive,
+        idempotency_key: str,
+    ):
+        """
+        Start the turn once per Idempotency-Key.
+
+        A repeated key attaches to the turn the first request started, from
+        its first frame, on whichever worker runs it, or replays the stored
+        turn once it is no longer available from the stream hub. A key
+        reused for a different prompt or conversation is rejected.
+        """
+        store = get_idempotency_store()
+
+        request_hash = hash_request(request)
+
+        record = await store.claim(user.id, idempotency_key, request_hash)
+        if record is not None:
+            if record.request_hash != request_hash:
+                raise IdempotencyKeyReusedError()
+
+            frames = None
+            if record.turn_id is not None:
+                frames = await get_stream_hub().subscribe(
+                    uuid.UUID(record.conversation_id),
+                    turn_id=record.turn_id,
+                )
+
+            if frames is not None:
+                logging.info(f"Attaching retried request to turn {record.turn_id}")
+            elif record.status == IDEMPOTENCY_COMPLETED:
+                logging.info(f"Replaying completed turn {record.turn_id}")
+                frames = self._replay_turn(user, record)
+            else:
+                raise IdempotentRequestInProgressError()
+
+            return StreamingResponse(
+                content=until_disconnected(frames, receive),
+                media_type="text/event-stream",
+                headers=headers,
+            )
+
+        user_prompt = request.prompt.strip()
+        try:
+            conversation, user_message = await self._create_user_message(
+                user,
+                request.conversation_id,
+                user_prompt,
+            )
+        except Exception:
+            await store.release(user.id, idempotency_key)
+            raise
+
+        record = IdempotencyRecord(
+            status=IDEMPOTENCY_RUNNING,
+            request_hash=request_hash,
+            conversation_id=str(conversation.id),
+            user_message_id=str(user_message.id),
         )
 
-        return StreamingResponse(
-            content=self.stream_message(
+        async def on_finish() -> None:
+            record.status = IDEMPOTENCY_COMPLETED
+            await store.save(user.id, idempotency_key, record)
+
+        try:
+            stream = await self._start_turn(
                 user,
                 user_prompt,
                 user_message,
                 conversation,
-            ),
+                orphan_grace=settings.IDEMPOTENT_TURN_RETRY_GRACE,
+                on_finish=on_finish,
+            )
+        except Exception:
+            await store.release(user.id, idempotency_key)
+            raise
+        record.turn_id = stream.turn_id
+        await store.save(user.id, idempotency_key, record)
+
+        return StreamingResponse(
+            content=until_disconnected(stream.subscribe(), receive),
             media_type="text/event-stream",
             headers=headers,
         )
 
+    async def subscribe_to_turn(
+        self,
+        user: ReadUserModel,
+        conversation_id: uuid.UUID,
+        last_event_id: str | None,
+        headers: dict[str, str],
+        receive: Receive,
+    ) -> StreamingResponse:
+        conversation = await self._conversation_repository.get_conversation_by_id(
+            conversation_id,
+        )
+
+        if conversation is None or conversation.user_id != user.id:
+            raise ConversationNotFoundError()
+
+        frames = await get_stream_hub().subscribe(conversation_id, last_event_id)
+        if frames is None:
+            raise NoActiveStreamError()
+
+        return StreamingResponse(
+            content=until_disconnected(frames, receive),
+            media_type="text/event-stream",
+            headers=headers,
+        )
+
+    async def _replay_turn(
+        self,
+        user: ReadUserModel,
+        record: IdempotencyRecord,
+    ) -> AsyncIterator[bytes]:
+        """SSE frames of a completed turn, rebuilt from the stored messages."""
+        yield StreamEventDto(
+            user_id=user.id,
+            conversation_id=record.conversation_id,
+            type="resume_conversation",
+            timestamp=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        ).to_sse()
+
+        messages = MessageDto.validate_list_model(
+            await self._message_repository.get_messages_for_parent_message_id(
+                [uuid.UUID(record.user_message_id)],
+            )
+        )
+        for message in messages:
+            yield StreamEventDto(
+                user_id=message.user_id,
+                conversation_id=record.conversation_id,
+                type="cancelled" if message.role == "result" else None,
+                message_id=str(message.id),
+                role=message.role,
+                content=message.content_new,
+                timestamp=message.timestamp.isoformat(),
+            ).to_sse()
+
+        if not messages or messages[-1].role != "result":
+            yield StreamEventDto(
+                user_id=user.id,
+                conversation_id=record.conversation_id,
+                message_id=self.generate_message_id(),
+                role="result",
+                timestamp=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            ).to_sse()
+
     @staticmethod
     def generate_message_id() -> str:
-        return str(uuid.uuid4())
+        return str(uuid7())
+
+    async def _remember_session_id(
+        self,
+        conversation: ConversationDto,
+        session_id: str | None,
+    ) -> None:
+        """Store the CLI session so the next turn resumes this conversation."""
+        if not session_id or session_id == conversation.claude_session_id:
+            return
+
+        conversation.claude_session_id = session_id
+        await self._conversation_repository.update(
+            {"claude_session_id": session_id},
+            id=conversation.id,
+        )
+
+    async def _scheduled_prompt_stream(
+        self,
+        user: User,
+        user_prompt: str,
+        conversation: Conversation,
+        priority: CLIPriorityEnum,
+        timings: TurnTimings,
+    ) -> AsyncIterator[CLIEvent]:
+        """
+        Run the prompt once the CLI scheduler admits it.
+
+        The conversation's lock is taken first, so a turn waiting for the
+        previous one of its conversation does not hold a run slot. While
+        waiting for a slot, yields ``QueuedEvent``s carrying the queue
+        position, then the CLI events themselves. The slot is released when
+        the stream ends, fails or is closed.
+        """
+        scheduler = get_cli_scheduler()
+        async with conversation_lock(conversation.id):
+            ticket = await scheduler.enqueue(user.id, priority)
+            try:
+                queued = time.perf_counter()
+                async for position in scheduler.wait(ticket):
+                    yield QueuedEvent(position=position)
+                timings.observe(QUEUE_WAIT, time.perf_counter() - queued)
+
+                async with aclosing(
+                    self._claude_cli.send_prompt_stream(
+                        user_prompt,
+                        conversation.id,
+                        conversation.claude_session_id,
+                        timings,
+                    )
+                ) as cli_stream:
+                    async for response_data in cli_stream:
+                        yield response_data
+            finally:
+                await scheduler.release(ticket)
+
+    @staticmethod
+    def _buffer_message(
+        buffer: MessageWriteBuffer,
+        message: CreateMessage,
+        blob: bytes | None = None,
+    ) -> dict[str, Any]:
+        """Queue the message for storage under an id generated up front."""
+        row = {"id": uuid7(), **message.model_dump()}
+        buffer.add(row, blob)
+        return row
+
+    def _buffer_cancelled_result(
+        self,
+        buffer: MessageWriteBuffer,
+        user: User,
+        user_message: Message,
+        conversation: Conversation,
+        reason: str | None,
+    ) -> dict[str, Any]:
+        """Queue the result of a turn stopped before the CLI finished it."""
+        return self._buffer_message(
+            buffer,
+            CreateMessage(
+                user_id=user.id,
+                parent_message_id=user_message.id,
+                conversation_id=conversation.id,
+                role="result",
+                content_new={"type": "result", "subtype": "cancelled", "reason": reason},
+                timestamp=datetime.datetime.now(datetime.timezone.utc),
+            ),
+        )
 
     async def stream_message(
         self,
@@ -171,116 +533,226 @@ class MessagesService:
         user_prompt: str,
         user_message: Message,
         conversation: Conversation,
+        priority: CLIPriorityEnum = CLIPriorityEnum.INTERACTIVE,
+        turn: ActiveTurn | None = None,
     ):
-        response = {
-            "user_id": user.id,
-            "conversation_id": str(conversation.id),
-            "type": "resume_conversation",
-            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
-        }
-        yield f"data: {json.dumps(response)}\n\n"
-
-        async for response_data in self._claude_cli.send_prompt_stream(user_prompt):
-            if response_data.get("type") == "raw":
-                logging.info(f"Raw output: {response_data.get('text')}")
-                continue
-            logging.info(f"Response data: {response_data}")
-
-            message_content = response_data.get("message", {}).get("content", {})
-
-            if response_data.get("type") == "assistant":
-                for content in message_content:
-                    if content.get("type") == "tool_use":
-                        role = "tool_use"
-                    else:
-                        role = "assistant"
-
-                    response_message = CreateMessage(
+        conversation_id = str(conversation.id)
+        turn = turn or ActiveTurn(conversation.id, user.id)
+        timings = TurnTimings()
+        buffer = MessageWriteBuffer(
+            self._message_repository,
+            self._conversation_repository,
+            conversation.id,
+            max_rows=settings.MESSAGE_FLUSH_MAX_BLOCKS,
+            max_delay=settings.MESSAGE_FLUSH_INTERVAL.total_seconds(),
+            timings=timings,
+        )
+        yield StreamEventDto(
+            user_id=user.id,
+            conversation_id=conversation_id,
+            type="resume_conversation",
+            timestamp=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        ).to_sse()
+
+        with track_turn(turn):
+            try:
+                async for frame in self._stream_turn(
+                    user,
+                    user_prompt,
+                    user_message,
+                    conversation,
+                    priority,
+                    turn,
+                    timings,
+                    buffer,
+                ):
+                    yield frame
+            except (asyncio.CancelledError, GeneratorExit):
+                # The turn was torn down before the result arrived
+                turn.cancel(CLIENT_DISCONNECTED)
+                self._buffer_cancelled_result(
+                    buffer, user, user_message, conversation, turn.cancel_reason
+                )
+                raise
+            finally:
+                # Blocks received so far are stored whatever ended the turn
+                await buffer.close()
+
+        if turn.is_cancelled:
+            logging.info(f"Turn cancelled: {turn.cancel_reason}")
+            result_row = self._buffer_cancelled_result(
+                buffer, user, user_message, conversation, turn.cancel_reason
+            )
+            await buffer.close()
+            yield StreamEventDto(
+                user_id=user.id,
+                conversation_id=conversation_id,
+                type="cancelled",
+                message_id=str(result_row["id"]),
+                role="result",
+                content=result_row["content_new"],
+                timings=timings.summary(),
+                timestamp=result_row["timestamp"].isoformat(),
+            ).to_sse()
+
+    async def _stream_turn(
+        self,
+        user: User,
+        user_prompt: str,
+        user_message: Message,
+        conversation: Conversation,
+        priority: CLIPriorityEnum,
+        turn: ActiveTurn,
+        timings: TurnTimings,
+        buffer: MessageWriteBuffer,
+    ) -> AsyncIterator[bytes]:
+        """SSE frames of the CLI run, until its result or the turn is cancelled."""
+        conversation_id = str(conversation.id)
+        events = iterate_until(
+            self._scheduled_prompt_stream(
+                user,
+                user_prompt,
+                conversation,
+                priority,
+                timings,
+            ),
+            turn.cancelled,
+        )
+        async with aclosing(events):
+            async for response_data in events:
+                if isinstance(response_data, QueuedEvent):
+                    yield StreamEventDto(
                         user_id=user.id,
-                        parent_message_id=user_message.id,
-                        conversation_id=conversation.id,
-                        role=role,
-                        content=content.get("text", "").strip(),
-                        content_new=content,
-                        timestamp=datetime.datetime.now(datetime.timezone.utc),
-                    )
-                    conversation.updated_date = response_message.timestamp
-                    self._conversation_repository.update(
-                        conversation.model_dump(),
-                        id=conversation.id,
-                    )
-                    response_message = MessageDto.model_validate(
-                        self._message_repository.create(**response_message.model_dump())
-                    )
-
-                    response = {
-                        "user_id": response_message.user_id,
-                        "conversation_id": str(conversation.id),
-                        "message_id": str(response_message.id),
-                        "role": response_message.role,
-                        "content": response_message.content_new,
-                        "timestamp": response_message.timestamp.isoformat(),
-                    }
-                    yield f"data: {json.dumps(response)}\n\n"
-            elif response_data.get("type") == "user":
-                for content in message_content:
-                    if content.get("type") == "tool_result":
-                        role = "tool_result"
+                        conversation_id=conversation_id,
+                        type="queued",
+                        position=response_data.position,
+                        timestamp=datetime.datetime.now(
+                            datetime.timezone.utc
+                        ).isoformat(),
+                    ).to_sse()
+                    continue
+
+                if isinstance(response_data, RawEvent):
+                    logging.info(f"Raw output: {response_data.text}")
+                    continue
+                logging.info(f"Response data: {response_data}")
+
+                await self._remember_session_id(conversation, response_data.session_id)
+
+                if isinstance(response_data, (AssistantEvent, UserEvent)):
+                    if not isinstance(response_data.message.content, list):
+                        continue
+
+                    # tool_use blocks come from the assistant, tool_result blocks
+                    # from the CLI-side "user"; everything else is assistant text.
+                    if isinstance(response_data, AssistantEvent):
+                        tool_role = "tool_use"
                     else:
-                        role = "assistant"
-
-                    response_message = CreateMessage(
+                        tool_role = "tool_result"
+
+                    for content in response_data.message.content:
+                        role = (
+                            tool_role
+                            if content.get("type") == tool_role
+                            else "assistant"
+                        )
+
+                        if isinstance(response_data, AssistantEvent):
+                            timings.mark(FIRST_ASSISTANT_BLOCK)
+                        if role == "tool_use":
+                            timings.tool_started(content.get("id"), content.get("name"))
+                        elif role == "tool_result":
+                            timings.tool_finished(content.get("tool_use_id"))
+
+                        # History keeps a preview of large blocks; the stream
+                        # still carries them in full
+                        stored_content, blob = offload_large_block(content)
+                        row = self._buffer_message(
+                            buffer,
+                            CreateMessage(
+                                user_id=user.id,
+                                parent_message_id=user_message.id,
+                                conversation_id=conversation.id,
+                                role=role,
+                                content_new=stored_content,
+                                timestamp=datetime.datetime.now(datetime.timezone.utc),
+                            ),
+                            blob,
+                        )
+                        conversation.updated_date = row["timestamp"]
+
+                        yield StreamEventDto(
+                            user_id=user.id,
+                            conversation_id=conversation_id,
+                            message_id=str(row["id"]),
+                            role=role,
+                            content=content,
+                            timestamp=row["timestamp"].isoformat(),
+                        ).to_sse()
+                elif isinstance(response_data, ResultEvent):
+                    # Everything is stored before the client is told the turn ended
+                    await buffer.close()
+                    timings.mark(RESULT)
+                    logging.info(f"Finished, timings: {timings.summary()}")
+                    yield StreamEventDto(
                         user_id=user.id,
-                        parent_message_id=user_message.id,
-                        conversation_id=conversation.id,
-                        role=role,
-                        content=content.get("text", "").strip(),
-                        content_new=content,
-                        timestamp=datetime.datetime.now(datetime.timezone.utc),
-                    )
-                    conversation.updated_date = response_message.timestamp
-                    self._conversation_repository.update(
-                        conversation.model_dump(),
-                        id=conversation.id,
-                    )
-                    response_message = MessageDto.model_validate(
-                        self._message_repository.create(**response_message.model_dump())
-                    )
+                        conversation_id=conversation_id,
+                        message_id=self.generate_message_id(),
+                        role="result",
+                        timings=timings.summary(),
+                        timestamp=datetime.datetime.now(
+                            datetime.timezone.utc
+                        ).isoformat(),
+                    ).to_sse()
+                    return
+
+    async def cancel_turn(
+        self,
+        user: ReadUserModel,
+        conversation_id: uuid.UUID,
+    ) -> None:
+        conversation = await self._conversation_repository.get_conversation_by_id(
+            conversation_id,
+        )
 
-                    response = {
-                        "user_id": response_message.user_id,
-                        "conversation_id": str(conversation.id),
-                        "message_id": str(response_message.id),
-                        "role": response_message.role,
-                        "content": response_message.content_new,
-                        "timestamp": response_message.timestamp.isoformat(),
-                    }
-                    yield f"data: {json.dumps(response)}\n\n"
-            elif response_data.get("type") == "result":
-                logging.info("Finished.")
-                response = {
-                    "user_id": user.id,
-                    "conversation_id": str(conversation.id),
-                    "message_id": self.generate_message_id(),
-                    "role": "result",
-                    "timestamp": datetime.datetime.now(
-                        datetime.timezone.utc
-                    ).isoformat(),
-                }
-
-                yield f"data: {json.dumps(response)}\n\n"
-                return
+        if conversation is None or conversation.user_id != user.id:
+            raise ConversationNotFoundError()
+
+        if cancel_turns(conversation_id, CANCELLED_BY_USER):
+            return
+        # Running on another worker
+        if not await get_stream_hub().cancel(conversation_id, CANCELLED_BY_USER):
+            raise NoActiveTurnError()
 
     async def get_user_conversations(
         self,
         user: ReadUserModel,
+        limit: int | None,
+        cursor: str | None = None,
         conversation_type: str | None = None,
-    ) -> list[ConversationDto]:
-        conversations = self._conversation_repository.get_conversations_by_user_id(
+    ) -> GetConversationsResponseSchema:
+        after = ConversationCursor.decode(cursor) if cursor else None
+        rows, has_more = await self._conversation_repository.get_conversations_by_user_id(
             user.id,
+            limit,
             conversation_type,
+            (after.is_pinned, after.updated_date, after.id) if after else None,
+        )
+        conversations = ConversationDto.validate_list_model(rows)
+
+        next_cursor = None
+        if has_more:
+            last = conversations[-1]
+            next_cursor = ConversationCursor(
+                is_pinned=last.is_pinned,
+                updated_date=last.updated_date,
+                id=last.id,
+            ).encode()
+
+        return GetConversationsResponseSchema(
+            conversations=conversations,
+            next_cursor=next_cursor,
         )
-        return [ConversationDto.map(c) for c in conversations]
 
     async def delete_conversation(
         self,
@@ -288,7 +760,7 @@ class MessagesService:
         conversation_id: uuid.UUID,
     ):
         conversation = ConversationDto.model_validate(
-            self._conversation_repository.get_conversation_by_id(
+            await self._conversation_repository.get_conversation_by_id(
                 conversation_id,
             )
         )
@@ -297,8 +769,8 @@ class MessagesService:
             raise ConversationNotFoundError()
 
         conversation.deleted_date = datetime.datetime.now(datetime.timezone.utc)
-        self._conversation_repository.update(
-            **conversation.model_dump(),
+        await self._conversation_repository.update(
+            conversation.model_dump(),
             id=conversation_id,
         )
 
@@ -309,7 +781,7 @@ class MessagesService:
         body: PatchConversationRequest,
     ):
         conversation = ConversationDto.model_validate(
-            self._conversation_repository.get_conversation_by_id(
+            await self._conversation_repository.get_conversation_by_id(
                 conversation_id,
             )
         )
@@ -331,7 +803,7 @@ class MessagesService:
                 conversation.type = body.type
 
         return ConversationDto.model_validate(
-            self._conversation_repository.update(
+            await self._conversation_repository.update(
                 conversation.model_dump(),
                 id=conversation_id,
             )
@@ -0,0 +1,378 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import AsyncIterator, Callable
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.db.redis import get_redis
+from app.services.messages.active_turns import cancel_turns
+
+# Published on a turn's channel once it has ended
+END_OF_STREAM = b""
+
+# Every worker listens here for cancellations of the turns it runs
+CANCEL_CHANNEL = "pam:stream:cancel"
+
+
+def parse_event_id(event_id: str | None) -> tuple[str | None, int]:
+    """Split a ``<turn_id>-<seq>`` SSE event id, ``(None, 0)`` if malformed."""
+    if not event_id:
+        return None, 0
+
+    turn_id, _, seq = event_id.rpartition("-")
+    if not turn_id or not seq.isdigit():
+        return None, 0
+    return turn_id, int(seq)
+
+
+def _frame_seq(frame: bytes) -> int:
+    id_line = frame.split(b"\n", 1)[0]
+    return int(id_line.rpartition(b"-")[2])
+
+
+class TurnStream:
+    """
+    Numbered SSE frames of the turn currently running in a conversation.
+
+    Frames are kept in memory for local subscribers and mirrored to Redis
+    by the hub so subscribers on other workers can replay and tail them.
+    Every subscriber gets the frames after the sequence number it asks for.
+    """
+
+    def __init__(self, hub: "StreamHub", conversation_id: uuid.UUID) -> None:
+        self.conversation_id = conversation_id
+        self.turn_id = uuid.uuid4().hex
+        self.subscribers = 0
+        self.on_subscribers_changed: Callable[[], None] | None = None
+        self.frames: list[bytes] = []
+        # Owned by the hub: frames written to Redis so far, and the writer
+        self.mirrored = 0
+        self.mirror_task: asyncio.Task | None = None
+        self._hub = hub
+        self._changed = asyncio.Event()
+        self._finished = False
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def publish(self, frame: bytes) -> None:
+        seq = len(self.frames) + 1
+        frame = f"id: {self.turn_id}-{seq}\n".encode() + frame
+        self.frames.append(frame)
+        self._notify()
+        self._hub.mirror(self)
+
+    async def finish(self) -> None:
+        self._finished = True
+        self._notify()
+        await self._hub.mirror_end(self)
+
+    def _notify(self) -> None:
+        # Subscribers wait on the event current when they caught up, so
+        # swapping it wakes everyone without a lost-wakeup window.
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self, after_seq: int = 0) -> AsyncIterator[bytes]:
+        self._set_subscribers(self.subscribers + 1)
+        try:
+            sent = after_seq
+            while True:
+                changed = self._changed
+                if sent < len(self.frames):
+                    yield self.frames[sent]
+                    sent += 1
+                elif self._finished:
+                    return
+                else:
+                    await changed.wait()
+        finally:
+            self._set_subscribers(self.subscribers - 1)
+
+    def _set_subscribers(self, count: int) -> None:
+        self.subscribers = count
+        if self.on_subscribers_changed is not None:
+            self.on_subscribers_changed()
+
+
+class StreamHub:
+    """
+    Fan-out of chat turn streams to any number of SSE subscribers.
+
+    The worker running a turn keeps its frames in a ``TurnStream`` and
+    mirrors them to Redis under the turn's id: a list holding every frame
+    of the turn for replay, a state hash, plus a pub/sub channel for live
+    tailing. The conversation's key points at its latest turn. Subscribers
+    on the same worker read the ``TurnStream`` directly, others go through
+    Redis. Reconnecting with ``Last-Event-ID`` resumes after that frame and
+    never starts a new CLI run.
+
+    Mirroring runs in the background, a batch of frames per round trip,
+    each bounded by ``write_timeout``: a slow or unreachable Redis delays
+    only remote subscribers, never the turn itself.
+
+    Cancelling a turn is published to every worker, and the one running it
+    stops it.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        replay_ttl: int,
+        write_timeout: float,
+    ) -> None:
+        self._redis = client
+        self._replay_ttl = replay_ttl
+        self._write_timeout = write_timeout
+        self._streams: dict[uuid.UUID, TurnStream] = {}
+        self._cancel_listener: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._cancel_listener is None:
+            self._cancel_listener = asyncio.create_task(self._listen_for_cancels())
+
+    async def stop(self) -> None:
+        if self._cancel_listener is not None:
+            self._cancel_listener.cancel()
+            self._cancel_listener = None
+
+    @staticmethod
+    def _conversation_key(conversation_id: uuid.UUID) -> str:
+        return f"pam:stream:conversation:{conversation_id}"
+
+    @staticmethod
+    def _key(turn_id: str) -> str:
+        return f"pam:stream:turn:{turn_id}"
+
+    async def open(self, conversation_id: uuid.UUID) -> TurnStream:
+        """Start the stream of a new turn, replacing the conversation's last one."""
+        stream = TurnStream(self, conversation_id)
+        self._streams[conversation_id] = stream
+
+        key = self._key(stream.turn_id)
+        try:
+            async with asyncio.timeout(self._write_timeout):
+                async with self._redis.pipeline(transaction=True) as pipe:
+                    pipe.hset(
+                        f"{key}:state",
+                        mapping={"conversation_id": str(conversation_id), "finished": 0},
+                    )
+                    pipe.expire(f"{key}:state", self._replay_ttl)
+                    pipe.set(
+                        self._conversation_key(conversation_id),
+                        stream.turn_id,
+                        ex=self._replay_ttl,
+                    )
+                    await pipe.execute()
+        except (RedisError, TimeoutError) as e:
+            logging.warning(f"Could not open stream of {conversation_id} in Redis: {e!r}")
+        return stream
+
+    def close(self, stream: TurnStream) -> None:
+        """Forget a finished stream; later subscribers replay it from Redis."""
+        if self._streams.get(stream.conversation_id) is stream:
+            del self._streams[stream.conversation_id]
+
+    def mirror(self, stream: TurnStream) -> None:
+        """Have the stream's new frames written to Redis in the background."""
+        if stream.mirror_task is None or stream.mirror_task.done():
+            stream.mirror_task = asyncio.create_task(self._write_frames(stream))
+
+    async def mirror_end(self, stream: TurnStream) -> None:
+        """Write the last frames and mark the turn finished, for its own state only."""
+        self.mirror(stream)
+        await stream.mirror_task
+
+    async def _write_frames(self, stream: TurnStream) -> None:
+        key = self._key(stream.turn_id)
+        ended = False
+        while not ended:
+            frames = stream.frames[stream.mirrored :]
+            ended = stream.finished
+            if not frames and not ended:
+                return
+
+            # Frames that fail to be written are skipped, not retried: a
+            # timed out batch may still have reached Redis
+            stream.mirrored += len(frames)
+            try:
+                async with asyncio.timeout(self._write_timeout):
+                    async with self._redis.pipeline(transaction=False) as pipe:
+                        if frames:
+                            pipe.rpush(f"{key}:frames", *frames)
+                            pipe.expire(f"{key}:frames", self._replay_ttl)
+                            for frame in frames:
+                                pipe.publish(key, frame)
+                        if ended:
+                            pipe.hset(f"{key}:state", "finished", 1)
+                            pipe.publish(key, END_OF_STREAM)
+                        pipe.expire(f"{key}:state", self._replay_ttl)
+                        await pipe.execute()
+            except (RedisError, TimeoutError) as e:
+                logging.warning(f"Could not mirror stream of {stream.conversation_id}: {e!r}")
+
+    async def cancel(self, conversation_id: uuid.UUID, reason: str) -> bool:
+        """
+        Ask the worker running the conversation's turn to cancel it
+
+        Returns:
+            Whether the conversation has a turn that has not finished
+        """
+        try:
+            turn_id = await self._redis.get(self._conversation_key(conversation_id))
+            if turn_id is None:
+                return False
+            finished = await self._redis.hget(
+                f"{self._key(turn_id.decode())}:state",
+                "finished",
+            )
+            if finished != b"0":
+                return False
+
+            await self._redis.publish(
+                CANCEL_CHANNEL,
+                json.dumps({"conversation_id": str(conversation_id), "reason": reason}),
+            )
+        except RedisError as e:
+            logging.warning(f"Could not cancel the turn of {conversation_id}: {e}")
+            return False
+        return True
+
+    async def _listen_for_cancels(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(CANCEL_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+
+                    request = json.loads(message["data"])
+                    cancel_turns(uuid.UUID(request["conversation_id"]), request["reason"])
+            except RedisError as e:
+                logging.warning(f"Lost the turn cancel channel, resubscribing: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def remote_subscribers(self, turn_id: str) -> int:
+        """Subscribers of the turn's stream attached through Redis."""
+        try:
+            count = await self._redis.get(f"{self._key(turn_id)}:subscribers")
+        except RedisError:
+            return 0
+        return int(count or 0)
+
+    async def subscribe(
+        self,
+        conversation_id: uuid.UUID,
+        last_event_id: str | None = None,
+        turn_id: str | None = None,
+    ) -> AsyncIterator[bytes] | None:
+        """
+        Frames of the conversation's current turn
+
+        Args:
+            conversation_id: Conversation to follow
+            last_event_id: Last frame the client has seen; frames up to it
+                are skipped when it belongs to the followed turn
+            turn_id: Follow this turn of the conversation instead
+
+        Returns:
+            Replayed then live frames, None when there is no such stream
+        """
+        last_turn_id, last_seq = parse_event_id(last_event_id)
+
+        stream = self._streams.get(conversation_id)
+        if stream is not None and turn_id in (None, stream.turn_id):
+            after_seq = last_seq if last_turn_id == stream.turn_id else 0
+            return stream.subscribe(after_seq)
+
+        try:
+            if turn_id is None:
+                current = await self._redis.get(self._conversation_key(conversation_id))
+                if current is None:
+                    return None
+                turn_id = current.decode()
+            state = await self._redis.hgetall(f"{self._key(turn_id)}:state")
+        except RedisError as e:
+            logging.warning(f"Could not read stream of {conversation_id}: {e}")
+            return None
+
+        if state.get(b"conversation_id", b"").decode() != str(conversation_id):
+            return None
+
+        after_seq = last_seq if last_turn_id == turn_id else 0
+        return self._subscribe_remote(turn_id, after_seq)
+
+    async def _subscribe_remote(
+        self,
+        turn_id: str,
+        after_seq: int,
+    ) -> AsyncIterator[bytes]:
+        key = self._key(turn_id)
+        pubsub = self._redis.pubsub()
+        # Subscribe before reading the replay list so no frame falls in between
+        await pubsub.subscribe(key)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.incr(f"{key}:subscribers")
+            pipe.expire(f"{key}:subscribers", self._replay_ttl)
+            await pipe.execute()
+        try:
+            frames = await self._redis.lrange(f"{key}:frames", after_seq, -1)
+            for frame in frames:
+                yield frame
+            sent = after_seq + len(frames)
+
+            if await self._redis.hget(f"{key}:state", "finished") == b"1":
+                # The last frames may have been written after the first read
+                for frame in await self._redis.lrange(f"{key}:frames", sent, -1):
+                    yield frame
+                return
+
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+
+                frame = message["data"]
+                if frame == END_OF_STREAM:
+                    return
+                seq = _frame_seq(frame)
+                if seq > sent:
+                    sent = seq
+                    yield frame
+        finally:
+            await self._redis.decr(f"{key}:subscribers")
+            await pubsub.aclose()
+
+
+_hub: StreamHub | None = None
+
+
+def get_stream_hub() -> StreamHub:
+    global _hub
+    if _hub is None:
+        _hub = StreamHub(
+            get_redis(),
+            replay_ttl=int(settings.STREAM_REPLAY_TTL.total_seconds()),
+            write_timeout=settings.STREAM_MIRROR_TIMEOUT.total_seconds(),
+        )
+    return _hub
+
+
+def start_stream_hub() -> None:
+    get_stream_hub().start()
+
+
+async def stop_stream_hub() -> None:
+    global _hub
+    if _hub is None:
+        return
+
+    await _hub.stop()
+    _hub = None
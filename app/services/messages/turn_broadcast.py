@@ -0,0 +1,92 @@
+import asyncio
+import logging
+from contextlib import aclosing
+from typing import AsyncGenerator, Awaitable, Callable
+
+from app.services.messages.active_turns import CLIENT_DISCONNECTED, ActiveTurn
+from app.services.messages.stream_hub import StreamHub, TurnStream
+
+# Background turns, referenced until they finish
+_running: set["TurnBroadcast"] = set()
+
+
+class TurnBroadcast:
+    """
+    Runs a turn's SSE stream in the background and publishes it to the hub.
+
+    The turn is decoupled from the request that started it: clients
+    subscribe to its ``TurnStream`` and may come and go. It is cancelled
+    once it has had no subscriber, local or remote, for ``orphan_grace``
+    seconds, counted from its start if nobody ever subscribes.
+    """
+
+    def __init__(
+        self,
+        hub: StreamHub,
+        stream: TurnStream,
+        turn: ActiveTurn,
+        frames: AsyncGenerator[bytes, None],
+        orphan_grace: float,
+        on_finish: Callable[[], Awaitable[None]] | None = None,
+    ) -> None:
+        self.stream = stream
+        self.turn = turn
+        self._hub = hub
+        self._orphan_grace = orphan_grace
+        self._orphan_timer: asyncio.TimerHandle | None = None
+        self._orphan_check: asyncio.Task | None = None
+        self._on_finish = on_finish
+
+        stream.on_subscribers_changed = self._on_subscribers_changed
+        # Runs until the first subscriber arrives
+        self._on_subscribers_changed()
+        self._task = asyncio.create_task(self._run(frames))
+        _running.add(self)
+
+    async def _run(self, frames: AsyncGenerator[bytes, None]) -> None:
+        try:
+            async with aclosing(frames):
+                async for frame in frames:
+                    self.stream.publish(frame)
+        except Exception:
+            logging.exception(f"Turn of {self.turn.conversation_id} failed")
+        finally:
+            self._cancel_orphan_timer()
+            self.stream.on_subscribers_changed = None
+            await self.stream.finish()
+            self._hub.close(self.stream)
+            _running.discard(self)
+            if self._on_finish is not None:
+                await self._on_finish()
+
+    def _on_subscribers_changed(self) -> None:
+        self._cancel_orphan_timer()
+        if not self.stream.subscribers:
+            self._orphan_timer = asyncio.get_running_loop().call_later(
+                self._orphan_grace,
+                self._check_orphaned,
+            )
+
+    def _check_orphaned(self) -> None:
+        self._orphan_timer = None
+        self._orphan_check = asyncio.create_task(self._cancel_if_orphaned())
+
+    def _cancel_orphan_timer(self) -> None:
+        if self._orphan_timer is not None:
+            self._orphan_timer.cancel()
+            self._orphan_timer = None
+
+    async def _cancel_if_orphaned(self) -> None:
+        if self.stream.subscribers or self.stream.finished:
+            return
+
+        remote_subscribers = await self._hub.remote_subscribers(self.stream.turn_id)
+        if self.stream.subscribers or self.stream.finished:
+            return
+        if remote_subscribers:
+            # Followed from another worker: look again after another grace period
+            self._on_subscribers_changed()
+            return
+
+        logging.info(f"No subscribers left, cancelling turn of {self.turn.conversation_id}")
+        self.turn.cancel(CLIENT_DISCONNECTED)
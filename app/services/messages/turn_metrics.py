@@ -0,0 +1,112 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from prometheus_client import Histogram
+
+# Seconds, from sub-millisecond DB writes to multi-minute agent turns
+_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0, 30.0, 60.0, 120.0, 300.0, 600.0,
+)
+
+CHAT_STAGE_SECONDS = Histogram(
+    "pam_chat_stage_seconds",
+    "Duration of chat turn stages",
+    ["stage"],
+    buckets=_BUCKETS,
+)
+CHAT_TOOL_CALL_SECONDS = Histogram(
+    "pam_chat_tool_call_seconds",
+    "Time from a tool_use block to its tool_result",
+    ["tool"],
+    buckets=_BUCKETS,
+)
+CHAT_PERSIST_SECONDS = Histogram(
+    "pam_chat_persist_seconds",
+    "Time to store one batch of streamed content blocks",
+    buckets=_BUCKETS,
+)
+CHAT_PERSIST_BATCH_BLOCKS = Histogram(
+    "pam_chat_persist_batch_blocks",
+    "Content blocks stored per batch",
+    buckets=(1, 2, 5, 10, 20, 50, 100),
+)
+
+# Stages of a turn
+QUEUE_WAIT = "queue_wait"  # waiting for a CLI slot
+SPAWN = "spawn"  # starting the CLI process, when the turn needs one
+FIRST_BYTE = "first_byte"  # CLI started or prompt sent -> first output line
+FIRST_ASSISTANT_BLOCK = "first_assistant_block"  # turn start -> first block
+RESULT = "result"  # turn start -> result event
+
+
+class TurnTimings:
+    """
+    Stage timings of one chat turn.
+
+    Every measurement is observed in the Prometheus histograms as it is
+    taken and kept for the summary sent with the turn's ``result`` event.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self._stages: dict[str, float] = {}
+        self._pending_tools: dict[str, tuple[str, float]] = {}
+        self._tool_calls: list[dict[str, Any]] = []
+        self._persist_batches = 0
+        self._persist_blocks = 0
+        self._persist_total = 0.0
+        self._persist_max = 0.0
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record a stage that took ``seconds``."""
+        self._stages[stage] = seconds
+        CHAT_STAGE_SECONDS.labels(stage).observe(seconds)
+
+    def mark(self, stage: str) -> None:
+        """Record the time since the turn started, once per stage."""
+        if stage not in self._stages:
+            self.observe(stage, time.perf_counter() - self.started)
+
+    def tool_started(self, tool_use_id: str | None, name: str | None) -> None:
+        if tool_use_id:
+            self._pending_tools[tool_use_id] = (name or "unknown", time.perf_counter())
+
+    def tool_finished(self, tool_use_id: str | None) -> None:
+        pending = self._pending_tools.pop(tool_use_id, None) if tool_use_id else None
+        if pending is None:
+            return
+
+        name, started = pending
+        seconds = time.perf_counter() - started
+        self._tool_calls.append({"tool": name, "seconds": round(seconds, 3)})
+        CHAT_TOOL_CALL_SECONDS.labels(name).observe(seconds)
+
+    @contextmanager
+    def measure_persist(self, blocks: int) -> Iterator[None]:
+        """Time the write of one batch of ``blocks`` content blocks."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self._persist_batches += 1
+            self._persist_blocks += blocks
+            self._persist_total += seconds
+            self._persist_max = max(self._persist_max, seconds)
+            CHAT_PERSIST_SECONDS.observe(seconds)
+            CHAT_PERSIST_BATCH_BLOCKS.observe(blocks)
+
+    def summary(self) -> dict[str, Any]:
+        """Timings of the turn so far, in seconds."""
+        return {
+            **{stage: round(seconds, 3) for stage, seconds in self._stages.items()},
+            "tool_calls": self._tool_calls,
+            "persist": {
+                "batches": self._persist_batches,
+                "blocks": self._persist_blocks,
+                "total": round(self._persist_total, 3),
+                "max": round(self._persist_max, 3),
+            },
+        }
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import subprocess
 
@@ -5,6 +6,7 @@ from app.config import settings
 from app.core.enums import VMScriptNameEnum
 from app.models.auth.user import ReadUserModel
 from app.repositories.auth.auth import AuthRepository
+from app.services.auth.auth_cache import invalidate_cached_user
 
 
 class ProvisionerService:
@@ -32,7 +34,7 @@ class ProvisionerService:
             return "develop"
         return "main"
 
-    def create_client(self, user_id: int, backend_port: int) -> None:
+    async def create_client(self, user_id: int, backend_port: int) -> None:
         # Use user_id as client name
         client_name = str(user_id)
         logging.info(f"Provisioning client: {client_name}")
@@ -50,15 +52,15 @@ class ProvisionerService:
         ]
 
         logging.info(f"Executing command: {' '.join(command)}")
-        self.run_ssh_command(command)
+        await asyncio.to_thread(self.run_ssh_command, command)
 
-        self.update_user_server_host(user_id, backend_port)
+        await self.update_user_server_host(user_id, backend_port)
 
         logging.info(f"Client {client_name} provisioned successfully.")
 
-    def update_user_server_host(self, user_id: int, backend_port: int) -> None:
+    async def update_user_server_host(self, user_id: int, backend_port: int) -> None:
         user = ReadUserModel.model_validate(
-            self._auth_repository.get(id=user_id)
+            await self._auth_repository.get(id=user_id)
         )
         if not user:
             logging.error(f"User with ID {user_id} not found.")
@@ -66,10 +68,11 @@ class ProvisionerService:
 
         user.server_host = self._create_server_host(backend_port)
 
-        self._auth_repository.update(
+        await self._auth_repository.update(
             user.model_dump(),
             id=user_id,
         )
+        await invalidate_cached_user(user_id)
 
         logging.info(f"Updated backend port for user ID {user_id} to {backend_port}.")
 
@@ -0,0 +1,342 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterable, AsyncIterator
+
+import httpx
+
+from app.config import settings
+from app.core.exceptions.messages.messages import BackendUnavailableError
+from app.services.proxy.proxy_metrics import (
+    PROXY_ABORTED_STREAMS,
+    PROXY_CIRCUIT_OPEN,
+    PROXY_HEALTH_CHECKS,
+    PROXY_OPEN_STREAMS,
+    PROXY_REQUESTS,
+    PROXY_RESPONSE_SECONDS,
+    PROXY_STREAMED_BYTES,
+)
+
+
+class CircuitBreaker:
+    """
+    Refuses requests to a backend for a while after repeated failures.
+
+    Closed, requests pass and ``failure_threshold`` failures in a row open
+    it. Open, requests are refused until ``reset_timeout`` has passed; then
+    one trial request goes through (half-open). A success closes it again,
+    a failure keeps it open for another ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow_request(self) -> bool:
+        if self._opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self._opened_at < self._reset_timeout:
+            return False
+        # Half-open: this request is the trial, the next one waits again
+        self._opened_at = now
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self._failure_threshold:
+            self._opened_at = time.monotonic()
+
+
+async def sse_frames(
+    chunks: AsyncIterable[bytes],
+    max_frame_bytes: int,
+) -> AsyncIterator[bytes]:
+    """
+    Regroup a byte stream so every piece ends on an SSE frame boundary.
+
+    Frames that arrived together are passed on together. An unfinished
+    frame that outgrows ``max_frame_bytes`` is passed on as it is, so the
+    buffer stays bounded.
+    """
+    buffer = bytearray()
+    # The buffer holds no boundary before this, so only new bytes are
+    # searched, plus one byte back for a boundary split between chunks
+    scanned = 0
+    async for chunk in chunks:
+        buffer += chunk
+        end = buffer.rfind(b"\n\n", max(scanned - 1, 0))
+        scanned = len(buffer)
+        end = end + 2 if end != -1 else 0
+        if len(buffer) - end >= max_frame_bytes:
+            end = len(buffer)
+        if end:
+            yield bytes(buffer[:end])
+            del buffer[:end]
+            scanned -= end
+    if buffer:
+        yield bytes(buffer)
+
+
+class UpstreamStream:
+    """
+    A backend response whose body is streamed; close it when done.
+
+    Reading is pulled by the client: the next chunk is read from the
+    backend only once the previous one was sent on, so a slow client
+    slows the backend down (through TCP flow control) instead of making
+    chunks pile up here. Closing it before the end closes the connection,
+    which the backend sees as its client disconnecting.
+    """
+
+    def __init__(self, backend: "Backend", response: httpx.Response) -> None:
+        self._backend = backend
+        self._response = response
+        self._closed = False
+        self._finished = False
+        backend.open_streams += 1
+        PROXY_OPEN_STREAMS.labels(backend.url).inc()
+
+    @property
+    def status_code(self) -> int:
+        return self._response.status_code
+
+    @property
+    def headers(self) -> httpx.Headers:
+        return self._response.headers
+
+    async def aread(self) -> bytes:
+        body = await self._response.aread()
+        self._finished = True
+        return body
+
+    async def aiter_bytes(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self._response.aiter_bytes():
+                PROXY_STREAMED_BYTES.labels(self._backend.url).inc(len(chunk))
+                yield chunk
+        except httpx.TransportError:
+            self._backend.record_failure()
+            raise
+        self._finished = True
+
+    def aiter_frames(self) -> AsyncIterator[bytes]:
+        """The body in whole SSE frames, see ``sse_frames``."""
+        return sse_frames(self.aiter_bytes(), settings.PROXY_MAX_FRAME_BYTES)
+
+    async def aclose(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if not self._finished:
+            PROXY_ABORTED_STREAMS.labels(self._backend.url).inc()
+        self._backend.open_streams -= 1
+        PROXY_OPEN_STREAMS.labels(self._backend.url).dec()
+        await self._response.aclose()
+
+
+class Backend:
+    """
+    One user VM backend: its connection pool, circuit breaker and health.
+    """
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.last_used = time.monotonic()
+        self.open_streams = 0
+        self._circuit = CircuitBreaker(
+            settings.PROXY_CIRCUIT_FAILURE_THRESHOLD,
+            settings.PROXY_CIRCUIT_RESET_TIMEOUT.total_seconds(),
+        )
+        self._client = httpx.AsyncClient(
+            base_url=url,
+            limits=httpx.Limits(
+                max_connections=settings.PROXY_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.PROXY_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.PROXY_KEEPALIVE_EXPIRY.total_seconds(),
+            ),
+            # Chat turns stream for minutes, so no read timeout
+            timeout=httpx.Timeout(
+                connect=settings.PROXY_CONNECT_TIMEOUT.total_seconds(),
+                read=None,
+                write=60,
+                pool=60,
+            ),
+            headers={"Accept-Encoding": "identity"},
+        )
+        PROXY_CIRCUIT_OPEN.labels(url).set(0)
+
+    def record_success(self) -> None:
+        if self._circuit.is_open:
+            logging.info(f"Backend {self.url} recovered")
+        self._circuit.record_success()
+        PROXY_CIRCUIT_OPEN.labels(self.url).set(0)
+
+    def record_failure(self) -> None:
+        was_open = self._circuit.is_open
+        self._circuit.record_failure()
+        if self._circuit.is_open:
+            if not was_open:
+                logging.warning(f"Backend {self.url} failing, refusing requests to it")
+            PROXY_CIRCUIT_OPEN.labels(self.url).set(1)
+
+    async def stream(
+        self,
+        method: str,
+        path: str,
+        headers: dict[str, str],
+        content: AsyncIterable[bytes] | None = None,
+    ) -> UpstreamStream:
+        """
+        Send the request and return the response once its headers arrive
+
+        Raises:
+            BackendUnavailableError: the circuit is open, or the backend
+                could not be reached
+        """
+        self.last_used = time.monotonic()
+        if not self._circuit.allow_request():
+            PROXY_REQUESTS.labels(self.url, "rejected").inc()
+            raise BackendUnavailableError()
+
+        request = self._client.build_request(
+            method,
+            path,
+            headers=headers,
+            content=content,
+        )
+        started = time.perf_counter()
+        try:
+            response = await self._client.send(request, stream=True)
+        except httpx.PoolTimeout:
+            # Our own pool is full; the backend is not at fault
+            PROXY_REQUESTS.labels(self.url, "error").inc()
+            raise BackendUnavailableError()
+        except httpx.TransportError as e:
+            logging.warning(f"Proxy request to {self.url}{path} failed: {e!r}")
+            PROXY_REQUESTS.labels(self.url, "error").inc()
+            self.record_failure()
+            raise BackendUnavailableError()
+
+        PROXY_RESPONSE_SECONDS.labels(self.url).observe(time.perf_counter() - started)
+        PROXY_REQUESTS.labels(self.url, f"{response.status_code // 100}xx").inc()
+        if response.status_code >= 500:
+            self.record_failure()
+        else:
+            self.record_success()
+        return UpstreamStream(self, response)
+
+    async def check_health(self) -> None:
+        """
+        Request the health path; any answer below 500 counts, as backends
+        deployed before it existed answer 404
+        """
+        try:
+            response = await self._client.get(
+                settings.PROXY_HEALTH_CHECK_PATH,
+                headers={"api-key": settings.HARMIX_API_KEY},
+                timeout=settings.PROXY_HEALTH_CHECK_TIMEOUT.total_seconds(),
+            )
+            healthy = response.status_code < 500
+        except httpx.TransportError:
+            healthy = False
+
+        PROXY_HEALTH_CHECKS.labels(self.url, "ok" if healthy else "failed").inc()
+        if healthy:
+            self.record_success()
+        else:
+            self.record_failure()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class BackendProxy:
+    """
+    The backends requests are proxied to, one pool each.
+
+    Backends that were used recently are health-checked in the
+    background, so a dead VM opens its circuit before users wait on it,
+    and a recovered one closes it without a user request as the trial.
+    Backends with no open streams and no requests for ``idle_ttl`` are
+    dropped with their connections.
+    """
+
+    def __init__(self, health_check_interval: float, idle_ttl: float) -> None:
+        self.health_check_interval = health_check_interval
+        self.idle_ttl = idle_ttl
+        self._backends: dict[str, Backend] = {}
+        self._health_task: asyncio.Task | None = None
+
+    def backend(self, url: str) -> Backend:
+        backend = self._backends.get(url)
+        if backend is None:
+            backend = self._backends[url] = Backend(url)
+        return backend
+
+    def start(self) -> None:
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._check_backends())
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+
+        backends = list(self._backends.values())
+        self._backends.clear()
+        await asyncio.gather(*(b.close() for b in backends), return_exceptions=True)
+
+    async def _check_backends(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            now = time.monotonic()
+            idle = [
+                b
+                for b in self._backends.values()
+                if not b.open_streams and now - b.last_used > self.idle_ttl
+            ]
+            for backend in idle:
+                del self._backends[backend.url]
+                PROXY_CIRCUIT_OPEN.remove(backend.url)
+            await asyncio.gather(
+                *(b.close() for b in idle),
+                *(b.check_health() for b in list(self._backends.values())),
+                return_exceptions=True,
+            )
+
+
+_proxy: BackendProxy | None = None
+
+
+def get_backend_proxy() -> BackendProxy:
+    global _proxy
+    if _proxy is None:
+        _proxy = BackendProxy(
+            health_check_interval=settings.PROXY_HEALTH_CHECK_INTERVAL.total_seconds(),
+            idle_ttl=settings.PROXY_BACKEND_IDLE_TTL.total_seconds(),
+        )
+    return _proxy
+
+
+def start_backend_proxy() -> None:
+    get_backend_proxy().start()
+
+
+async def stop_backend_proxy() -> None:
+    global _proxy
+    if _proxy is None:
+        return
+
+    await _proxy.close()
+    _proxy = None
@@ -0,0 +1,44 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# Labelled by upstream, the backend's base URL (one per user VM)
+
+PROXY_REQUESTS = Counter(
+    "pam_proxy_requests_total",
+    "Requests proxied to backends, by outcome: the response status class, "
+    "'error' when the backend could not be reached, 'rejected' when its "
+    "circuit was open",
+    ["upstream", "outcome"],
+)
+PROXY_RESPONSE_SECONDS = Histogram(
+    "pam_proxy_response_seconds",
+    "Time from sending a request to a backend to its response headers",
+    ["upstream"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+PROXY_STREAMED_BYTES = Counter(
+    "pam_proxy_streamed_bytes_total",
+    "Response bytes streamed from backends to clients",
+    ["upstream"],
+)
+PROXY_ABORTED_STREAMS = Counter(
+    "pam_proxy_aborted_streams_total",
+    "Backend responses closed before their end, mostly as the client left",
+    ["upstream"],
+)
+PROXY_OPEN_STREAMS = Gauge(
+    "pam_proxy_open_streams",
+    "Backend responses being streamed",
+    ["upstream"],
+    multiprocess_mode="livesum",
+)
+PROXY_CIRCUIT_OPEN = Gauge(
+    "pam_proxy_circuit_open",
+    "1 while requests to the backend are refused after repeated failures",
+    ["upstream"],
+    multiprocess_mode="livemax",
+)
+PROXY_HEALTH_CHECKS = Counter(
+    "pam_proxy_health_checks_total",
+    "Active health checks of backends, by result ('ok' or 'failed')",
+    ["upstream", "result"],
+)
@@ -1,9 +1,11 @@
 import datetime
 import uuid
 
+from app.core.enums import CLIPriorityEnum
 from app.core.exceptions.workflows.workflows import (
     WorkflowNotFoundError,
 )
+from app.db.database import commit_unit_of_work, unit_of_work, without_unit_of_work
 from app.models.auth.user import ReadUserModel
 from app.models.messages.message import CreateMessage, MessageDto
 from app.models.workflows.workflow import CreateWorkflow, UpdateWorkflow, WorkflowModel
@@ -24,7 +26,7 @@ class WorkflowService:
         self,
         user: ReadUserModel,
     ) -> list[WorkflowModel]:
-        workflows = self._workflow_repository.get_workflows_by_user_id(
+        workflows = await self._workflow_repository.get_workflows_by_user_id(
             user.id,
         )
         return WorkflowModel.validate_list_model(workflows)
@@ -35,7 +37,7 @@ class WorkflowService:
         workflow_id: uuid.UUID,
     ) -> WorkflowModel:
         workflow = WorkflowModel.model_validate(
-            self._workflow_repository.get_workflow_by_id(workflow_id)
+            await self._workflow_repository.get_workflow_by_id(workflow_id)
         )
 
         if workflow is None or workflow.user_id != user.id:
@@ -49,8 +51,8 @@ class WorkflowService:
         user: ReadUserModel,
     ) -> WorkflowModel:
         data.user_id = user.id
-        data.created_date = datetime.datetime.now()
-        workflow = self._workflow_repository.create(**data.model_dump())
+        data.created_date = datetime.datetime.now(datetime.timezone.utc)
+        workflow = await self._workflow_repository.create(**data.model_dump())
         return WorkflowModel.model_validate(workflow)
 
     async def delete_workflow(
@@ -59,14 +61,14 @@ class WorkflowService:
         workflow_id: uuid.UUID,
     ):
         workflow = WorkflowModel.model_validate(
-            self._workflow_repository.get_workflow_by_id(workflow_id)
+            await self._workflow_repository.get_workflow_by_id(workflow_id)
         )
 
         if workflow is None or workflow.user_id != user.id:
             raise WorkflowNotFoundError()
 
         workflow.deleted_date = datetime.datetime.now(datetime.timezone.utc)
-        self._workflow_repository.update(workflow.model_dump(), id=workflow_id)
+        await self._workflow_repository.update(workflow.model_dump(), id=workflow_id)
 
     async def patch_workflow(
         self,
@@ -75,7 +77,7 @@ class WorkflowService:
         body: UpdateWorkflow,
     ):
         workflow = WorkflowModel.model_validate(
-            self._workflow_repository.get_workflow_by_id(workflow_id)
+            await self._workflow_repository.get_workflow_by_id(workflow_id)
         )
 
         if workflow is None or workflow.user_id != user.id:
@@ -94,7 +96,7 @@ class WorkflowService:
             workflow.run_options = body.run_options
 
         return WorkflowModel.model_validate(
-            self._workflow_repository.update(
+            await self._workflow_repository.update(
                 workflow.model_dump(),
                 id=workflow_id,
             )
@@ -102,44 +104,52 @@ class WorkflowService:
 
     async def run_workflow(self, workflow_id: uuid.UUID, user: ReadUserModel):
         workflow = WorkflowModel.model_validate(
-            self._workflow_repository.get_workflow_by_id(workflow_id)
+            await self._workflow_repository.get_workflow_by_id(workflow_id)
         )
 
         if workflow is None or workflow.user_id != user.id:
             raise WorkflowNotFoundError()
 
-        run = self._workflow_repository.add_workflow_run(workflow_id)
-
-        conversation = self._message_service.get_or_create_conversation(user, None)
-        user_prompt = workflow.prompt.strip()
-        user_message = CreateMessage(
-            user_id=user.id,
-            conversation_id=conversation.id,
-            role="user",
-            content=user_prompt,
-            content_new={"type": "text", "text": user_prompt},
-            timestamp=datetime.datetime.now(datetime.timezone.utc),
-        )
+        async with unit_of_work():
+            run = await self._workflow_repository.add_workflow_run(workflow_id)
+
+            conversation = await self._message_service.get_or_create_conversation(
+                user,
+                None,
+            )
+            user_prompt = workflow.prompt.strip()
+            user_message = CreateMessage(
+                user_id=user.id,
+                conversation_id=conversation.id,
+                role="user",
+                content_new={"type": "text", "text": user_prompt},
+                timestamp=datetime.datetime.now(datetime.timezone.utc),
+            )
 
-        saved_user_message = (
-            MessageDto.model_validate(  # TODO: move repositories calls to service
-                self._message_service._message_repository.create(
-                    **user_message.model_dump()
+            saved_user_message = (
+                MessageDto.model_validate(  # TODO: move repositories calls to service
+                    await self._message_service._message_repository.create(
+                        **user_message.model_dump()
+                    )
                 )
             )
-        )
-        conversation.updated_date = user_message.timestamp
-        self._message_service._conversation_repository.update(
-            conversation.model_dump(),
-            id=conversation.id,
-        )
+            conversation.updated_date = user_message.timestamp
+            await self._message_service._conversation_repository.update(
+                conversation.model_dump(),
+                id=conversation.id,
+            )
+
+        # Stored before the turn, whose messages are written as they stream
+        await commit_unit_of_work()
 
-        async for _ in self._message_service.stream_message(
-            user,
-            user_prompt,
-            saved_user_message,
-            conversation,
-        ):
-            pass
+        with without_unit_of_work():
+            async for _ in self._message_service.stream_message(
+                user,
+                user_prompt,
+                saved_user_message,
+                conversation,
+                CLIPriorityEnum.WORKFLOW,
+            ):
+                pass
 
-        self._workflow_repository.finish_workflow_run(run.id, conversation.id)
+        await self._workflow_repository.finish_workflow_run(run.id, conversation.id)
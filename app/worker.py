@@ -1,10 +1,12 @@
 import asyncio
 
+from sqlalchemy import select
+
 from app.celery_app import celery_app
 from app.container import ApplicationContainer
-from app.db.database import DatabaseConnector
+from app.db.database import AsyncDatabaseConnector, close_database, unit_of_work
+from app.db.redis import close_redis
 from app.entities.workflows.workflow import Workflow
-from app.models.auth.user import ReadUserModel
 
 
 @celery_app.task(name="app.worker.execute_workflow")
@@ -22,12 +24,20 @@ async def run_workflow(
     auth_service,
     workflow_id: str,
 ):
-    workflow = None
-    with DatabaseConnector() as db:
-        workflow = db.session.query(Workflow).filter_by(id=workflow_id).first()
-        if not workflow:
-            return
-
-    user = ReadUserModel.model_validate(auth_service.get_user_by_id(workflow.user_id))
-
-    await workflow_service.run_workflow(workflow_id, user)
+    try:
+        # One session for the task; the turn itself stores as it streams
+        async with unit_of_work():
+            async with AsyncDatabaseConnector() as db:
+                workflow = await db.session.scalar(
+                    select(Workflow).filter_by(id=workflow_id).limit(1)
+                )
+                if not workflow:
+                    return
+
+            user = await auth_service.get_user_by_id(workflow.user_id)
+
+            await workflow_service.run_workflow(workflow_id, user)
+    finally:
+        # Pooled connections belong to this task's event loop
+        await close_database()
+        await close_redis()
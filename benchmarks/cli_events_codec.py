@@ -0,0 +1,112 @@
+"""
+Decode + encode cost per Claude CLI stream-json event.
+
+Replays a recorded stream-json transcript and, for every line, decodes the
+event and encodes the SSE frames the chat stream would send for it, using
+either the previous dict pipeline (json.loads, nested .get() chains,
+json.dumps) or the typed event models.
+
+Usage:
+    python -m benchmarks.cli_events_codec --repeat 2000
+"""
+
+import argparse
+import datetime
+import json
+import time
+from pathlib import Path
+
+from app.models.messages.cli_event import AssistantEvent, ResultEvent, UserEvent
+from app.models.messages.stream_event import StreamEventDto
+from app.services.messages.cli_stream import parse_stream_line
+
+TRANSCRIPT = Path(__file__).parent / "fixtures" / "stream_json_transcript.jsonl"
+MESSAGE_ID = "7d0b6c5e-2f4e-4c1a-9b3d-8e2f1a0c9b7d"
+CONVERSATION_ID = "4a3b2c1d-0e9f-4a8b-b7c6-d5e4f3a2b1c0"
+
+
+def dict_pipeline(line: bytes, timestamp: str) -> int:
+    frames = 0
+    response_data = json.loads(line.decode("utf-8", errors="replace").strip())
+    message_content = response_data.get("message", {}).get("content", {})
+    if response_data.get("type") in ("assistant", "user"):
+        for content in message_content:
+            content.get("text", "").strip()
+            response = {
+                "user_id": 1,
+                "conversation_id": CONVERSATION_ID,
+                "message_id": MESSAGE_ID,
+                "role": content.get("type"),
+                "content": content,
+                "timestamp": timestamp,
+            }
+            f"data: {json.dumps(response)}\n\n"
+            frames += 1
+    elif response_data.get("type") == "result":
+        response = {
+            "user_id": 1,
+            "conversation_id": CONVERSATION_ID,
+            "message_id": MESSAGE_ID,
+            "role": "result",
+            "timestamp": timestamp,
+        }
+        f"data: {json.dumps(response)}\n\n"
+        frames += 1
+    return frames
+
+
+def typed_pipeline(line: bytes, timestamp: str) -> int:
+    frames = 0
+    event = parse_stream_line(line)
+    if isinstance(event, (AssistantEvent, UserEvent)):
+        for content in event.message.content:
+            StreamEventDto(
+                user_id=1,
+                conversation_id=CONVERSATION_ID,
+                message_id=MESSAGE_ID,
+                role=content.get("type"),
+                content=content,
+                timestamp=timestamp,
+            ).to_sse()
+            frames += 1
+    elif isinstance(event, ResultEvent):
+        StreamEventDto(
+            user_id=1,
+            conversation_id=CONVERSATION_ID,
+            message_id=MESSAGE_ID,
+            role="result",
+            timestamp=timestamp,
+        ).to_sse()
+        frames += 1
+    return frames
+
+
+def bench(name: str, pipeline, lines: list[bytes], repeat: int) -> None:
+    timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    frames = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            frames += pipeline(line, timestamp)
+    elapsed = time.perf_counter() - started
+
+    events = len(lines) * repeat
+    print(
+        f"{name:>6}: {events} events, {frames} frames in {elapsed:.2f}s "
+        f"-> {elapsed / events * 1e6:.1f} us/event"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transcript", type=Path, default=TRANSCRIPT)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    lines = [line for line in args.transcript.read_bytes().splitlines() if line.strip()]
+    bench("dict", dict_pipeline, lines, args.repeat)
+    bench("typed", typed_pipeline, lines, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
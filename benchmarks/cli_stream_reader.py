@@ -0,0 +1,147 @@
+"""
+Micro-benchmark for reading Claude CLI output from a PTY.
+
+Spawns concurrent fake CLI processes that print stream-json lines into a PTY
+and drains them with either the legacy select() + sleep(0.01) polling loop or
+the event-driven PtyLineReader, while a ticker task measures event-loop lag.
+
+Usage:
+    python -m benchmarks.cli_stream_reader --streams 50 --lines 2000
+"""
+
+import argparse
+import asyncio
+import os
+import pty
+import select
+import statistics
+import sys
+import time
+
+from app.services.messages.cli_stream import PtyLineReader, parse_stream_line
+
+FAKE_CLI = """
+import json, sys, time
+lines, size, interval = int(sys.argv[1]), int(sys.argv[2]), float(sys.argv[3])
+event = {"type": "assistant", "message": {"content": [{"type": "text", "text": "x" * size}]}}
+line = json.dumps(event) + "\\n"
+out = sys.stdout
+for _ in range(lines):
+    out.write(line)
+    if interval:
+        out.flush()
+        time.sleep(interval)
+out.flush()
+"""
+
+
+async def spawn_fake_cli(lines: int, line_size: int, interval: float):
+    master, slave = pty.openpty()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", FAKE_CLI, str(lines), str(line_size), str(interval),
+        stdin=slave, stdout=slave, stderr=slave,
+    )
+    os.close(slave)
+    return master, process
+
+
+async def read_legacy(master: int) -> int:
+    """The pre-existing select() + sleep(0.01) loop, kept here for comparison."""
+    count = 0
+    buffer = b""
+    while True:
+        try:
+            ready, _, _ = select.select([master], [], [], 0.1)
+            if ready:
+                chunk = os.read(master, 1024)
+                if not chunk:
+                    break
+                buffer += chunk
+                while b"\n" in buffer:
+                    line_bytes, buffer = buffer.split(b"\n", 1)
+                    if parse_stream_line(line_bytes) is not None:
+                        count += 1
+            await asyncio.sleep(0.01)
+        except OSError:
+            break
+    return count
+
+
+async def read_event_driven(master: int) -> int:
+    count = 0
+    reader = PtyLineReader(master)
+    try:
+        async for line_bytes in reader:
+            if parse_stream_line(line_bytes) is not None:
+                count += 1
+    finally:
+        reader.close()
+    return count
+
+
+async def measure_lag(stop: asyncio.Event, interval: float, samples: list[float]):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - expected))
+
+
+async def run(
+    mode: str,
+    streams: int,
+    lines: int,
+    line_size: int,
+    interval: float,
+) -> None:
+    read = read_legacy if mode == "legacy" else read_event_driven
+    procs = [await spawn_fake_cli(lines, line_size, interval) for _ in range(streams)]
+
+    stop = asyncio.Event()
+    lag_samples: list[float] = []
+    lag_task = asyncio.create_task(measure_lag(stop, 0.005, lag_samples))
+
+    started = time.perf_counter()
+    counts = await asyncio.gather(*(read(master) for master, _ in procs))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await lag_task
+    for master, process in procs:
+        await process.wait()
+        os.close(master)
+
+    total = sum(counts)
+    lag_ms = sorted(s * 1000 for s in lag_samples) or [0.0]
+    p99 = lag_ms[min(len(lag_ms) - 1, int(len(lag_ms) * 0.99))]
+    print(
+        f"{mode:>12}: {total} lines in {elapsed:.2f}s "
+        f"({total / elapsed:,.0f} lines/s), "
+        f"loop lag p50={statistics.median(lag_ms):.1f}ms "
+        f"p99={p99:.1f}ms max={lag_ms[-1]:.1f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--line-size", type=int, default=512)
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.005,
+        help="seconds between lines of each fake CLI (0 = emit as fast as possible)",
+    )
+    parser.add_argument("--mode", choices=["legacy", "event", "both"], default="both")
+    args = parser.parse_args()
+
+    modes = ["legacy", "event"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        asyncio.run(
+            run(mode, args.streams, args.lines, args.line_size, args.interval)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+PTY vs pipe transport for one-shot Claude CLI processes.
+
+Runs a fake CLI that writes a recorded stream-json transcript many times to
+stdout and reads it back through each transport the service supports: a
+PTY drained by PtyLineReader, or plain pipes read with
+StreamReader.readline. Reports throughput and the CPU time spent in this
+process and in the child (which includes tty line-discipline work).
+
+Usage:
+    python -m benchmarks.cli_transport --repeat 500 --runs 3
+"""
+
+import argparse
+import asyncio
+import os
+import pty
+import resource
+import sys
+import time
+from pathlib import Path
+
+from app.services.messages.cli_stream import (
+    STREAM_LINE_LIMIT,
+    PtyLineReader,
+    enlarge_pipe_buffer,
+    parse_stream_line,
+)
+
+TRANSCRIPT = Path(__file__).parent / "fixtures" / "stream_json_transcript.jsonl"
+
+FAKE_CLI = """
+import sys
+data = open(sys.argv[1], "rb").read()
+out = sys.stdout.buffer
+for _ in range(int(sys.argv[2])):
+    out.write(data)
+out.flush()
+"""
+
+
+async def read_pty(args: list[str]) -> int:
+    master, slave = pty.openpty()
+    process = await asyncio.create_subprocess_exec(
+        *args, stdin=slave, stdout=slave, stderr=slave
+    )
+    os.close(slave)
+
+    count = 0
+    reader = PtyLineReader(master)
+    try:
+        async for line_bytes in reader:
+            if parse_stream_line(line_bytes) is not None:
+                count += 1
+    finally:
+        reader.close()
+        os.close(master)
+    await process.wait()
+    return count
+
+
+async def read_pipe(args: list[str]) -> int:
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        limit=STREAM_LINE_LIMIT,
+    )
+    enlarge_pipe_buffer(process)
+
+    count = 0
+    while line_bytes := await process.stdout.readline():
+        if parse_stream_line(line_bytes.rstrip(b"\n")) is not None:
+            count += 1
+    await process.stderr.read()
+    await process.wait()
+    return count
+
+
+def run(mode: str, transcript: Path, repeat: int) -> tuple[float, float, float, int]:
+    args = [sys.executable, "-c", FAKE_CLI, str(transcript), str(repeat)]
+    read = read_pty if mode == "pty" else read_pipe
+
+    children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu_before = time.process_time()
+    started = time.perf_counter()
+
+    lines = asyncio.run(read(args))
+
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_before
+    children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    child_cpu = (children_after.ru_utime + children_after.ru_stime) - (
+        children_before.ru_utime + children_before.ru_stime
+    )
+    return elapsed, cpu, child_cpu, lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transcript", type=Path, default=TRANSCRIPT)
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    size_mb = args.transcript.stat().st_size * args.repeat / 1e6
+    for mode in ("pty", "pipe"):
+        results = [run(mode, args.transcript, args.repeat) for _ in range(args.runs)]
+        elapsed, cpu, child_cpu, lines = min(results)
+        print(
+            f"{mode:>4}: {lines} lines, {size_mb:.1f} MB in {elapsed:.2f}s "
+            f"({size_mb / elapsed:.1f} MB/s, {lines / elapsed:,.0f} lines/s), "
+            f"cpu parent={cpu:.2f}s child={child_cpu:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
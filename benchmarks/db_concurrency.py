@@ -0,0 +1,145 @@
+"""
+Concurrent-request throughput of sync vs async database access.
+
+Serves a minimal FastAPI app in-process through httpx's ASGI transport and
+fires requests at it from many concurrent clients. Every request runs one
+query that takes ``--query-ms`` on the server (``SELECT pg_sleep``) and
+inserts a user row stamped with a timezone-aware datetime, as the services
+write them, then rolls the insert back. It goes either through the sync
+psycopg2 session the repositories used to open inside ``async def``
+handlers, which blocks the event loop for the whole round trip, or through
+the asyncpg session they use now. Reports requests/s, request latency and
+event-loop lag.
+
+Needs the Postgres configured by the DATABASE_* settings.
+
+Usage:
+    python -m benchmarks.db_concurrency --requests 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import datetime
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import func, select
+
+from app.db.database import AsyncDatabaseConnector, DatabaseConnector, close_database
+from app.entities.auth.user import User
+
+
+def new_user() -> User:
+    return User(
+        email="db-concurrency@benchmark.invalid",
+        name="benchmark",
+        created_date=datetime.datetime.now(datetime.timezone.utc),
+    )
+
+
+def create_app(query_seconds: float) -> FastAPI:
+    app = FastAPI()
+    query = select(func.pg_sleep(query_seconds))
+
+    @app.get("/sync")
+    async def sync_query() -> dict:
+        with DatabaseConnector() as db:
+            db.session.execute(query)
+            db.session.add(new_user())
+            db.session.flush()
+            db.session.rollback()
+        return {}
+
+    @app.get("/async")
+    async def async_query() -> dict:
+        async with AsyncDatabaseConnector() as db:
+            await db.session.execute(query)
+            db.session.add(new_user())
+            await db.session.flush()
+            await db.session.rollback()
+        return {}
+
+    return app
+
+
+async def measure_lag(stop: asyncio.Event, interval: float, samples: list[float]):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - expected))
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run(mode: str, requests: int, concurrency: int, query_seconds: float) -> None:
+    transport = httpx.ASGITransport(app=create_app(query_seconds))
+    latencies: list[float] = []
+    remaining = iter(range(requests))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up the connection pool before measuring
+        await asyncio.gather(*(client.get(f"/{mode}") for _ in range(concurrency)))
+
+        async def worker() -> None:
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.get(f"/{mode}")
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        stop = asyncio.Event()
+        lag_samples: list[float] = []
+        lag_task = asyncio.create_task(measure_lag(stop, 0.005, lag_samples))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        await lag_task
+
+    await close_database()
+
+    latency_ms = sorted(s * 1000 for s in latencies)
+    lag_ms = sorted(s * 1000 for s in lag_samples) or [0.0]
+    print(
+        f"{mode:>6}: {requests} requests in {elapsed:.2f}s "
+        f"({requests / elapsed:,.0f} req/s), "
+        f"latency p50={statistics.median(latency_ms):.1f}ms "
+        f"p99={percentile(latency_ms, 0.99):.1f}ms, "
+        f"loop lag p99={percentile(lag_ms, 0.99):.1f}ms max={lag_ms[-1]:.1f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=50,
+        help="concurrent clients; the pool holds up to 17 connections",
+    )
+    parser.add_argument(
+        "--query-ms",
+        type=float,
+        default=5.0,
+        help="server-side duration of each query",
+    )
+    parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+    args = parser.parse_args()
+
+    modes = ["sync", "async"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        asyncio.run(
+            run(mode, args.requests, args.concurrency, args.query_ms / 1000)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Index usage of the hot message, conversation and workflow schedule queries.
+
+Seeds users, conversations, messages, workflows and schedules inside one
+transaction, runs ANALYZE, then EXPLAINs the statements the repositories
+actually build (captured by swapping their connector for a recording one)
+and checks that each plan reads through its index instead of a sequential
+scan. The transaction is rolled back, so nothing is left behind. Exits
+non-zero when a query stops using its index, so it can gate migrations.
+
+Needs the Postgres configured by the DATABASE_* settings, migrated to
+head.
+
+Usage:
+    python -m benchmarks.index_usage --users 100 --conversations 20
+"""
+
+import argparse
+import asyncio
+import sys
+from typing import Any, Awaitable, Callable, Iterator
+from unittest import mock
+
+from sqlalchemy import Executable, select, text
+from sqlalchemy.orm import Session
+
+from app.db.database import DatabaseConnector
+from app.entities.workflows.workflow import WorkflowSchedule
+from app.repositories.messages import conversation as conversation_module
+from app.repositories.messages import messages as messages_module
+from app.repositories.messages.conversation import ConversationRepository
+from app.repositories.messages.messages import MessageRepository
+
+SEED_MARKER = "index-usage"
+
+SEED_STATEMENTS = (
+    """
+    INSERT INTO pam.users (email, name, created_date)
+    SELECT :marker || '-' || g || '@example.com', :marker, now()
+    FROM generate_series(1, :users) g
+    """,
+    # Every tenth conversation is soft-deleted
+    """
+    INSERT INTO pam.conversations
+        (user_id, title, type, is_pinned, created_date, updated_date, deleted_date)
+    SELECT u.id, :marker, 'chat', g % 7 = 0, now(), now() - g * interval '1 minute',
+           CASE WHEN g % 10 = 0 THEN now() END
+    FROM pam.users u CROSS JOIN generate_series(1, :conversations) g
+    WHERE u.name = :marker
+    """,
+    """
+    INSERT INTO pam.messages
+        (user_id, conversation_id, role, content_new, timestamp)
+    SELECT c.user_id, c.id, 'user', '{"type": "text"}',
+           c.updated_date - t * interval '1 minute'
+    FROM pam.conversations c CROSS JOIN generate_series(1, :turns) t
+    WHERE c.title = :marker
+    """,
+    """
+    INSERT INTO pam.messages
+        (user_id, parent_message_id, conversation_id, role, content_new, timestamp)
+    SELECT m.user_id, m.id, m.conversation_id, 'assistant', '{"type": "text"}',
+           m.timestamp + b * interval '1 second'
+    FROM pam.messages m
+    JOIN pam.conversations c ON c.id = m.conversation_id
+    CROSS JOIN generate_series(1, :blocks) b
+    WHERE c.title = :marker AND m.role = 'user'
+    """,
+    """
+    INSERT INTO pam.workflows
+        (user_id, name, prompt, is_active, created_date, updated_date)
+    SELECT u.id, :marker, 'prompt', true, now(), now()
+    FROM pam.users u CROSS JOIN generate_series(1, :workflows) g
+    WHERE u.name = :marker
+    """,
+    """
+    INSERT INTO pam.workflow_schedules
+        (workflow_id, repeat_every, hour, minute, created_date, updated_date)
+    SELECT w.id, 'day', 9, 0, now(), now()
+    FROM pam.workflows w
+    WHERE w.name = :marker
+    """,
+    "ANALYZE pam.users, pam.conversations, pam.messages, pam.workflows, "
+    "pam.workflow_schedules",
+)
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+class _RecordingSession:
+    """Stands in for the repositories' session and keeps their statements."""
+
+    def __init__(self) -> None:
+        self.statements: list[Executable] = []
+
+    async def _record(self, statement: Executable, *args, **kwargs) -> list:
+        self.statements.append(statement)
+        return []
+
+    scalar = _record
+    scalars = _record
+    execute = _record
+
+
+def capture(call: Callable[[], Awaitable[Any]]) -> Executable:
+    """The single statement a repository method sends to the database."""
+    session = _RecordingSession()
+
+    class RecordingConnector:
+        def __init__(self) -> None:
+            self.session = session
+
+        async def __aenter__(self) -> "RecordingConnector":
+            return self
+
+        async def __aexit__(self, *exc_info) -> None:
+            pass
+
+    with (
+        mock.patch.object(messages_module, "AsyncDatabaseConnector", RecordingConnector),
+        mock.patch.object(conversation_module, "AsyncDatabaseConnector", RecordingConnector),
+    ):
+        asyncio.run(call())
+
+    (statement,) = session.statements
+    return statement
+
+
+def plan_nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+def explain(session: Session, statement: Executable) -> dict:
+    sql = statement.compile(
+        dialect=session.get_bind().dialect,
+        compile_kwargs={"literal_binds": True},
+    )
+    # Run as driver SQL: the rendered literals may contain ":name" sequences
+    (result,) = (
+        session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar_one()
+    )
+    return result["Plan"]
+
+
+def seed(session: Session, args: argparse.Namespace) -> None:
+    params = {
+        "marker": SEED_MARKER,
+        "users": args.users,
+        "conversations": args.conversations,
+        "turns": args.turns,
+        "blocks": args.blocks,
+        "workflows": args.workflows,
+    }
+    for statement in SEED_STATEMENTS:
+        session.execute(text(statement), params)
+
+
+def checks(session: Session) -> list[tuple[str, set[str], Executable]]:
+    """(name, expected indexes, statement) for every hot query."""
+    user_id, conversation_id, updated_date = session.execute(
+        text(
+            "SELECT user_id, id, updated_date FROM pam.conversations "
+            "WHERE title = :marker AND deleted_date IS NULL LIMIT 1"
+        ),
+        {"marker": SEED_MARKER},
+    ).one()
+    roots = session.execute(
+        text(
+            "SELECT id, timestamp FROM pam.messages "
+            "WHERE conversation_id = :conversation_id AND role = 'user' "
+            "ORDER BY timestamp DESC LIMIT 20"
+        ),
+        {"conversation_id": conversation_id},
+    ).all()
+    workflow_id = session.execute(
+        text("SELECT id FROM pam.workflows WHERE name = :marker LIMIT 1"),
+        {"marker": SEED_MARKER},
+    ).scalar_one()
+
+    messages = MessageRepository()
+    conversations = ConversationRepository()
+    before = (roots[-1].timestamp, roots[-1].id)
+    return [
+        (
+            "page of turns",
+            {
+                "ix_messages_user_id_role_conversation_id_timestamp",
+                "ix_messages_parent_message_id",
+            },
+            capture(lambda: messages.get_turns(user_id, conversation_id, limit=20)),
+        ),
+        (
+            "page of turns before cursor",
+            {
+                "ix_messages_user_id_role_conversation_id_timestamp",
+                "ix_messages_parent_message_id",
+            },
+            capture(
+                lambda: messages.get_turns(
+                    user_id, conversation_id, limit=20, before=before
+                )
+            ),
+        ),
+        (
+            "messages of parents",
+            {"ix_messages_parent_message_id"},
+            capture(
+                lambda: messages.get_messages_for_parent_message_id(
+                    [root.id for root in roots]
+                )
+            ),
+        ),
+        (
+            "conversations of user",
+            {"ix_conversations_user_id_is_pinned_updated_date_id_active"},
+            capture(
+                lambda: conversations.get_conversations_by_user_id(user_id, limit=50)
+            ),
+        ),
+        (
+            "conversations of user after cursor",
+            {"ix_conversations_user_id_is_pinned_updated_date_id_active"},
+            capture(
+                lambda: conversations.get_conversations_by_user_id(
+                    user_id, limit=50, after=(False, updated_date, conversation_id)
+                )
+            ),
+        ),
+        (
+            "schedule of workflow",
+            {"ix_workflow_schedules_workflow_id"},
+            # DatabaseScheduler's lookup, on the sync session
+            select(WorkflowSchedule).filter_by(workflow_id=workflow_id).limit(1),
+        ),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--conversations", type=int, default=20, help="per user")
+    parser.add_argument("--turns", type=int, default=20, help="per conversation")
+    parser.add_argument("--blocks", type=int, default=5, help="replies per turn")
+    parser.add_argument("--workflows", type=int, default=5, help="per user")
+    parser.add_argument("--plans", action="store_true", help="print the plans")
+    args = parser.parse_args()
+
+    failures = 0
+    with DatabaseConnector() as db:
+        try:
+            seed(db.session, args)
+            for name, indexes, statement in checks(db.session):
+                plan = explain(db.session, statement)
+                nodes = list(plan_nodes(plan))
+                used = {
+                    node.get("Index Name")
+                    for node in nodes
+                    if node["Node Type"] in INDEX_SCANS
+                }
+                seq_scans = {
+                    node["Relation Name"]
+                    for node in nodes
+                    if node["Node Type"] == "Seq Scan"
+                }
+                ok = indexes <= used and not seq_scans
+                failures += not ok
+                print(
+                    f"{'ok' if ok else 'FAIL':>4}  {name}: expected {sorted(indexes)}, "
+                    f"used {sorted(filter(None, used)) or 'no index'}"
+                    + (f", seq scan on {sorted(seq_scans)}" if seq_scans else "")
+                )
+                if args.plans or not ok:
+                    print(plan)
+        finally:
+            db.session.rollback()
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Login throughput under concurrency, hashing inline vs in the hasher pool.
+
+Serves a minimal FastAPI app in-process through httpx's ASGI transport and
+fires logins at it from many concurrent clients. Every login verifies a
+password against a stored hash of the chosen scheme, either inline in the
+``async def`` handler, as AuthService used to, which blocks the event loop
+for the whole hash, or through PasswordHasher's thread pool. Reports
+logins/s, login latency and event-loop lag, the delay every other request
+of the worker would see.
+
+Needs argon2-cffi and bcrypt; no database.
+
+Usage:
+    python -m benchmarks.login_throughput --requests 500 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from app.config import settings
+from app.services.auth.passwords import PasswordHasher, get_password_hasher
+
+PASSWORD = "correct horse battery staple"
+
+
+def create_app(hasher: PasswordHasher, password_hash: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/inline")
+    async def login_inline() -> dict:
+        if not hasher._context.verify(PASSWORD, password_hash):
+            raise HTTPException(status_code=401)
+        return {}
+
+    @app.post("/pool")
+    async def login_pool() -> dict:
+        matches, _ = await hasher.verify(PASSWORD, password_hash)
+        if not matches:
+            raise HTTPException(status_code=401)
+        return {}
+
+    return app
+
+
+async def measure_lag(stop: asyncio.Event, interval: float, samples: list[float]):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - expected))
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run(mode: str, requests: int, concurrency: int) -> None:
+    hasher = get_password_hasher()
+    password_hash = await hasher.hash(PASSWORD)
+    transport = httpx.ASGITransport(app=create_app(hasher, password_hash))
+    latencies: list[float] = []
+    remaining = iter(range(requests))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker() -> None:
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.post(f"/{mode}")
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        stop = asyncio.Event()
+        lag_samples: list[float] = []
+        lag_task = asyncio.create_task(measure_lag(stop, 0.005, lag_samples))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        await lag_task
+
+    latency_ms = sorted(s * 1000 for s in latencies)
+    lag_ms = sorted(s * 1000 for s in lag_samples) or [0.0]
+    print(
+        f"{mode:>6}: {requests} logins in {elapsed:.2f}s "
+        f"({requests / elapsed:,.1f} logins/s), "
+        f"latency p50={statistics.median(latency_ms):.1f}ms "
+        f"p99={percentile(latency_ms, 0.99):.1f}ms, "
+        f"loop lag p99={percentile(lag_ms, 0.99):.1f}ms max={lag_ms[-1]:.1f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument(
+        "--scheme",
+        choices=["argon2", "bcrypt"],
+        default=settings.PASSWORD_HASH_SCHEME,
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.PASSWORD_HASH_MAX_WORKERS,
+        help="hasher pool size",
+    )
+    parser.add_argument("--mode", choices=["inline", "pool", "both"], default="both")
+    args = parser.parse_args()
+
+    # Read by get_password_hasher when it first builds the hasher
+    settings.PASSWORD_HASH_SCHEME = args.scheme
+    settings.PASSWORD_HASH_MAX_WORKERS = args.workers
+
+    modes = ["inline", "pool"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        asyncio.run(run(mode, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
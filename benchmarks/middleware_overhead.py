@@ -0,0 +1,137 @@
+"""
+Overhead of the API key and error middlewares, BaseHTTPMiddleware vs ASGI.
+
+Serves a minimal FastAPI app in-process through httpx's ASGI transport,
+behind either the BaseHTTPMiddleware versions of HarmixAPIKeyMiddleware
+and ErrorLoggingMiddleware the app used to have, or the pure ASGI ones in
+app/middlewares.py. Measures:
+
+- plain JSON requests from many concurrent clients: requests/s and
+  latency p50/p99;
+- one SSE stream of many small chunks, as /v1/messages/messages sends:
+  chunks/s through the middleware stack.
+
+No database or Redis needed.
+
+Usage:
+    python -m benchmarks.middleware_overhead --requests 5000 --chunks 50000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+
+from app.config import settings
+from app.middlewares import ErrorLoggingMiddleware, HarmixAPIKeyMiddleware
+
+CHUNK = b'data: {"type": "text", "text": "Hello there"}\n\n'
+
+
+class LegacyHarmixAPIKeyMiddleware(BaseHTTPMiddleware):
+    """The API key check as a BaseHTTPMiddleware, as the app used to have it."""
+
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path in settings.DOCS_PUBLIC_PATHS or request.method == "OPTIONS":
+            return await call_next(request)
+        if request.headers.get("api-key") != settings.HARMIX_API_KEY:
+            return JSONResponse(status_code=403, content={"detail": "API key is invalid"})
+        return await call_next(request)
+
+
+class LegacyErrorLoggingMiddleware(BaseHTTPMiddleware):
+    """The error mapping as a BaseHTTPMiddleware, as the app used to have it."""
+
+    async def dispatch(self, request: Request, call_next):
+        try:
+            return await call_next(request)
+        except Exception:
+            return JSONResponse(status_code=503, content={"detail": "unavailable"})
+
+
+def create_app(stack: str, chunks: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/json")
+    async def plain_json() -> dict:
+        return {"id": 1, "title": "conversation"}
+
+    @app.get("/sse")
+    async def sse() -> StreamingResponse:
+        async def frames():
+            for _ in range(chunks):
+                yield CHUNK
+
+        return StreamingResponse(frames(), media_type="text/event-stream")
+
+    if stack == "base":
+        app.add_middleware(LegacyErrorLoggingMiddleware)
+        app.add_middleware(LegacyHarmixAPIKeyMiddleware)
+    else:
+        app.add_middleware(ErrorLoggingMiddleware)
+        app.add_middleware(HarmixAPIKeyMiddleware)
+    return app
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run(stack: str, requests: int, concurrency: int, chunks: int) -> None:
+    transport = httpx.ASGITransport(app=create_app(stack, chunks))
+    latencies: list[float] = []
+    remaining = iter(range(requests))
+
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://bench",
+        headers={"api-key": settings.HARMIX_API_KEY},
+    ) as client:
+
+        async def worker() -> None:
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.get("/json")
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        json_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = await client.get("/sse")
+        response.raise_for_status()
+        sse_elapsed = time.perf_counter() - started
+        assert len(response.content) == chunks * len(CHUNK)
+
+    latency_ms = sorted(s * 1000 for s in latencies)
+    print(
+        f"{stack:>4}: json {requests / json_elapsed:,.0f} req/s, "
+        f"latency p50={statistics.median(latency_ms):.2f}ms "
+        f"p99={percentile(latency_ms, 0.99):.2f}ms; "
+        f"sse {chunks / sse_elapsed:,.0f} chunks/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--chunks", type=int, default=50000, help="SSE chunks")
+    parser.add_argument("--stack", choices=["base", "asgi", "both"], default="both")
+    args = parser.parse_args()
+
+    stacks = ["base", "asgi"] if args.stack == "both" else [args.stack]
+    for stack in stacks:
+        asyncio.run(run(stack, args.requests, args.concurrency, args.chunks))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""add_claude_session_id_to_conversations
+
+Revision ID: 3f9c2d7a1b4e
+Revises: 5025bfe1c523
+Create Date: 2026-10-17 09:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2d7a1b4e'
+down_revision: Union[str, Sequence[str], None] = '5025bfe1c523'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add claude_session_id column to conversations table."""
+    op.add_column('conversations', sa.Column('claude_session_id', sa.String(), nullable=True), schema='pam')
+
+
+def downgrade() -> None:
+    """Remove claude_session_id column from conversations table."""
+    op.drop_column('conversations', 'claude_session_id', schema='pam')
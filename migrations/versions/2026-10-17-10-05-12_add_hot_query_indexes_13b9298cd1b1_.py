@@ -0,0 +1,71 @@
+"""add_hot_query_indexes
+
+Revision ID: 13b9298cd1b1
+Revises: 3f9c2d7a1b4e
+Create Date: 2026-10-17 10:05:12.583104
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '13b9298cd1b1'
+down_revision: Union[str, Sequence[str], None] = '3f9c2d7a1b4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add indexes for the message, conversation and workflow schedule lookups."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    # If a build fails it leaves an INVALID index behind: drop it and rerun.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_messages_user_id_role_conversation_id_timestamp',
+            'messages',
+            ['user_id', 'role', 'conversation_id', sa.text('"timestamp" DESC')],
+            schema='pam',
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_messages_parent_message_id',
+            'messages',
+            ['parent_message_id'],
+            schema='pam',
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_conversations_user_id_updated_date_active',
+            'conversations',
+            ['user_id', sa.text('updated_date DESC')],
+            schema='pam',
+            postgresql_concurrently=True,
+            postgresql_where=sa.text('deleted_date IS NULL'),
+        )
+        op.create_index(
+            'ix_workflow_schedules_workflow_id',
+            'workflow_schedules',
+            ['workflow_id'],
+            schema='pam',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Drop the message, conversation and workflow schedule lookup indexes."""
+    with op.get_context().autocommit_block():
+        for table_name, index_name in (
+            ('workflow_schedules', 'ix_workflow_schedules_workflow_id'),
+            ('conversations', 'ix_conversations_user_id_updated_date_active'),
+            ('messages', 'ix_messages_parent_message_id'),
+            ('messages', 'ix_messages_user_id_role_conversation_id_timestamp'),
+        ):
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                schema='pam',
+                postgresql_concurrently=True,
+            )
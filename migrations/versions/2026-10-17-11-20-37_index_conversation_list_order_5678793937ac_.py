@@ -0,0 +1,82 @@
+"""index_conversation_list_order
+
+Revision ID: 5678793937ac
+Revises: 13b9298cd1b1
+Create Date: 2026-10-17 11:20:37.318442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5678793937ac'
+down_revision: Union[str, Sequence[str], None] = '13b9298cd1b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Make is_pinned non-null and index conversations in list order."""
+    # Keyset pagination compares (is_pinned, updated_date, id) as a row,
+    # which a NULL would break
+    op.execute('UPDATE pam.conversations SET is_pinned = false WHERE is_pinned IS NULL')
+    op.alter_column(
+        'conversations',
+        'is_pinned',
+        existing_type=sa.Boolean(),
+        nullable=False,
+        server_default=sa.false(),
+        schema='pam',
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_conversations_user_id_is_pinned_updated_date_id_active',
+            'conversations',
+            [
+                'user_id',
+                sa.text('is_pinned DESC'),
+                sa.text('updated_date DESC'),
+                sa.text('id DESC'),
+            ],
+            schema='pam',
+            postgresql_concurrently=True,
+            postgresql_where=sa.text('deleted_date IS NULL'),
+        )
+        op.drop_index(
+            'ix_conversations_user_id_updated_date_active',
+            table_name='conversations',
+            schema='pam',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Restore the updated_date index and the nullable is_pinned column."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_conversations_user_id_updated_date_active',
+            'conversations',
+            ['user_id', sa.text('updated_date DESC')],
+            schema='pam',
+            postgresql_concurrently=True,
+            postgresql_where=sa.text('deleted_date IS NULL'),
+        )
+        op.drop_index(
+            'ix_conversations_user_id_is_pinned_updated_date_id_active',
+            table_name='conversations',
+            schema='pam',
+            postgresql_concurrently=True,
+        )
+
+    op.alter_column(
+        'conversations',
+        'is_pinned',
+        existing_type=sa.Boolean(),
+        nullable=True,
+        server_default=None,
+        schema='pam',
+    )
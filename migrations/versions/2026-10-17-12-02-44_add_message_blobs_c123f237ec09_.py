@@ -0,0 +1,146 @@
+"""add_message_blobs
+
+Revision ID: c123f237ec09
+Revises: 5678793937ac
+Create Date: 2026-10-17 12:02:44.771935
+
+"""
+import json
+import uuid
+import zlib
+from typing import Any, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c123f237ec09'
+down_revision: Union[str, Sequence[str], None] = '5678793937ac'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+# Fixed as they were when this revision was written, so the app's settings
+# and code can change without changing what it does
+OFFLOAD_BYTES = 16 * 1024
+PREVIEW_CHARS = 1000
+
+
+def offload_large_block(block: dict[str, Any]) -> tuple[dict[str, Any], bytes | None]:
+    """The block's preview and full JSON, or the block itself and None if small."""
+    if block.get('type') != 'tool_result':
+        return block, None
+
+    data = json.dumps(block).encode()
+    if len(data) <= OFFLOAD_BYTES:
+        return block, None
+
+    content = block.get('content')
+    if isinstance(content, list):
+        content = '\n'.join(
+            part.get('text', '') for part in content if isinstance(part, dict)
+        )
+    elif not isinstance(content, str):
+        content = json.dumps(content)
+
+    preview = {
+        **block,
+        'content': content[:PREVIEW_CHARS],
+        'truncated': True,
+        'size': len(data),
+    }
+    return preview, data
+
+
+def upgrade() -> None:
+    """Add message_blobs and move large stored tool_result blocks to it."""
+    op.create_table('message_blobs',
+    sa.Column('message_id', sa.UUID(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('created_date', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['message_id'], ['pam.messages.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('message_id'),
+    schema='pam'
+    )
+    # The data is compressed already, so Postgres need not try again
+    op.execute('ALTER TABLE pam.message_blobs ALTER COLUMN data SET STORAGE EXTERNAL')
+
+    conn = op.get_bind()
+    last_id = uuid.UUID(int=0)
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, content_new FROM pam.messages "
+                "WHERE role = 'tool_result' AND id > :last_id "
+                "AND octet_length(content_new::text) > :threshold "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {
+                'last_id': last_id,
+                'threshold': OFFLOAD_BYTES,
+                'limit': BATCH_SIZE,
+            },
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        blobs = []
+        previews = []
+        for row in rows:
+            preview, data = offload_large_block(row.content_new)
+            if data is None:
+                continue
+            blobs.append(
+                {'message_id': row.id, 'data': zlib.compress(data), 'size': len(data)}
+            )
+            previews.append({'id': row.id, 'content': json.dumps(preview)})
+
+        if blobs:
+            conn.execute(
+                sa.text(
+                    "INSERT INTO pam.message_blobs (message_id, data, size, created_date) "
+                    "VALUES (:message_id, :data, :size, now())"
+                ),
+                blobs,
+            )
+            conn.execute(
+                sa.text(
+                    "UPDATE pam.messages SET content_new = CAST(:content AS jsonb) "
+                    "WHERE id = :id"
+                ),
+                previews,
+            )
+
+
+def downgrade() -> None:
+    """Put the full blocks back into messages and drop message_blobs."""
+    conn = op.get_bind()
+    last_id = uuid.UUID(int=0)
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT message_id, data FROM pam.message_blobs "
+                "WHERE message_id > :last_id ORDER BY message_id LIMIT :limit"
+            ),
+            {'last_id': last_id, 'limit': BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].message_id
+
+        conn.execute(
+            sa.text(
+                "UPDATE pam.messages SET content_new = CAST(:content AS jsonb) "
+                "WHERE id = :id"
+            ),
+            [
+                {'id': row.message_id, 'content': zlib.decompress(row.data).decode()}
+                for row in rows
+            ],
+        )
+
+    op.drop_table('message_blobs', schema='pam')
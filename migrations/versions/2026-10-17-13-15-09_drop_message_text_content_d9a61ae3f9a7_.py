@@ -0,0 +1,44 @@
+"""drop_message_text_content
+
+Revision ID: d9a61ae3f9a7
+Revises: c123f237ec09
+Create Date: 2026-10-17 13:15:09.426180
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9a61ae3f9a7'
+down_revision: Union[str, Sequence[str], None] = 'c123f237ec09'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The text column as it used to be written: the prompt of user messages,
+# the stripped text of other blocks, '' for blocks without text
+TEXT_CONTENT = (
+    "CASE WHEN role = 'user' THEN coalesce(content_new->>'text', '') "
+    "ELSE btrim(coalesce(content_new->>'text', '')) END"
+)
+
+
+def upgrade() -> None:
+    """Keep content_new only, with a messages_with_content view for old readers."""
+    op.drop_column('messages', 'content', schema='pam')
+    op.execute(
+        'CREATE VIEW pam.messages_with_content AS '
+        'SELECT id, user_id, parent_message_id, conversation_id, role, '
+        f'{TEXT_CONTENT} AS content, content_new, timestamp '
+        'FROM pam.messages'
+    )
+
+
+def downgrade() -> None:
+    """Restore the content column from content_new and drop the view."""
+    op.execute('DROP VIEW pam.messages_with_content')
+    op.add_column('messages', sa.Column('content', sa.String(), nullable=True), schema='pam')
+    op.execute(f'UPDATE pam.messages SET content = {TEXT_CONTENT}')
+    op.alter_column('messages', 'content', existing_type=sa.String(), nullable=False, schema='pam')
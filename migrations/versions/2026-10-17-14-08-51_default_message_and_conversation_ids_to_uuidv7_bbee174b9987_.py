@@ -0,0 +1,69 @@
+"""default_message_and_conversation_ids_to_uuidv7
+
+Revision ID: bbee174b9987
+Revises: d9a61ae3f9a7
+Create Date: 2026-10-17 14:08:51.093617
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bbee174b9987'
+down_revision: Union[str, Sequence[str], None] = 'd9a61ae3f9a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Default message and conversation ids to UUIDv7 for rows inserted by SQL."""
+    # A random v4 with the first 48 bits replaced by the Unix time in ms and
+    # the version bits turned from 0100 into 0111
+    op.execute(
+        """
+        CREATE FUNCTION pam.uuid_generate_v7() RETURNS uuid AS $$
+            SELECT encode(
+                set_bit(
+                    set_bit(
+                        overlay(
+                            uuid_send(gen_random_uuid())
+                            PLACING substring(
+                                int8send(floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint)
+                                FROM 3
+                            )
+                            FROM 1 FOR 6
+                        ),
+                        52, 1
+                    ),
+                    53, 1
+                ),
+                'hex'
+            )::uuid
+        $$ LANGUAGE sql VOLATILE
+        """
+    )
+    # Existing rows keep their ids: clients, Redis and workflow runs refer to them
+    for table_name in ('messages', 'conversations'):
+        op.alter_column(
+            table_name,
+            'id',
+            existing_type=sa.UUID(),
+            server_default=sa.text('pam.uuid_generate_v7()'),
+            schema='pam',
+        )
+
+
+def downgrade() -> None:
+    """Default message and conversation ids back to gen_random_uuid()."""
+    for table_name in ('messages', 'conversations'):
+        op.alter_column(
+            table_name,
+            'id',
+            existing_type=sa.UUID(),
+            server_default=sa.text('gen_random_uuid()'),
+            schema='pam',
+        )
+    op.execute('DROP FUNCTION pam.uuid_generate_v7()')